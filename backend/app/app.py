@@ -1,15 +1,47 @@
-from fastapi import FastAPI, APIRouter, Request, Depends, status
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, Request, Depends, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from starlette.concurrency import run_in_threadpool
 from starlette.exceptions import HTTPException
 from functools import lru_cache
-from typing import Union
+from typing import Any, Dict, List, Optional, Union
+import gzip
 import os
 
-from .database import Database, SqliteDB
-from .models import MillenniumFalcon, Empire
-from .lib import give_me_the_odds, format_plan, get_millenium_falcon_from_file
+from . import dense
+from .cache import LRUCache, make_odds_key
+from .database import DEFAULT_POOL_SIZE, Database, SqliteDB
+from .executor import SolverPool
+from .ingest import parse_empire
+from .metrics import MetricsMiddleware, OddsMetrics, format_server_timing
+from .models import (
+    DEFAULT_ENGINE,
+    MillenniumFalcon,
+    Empire,
+    Engine,
+    Mode,
+    RoutesFormat,
+)
+from .responses import (
+    PrecompressedGZipMiddleware,
+    accepts_gzip,
+    compress,
+    encode_routes,
+    is_not_modified,
+    iter_routes_ndjson,
+    make_etag,
+)
+from .session import SolverSession
+from .solver import SolverStats, SolverTimeout
+from .lib import (
+    format_plan,
+    get_odds_gap,
+    get_millenium_falcon_from_file,
+)
 
 description = """Gives the odd to save the Galaxy"""
 title = "Gives me the odd"
@@ -18,13 +50,82 @@ version = "0.1.0"
 # ======================
 # DEPENDENCIES
 # ======================
-database = SqliteDB()
+# UNIVERSE_SNAPSHOT=0 compiles the graph from universe.db on every start,
+# SQLITE_POOL_SIZE read only connections are shared by the threads
+database = SqliteDB(
+    snapshot=os.environ.get("UNIVERSE_SNAPSHOT", "1") != "0",
+    pool_size=int(os.environ.get("SQLITE_POOL_SIZE", DEFAULT_POOL_SIZE)),
+)
 
 
 def get_database() -> Database:
     return database
 
 
+# SOLVER_WORKERS=0 solves in the server thread pool
+solver_pool = SolverPool(
+    workers=int(os.environ.get("SOLVER_WORKERS", 0)),
+    timeout=float(os.environ["SOLVER_TIMEOUT"])
+    if os.environ.get("SOLVER_TIMEOUT")
+    else None,
+)
+
+
+def get_solver_pool() -> SolverPool:
+    return solver_pool
+
+
+# Longest countdown an Empire may have, MAX_COUNTDOWN=0 disables the limit
+max_countdown = int(os.environ.get("MAX_COUNTDOWN", 10000))
+
+
+def check_countdown(empire: Empire):
+    if max_countdown and empire.countdown > max_countdown:
+        raise BadRequest(detail=f"countdown must not exceed {max_countdown}")
+
+
+# Encoded /api/odds responses, ODDS_CACHE_SIZE=0 disables the cache
+odds_cache = LRUCache(
+    size=int(os.environ.get("ODDS_CACHE_SIZE", 1024)),
+    ttl=float(os.environ["ODDS_CACHE_TTL"])
+    if os.environ.get("ODDS_CACHE_TTL")
+    else None,
+)
+
+
+def get_odds_cache() -> LRUCache:
+    return odds_cache
+
+
+# Compressed /api/routes bodies, by ETag. ROUTES_CACHE_SIZE=0 disables the cache
+routes_cache = LRUCache(size=int(os.environ.get("ROUTES_CACHE_SIZE", 16)))
+
+
+def get_routes_cache() -> LRUCache:
+    return routes_cache
+
+
+# { session_id: (universe_version, SolverSession) }
+sessions = LRUCache(
+    size=int(os.environ.get("SESSIONS_SIZE", 64)),
+    ttl=float(os.environ.get("SESSIONS_TTL", 15 * 60)),
+)
+
+
+def get_sessions() -> LRUCache:
+    return sessions
+
+
+metrics = OddsMetrics()
+metrics.add_cache("odds", odds_cache)
+metrics.add_cache("routes", routes_cache)
+metrics.add_cache("sessions", sessions)
+
+
+def get_metrics() -> OddsMetrics:
+    return metrics
+
+
 @lru_cache
 def get_millennium_falcon() -> MillenniumFalcon:
     try:
@@ -34,12 +135,80 @@ def get_millennium_falcon() -> MillenniumFalcon:
         raise ServiceUnvailable(detail="Cannot read millenium falcon json file")
 
 
+async def get_empire(req: Request) -> Empire:
+    # Empire of the request body, JSON, gzip or zip: parsing a large one is
+    # kept off the event loop
+    body = await req.body()
+    try:
+        return await run_in_threadpool(parse_empire, body)
+    except ValidationError as exc:
+        raise RequestValidationError([ErrorWrapper(exc, loc="body")])
+
+
+# The body of the endpoints reading it with get_empire
+EMPIRE_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {"$ref": "#/components/schemas/Empire"},
+            },
+        },
+    },
+}
+
+
 # ======================
 # CONTROLLERS
 # ======================
-# GET list of routes
-def endpoint_routes(req: Request, db: Database = Depends(get_database)):
-    return db.get_routes()
+# GET list of routes, by pages when a limit is given
+def endpoint_routes(
+    req: Request,
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    cursor: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    routes_format: RoutesFormat = Query(RoutesFormat.json, alias="format"),
+    db: Database = Depends(get_database),
+    cache: LRUCache = Depends(get_routes_cache),
+):
+    if "application/x-ndjson" in req.headers.get("Accept", ""):
+        routes_format = RoutesFormat.ndjson
+    etag = make_etag(
+        db.get_universe_version(),
+        origin,
+        destination,
+        cursor,
+        limit,
+        routes_format.value,
+    )
+    headers = {"ETag": etag, "Vary": "Accept, Accept-Encoding"}
+    if is_not_modified(req, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if routes_format == RoutesFormat.ndjson:
+        return StreamingResponse(
+            iter_routes_ndjson(db, cursor, limit, origin, destination),
+            media_type="application/x-ndjson",
+            headers=headers,
+        )
+
+    # Encoded and compressed once per universe version and parameters
+    item = cache.get(etag)
+    if item is None:
+        rows, next_cursor = db.get_routes_page(cursor, limit, origin, destination)
+        item = (compress(encode_routes(rows)), next_cursor)
+        cache.set(etag, item)
+    body, next_cursor = item
+
+    if next_cursor is not None:
+        next_url = req.url.include_query_params(cursor=next_cursor)
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    if accepts_gzip(req):
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body = gzip.decompress(body)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 # GET millenium falcon data
@@ -51,27 +220,168 @@ def endpoint_millennium_falcon(
 
 
 # POST empire data and get odds
-def endpoint_odds(
+async def endpoint_odds(
     req: Request,
-    empire: Empire,
+    empire: Empire = Depends(get_empire),
     db: Database = Depends(get_database),
     millenium_falcon: MillenniumFalcon = Depends(get_millennium_falcon),
+    pool: SolverPool = Depends(get_solver_pool),
+    cache: LRUCache = Depends(get_odds_cache),
+    metrics: OddsMetrics = Depends(get_metrics),
+    engine: Engine = DEFAULT_ENGINE,
+    mode: Mode = Mode.best,
+    time_budget_ms: Optional[float] = Query(None, gt=0),
+    debug: bool = False,
 ):
-    routes = db.get_routes()
+    stats = SolverStats()
+    check_countdown(empire)
+    if engine == Engine.numpy and not dense.is_available():
+        raise BadRequest(detail="engine=numpy requires NumPy, it is not installed")
+    if time_budget_ms is not None:
+        if mode == Mode.pareto:
+            raise BadRequest(detail="time_budget_ms is not supported by mode=pareto")
+        # Only the branch and bound search can stop with its best plan so far,
+        # the result reports it in place of the requested engine
+        engine = Engine.bnb
+
+    # Checking the universe version may reload it: keep it off the event loop
+    with stats.measure("universe"):
+        universe_version = await db.get_universe_version_async()
+    key = make_odds_key(
+        millenium_falcon,
+        empire,
+        universe_version,
+        engine,
+        mode,
+        anytime=time_budget_ms is not None,
+    )
+    # A debug response reports its own search: it skips the cache
+    body = None if debug else cache.get(key)
+
+    if body is None:
+        try:
+            with stats.measure("solve"):
+                result: Dict[str, Any]
+                if mode == Mode.pareto:
+                    frontier = await pool.solve_pareto(
+                        millenium_falcon, empire, db, stats
+                    )
+                    result = {"frontier": [format_pareto_odds(*x) for x in frontier]}
+                else:
+                    odd, formatted_plan = await pool.solve(
+                        millenium_falcon, empire, db, engine, stats, time_budget_ms
+                    )
+                    result = {"odd": odd, "plan": formatted_plan}
+                    if time_budget_ms is not None:
+                        result["optimal"] = stats.encounters_bound is None
+                        result["gap"] = get_odds_gap(odd, stats)
+                        result["engine"] = engine.value
+        except SolverTimeout as exc:
+            raise GatewayTimeout(detail=str(exc))
+        # The pareto search is an engine of its own
+        metrics.observe_solver(
+            stats, mode.value if mode == Mode.pareto else engine.value
+        )
+
+        with stats.measure("encode"):
+            content = jsonable_encoder(result)
+            body = JSONResponse(content=content).body
+        # A plan not proven optimal may be improved by the next request
+        if stats.encounters_bound is None:
+            cache.set(key, body)
+
+        if debug:
+            content["debug"] = {
+                "timings_ms": {
+                    stage: elapsed * 1000 for stage, elapsed in stats.timings.items()
+                },
+                **stats.get_counters(),
+            }
+            body = JSONResponse(content=content).body
+
+    metrics.observe_timings(stats.timings)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"Server-Timing": format_server_timing(stats.timings)},
+    )
+
 
-    odd, plan = give_me_the_odds(
-        millennium_falcon=millenium_falcon,
-        empire=empire,
-        routes=routes,
+# GET metrics in the Prometheus text format
+def endpoint_metrics(req: Request, metrics: OddsMetrics = Depends(get_metrics)):
+    return Response(
+        content=metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
     )
 
+
+# POST list of empire data and get odds for each of them
+async def endpoint_odds_batch(
+    req: Request,
+    empires: List[Empire],
+    db: Database = Depends(get_database),
+    millenium_falcon: MillenniumFalcon = Depends(get_millennium_falcon),
+    pool: SolverPool = Depends(get_solver_pool),
+):
+    for empire in empires:
+        check_countdown(empire)
+
+    try:
+        results = await pool.solve_batch(millenium_falcon, empires, db)
+    except SolverTimeout as exc:
+        raise GatewayTimeout(detail=str(exc))
+
+    return [{"odd": odd, "plan": formatted_plan} for odd, formatted_plan in results]
+
+
+# POST empire data and get odds, reusing the previous search of the session
+def endpoint_session_odds(
+    req: Request,
+    session_id: str,
+    empire: Empire = Depends(get_empire),
+    db: Database = Depends(get_database),
+    millenium_falcon: MillenniumFalcon = Depends(get_millennium_falcon),
+    pool: SolverPool = Depends(get_solver_pool),
+    sessions: LRUCache = Depends(get_sessions),
+):
+    # Same limits as /api/odds. The endpoint is run in the server thread pool:
+    # the session state lives in this process, not in the SolverPool workers,
+    # and the deadline covers the wait for the session lock
+    check_countdown(empire)
+    deadline = pool.get_deadline()
+    universe_version = db.get_universe_version()
+    graph = db.get_universe_graph()
+
+    item = sessions.get(session_id)
+    if item is None or item[0] != universe_version:
+        session = SolverSession(millenium_falcon, graph, max_countdown)
+        item = (universe_version, session)
+        sessions.set(session_id, item)
+
+    try:
+        odd, plan = item[1].update(empire, deadline)
+    except SolverTimeout as exc:
+        raise GatewayTimeout(detail=str(exc))
+    return format_odds(odd, plan, millenium_falcon.autonomy)
+
+
+def format_odds(odd, plan, autonomy: int):
     formatted_plan = []
     if plan:
-        formatted_plan = format_plan(plan, millenium_falcon.autonomy)
+        formatted_plan = format_plan(plan, autonomy)
 
     return {"odd": odd, "plan": formatted_plan}
 
 
+def format_pareto_odds(odd, arrival_day: int, refills: int, formatted_plan):
+    return {
+        "odd": odd,
+        "arrival_day": arrival_day,
+        "refills": refills,
+        "plan": formatted_plan,
+    }
+
+
 # ======================
 # API
 # ======================
@@ -90,6 +400,23 @@ api_router.add_api_route(
     methods=["POST"],
     path="/odds",
     endpoint=endpoint_odds,
+    openapi_extra=EMPIRE_REQUEST_BODY,
+)
+api_router.add_api_route(
+    methods=["GET"],
+    path="/metrics",
+    endpoint=endpoint_metrics,
+)
+api_router.add_api_route(
+    methods=["POST"],
+    path="/odds/batch",
+    endpoint=endpoint_odds_batch,
+)
+api_router.add_api_route(
+    methods=["POST"],
+    path="/sessions/{session_id}/odds",
+    endpoint=endpoint_session_odds,
+    openapi_extra=EMPIRE_REQUEST_BODY,
 )
 
 # ======================
@@ -107,6 +434,26 @@ class ServiceUnvailable(HTTPException):
         self.name = name
 
 
+class BadRequest(HTTPException):
+    def __init__(self, name="Bad request", detail=None, **kwargs):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail,
+            **kwargs,
+        )
+        self.name = name
+
+
+class GatewayTimeout(HTTPException):
+    def __init__(self, name="Gateway timeout", detail=None, **kwargs):
+        super().__init__(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=detail,
+            **kwargs,
+        )
+        self.name = name
+
+
 def exception_handler(req: Request, exc: Union[HTTPException, Exception]):
     return JSONResponse(
         status_code=getattr(exc, "status_code", status.HTTP_500_INTERNAL_SERVER_ERROR),
@@ -128,7 +475,8 @@ def setup_middlewares(app: FastAPI) -> FastAPI:
         allow_methods={"GET", "POST"},
         allow_headers={},
     )
-    app.add_middleware(GZipMiddleware, minimum_size=1024)
+    app.add_middleware(PrecompressedGZipMiddleware, minimum_size=1024)
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
     return app
 
 
@@ -139,6 +487,21 @@ def setup_exception_handlers(app):
     app.add_exception_handler(Exception, exception_handler)
 
 
+def preload_universe():
+    """
+    Loads the universe before the server forks its workers: they share it
+    through copy on write instead of loading one each. Called again on a
+    reload, the universe is only read if the database changed.
+    """
+    millennium_falcon = get_millennium_falcon()
+    if database.universe_graph is None:
+        database.connect(millennium_falcon.routes_db)
+    else:
+        database.reconnect()
+    database.get_universe_graph()
+    database.release_connections()
+
+
 # ======================
 # APP FACTORY
 # ======================
@@ -157,10 +520,17 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     async def startup():
         millennium_falcon = get_millennium_falcon()
-        database.connect(millennium_falcon.routes_db)
+        if database.universe_graph is None:
+            database.connect(millennium_falcon.routes_db)
+        else:
+            # Preloaded by the server before it forked this worker
+            database.reconnect()
+        database.get_universe_graph()
+        solver_pool.start(millennium_falcon)
 
     @app.on_event("shutdown")
     async def shutdown():
+        solver_pool.shutdown()
         database.disconnect()
 
     return app
@@ -0,0 +1,117 @@
+import glob
+import json
+import os
+import sys
+from functools import partial
+from multiprocessing.pool import Pool
+from typing import Dict, Iterable, Iterator, Optional, TextIO, Tuple, Union
+
+
+from pydantic import ValidationError
+
+from . import executor
+from .ingest import parse_empire
+from .lib import give_me_the_odds
+from .models import DEFAULT_ENGINE, Engine, MillenniumFalcon
+
+# (source, Empire JSON): the JSON is None when the source is a file, the
+# worker reads it
+BatchItem = Tuple[str, Optional[str]]
+# Items sent at once to a worker
+BATCH_CHUNK_SIZE = 16
+
+
+def iter_jsonl(file: TextIO, name: str) -> Iterator[BatchItem]:
+    for line_number, line in enumerate(file, start=1):
+        if line.strip():
+            yield (f"{name}:{line_number}", line)
+
+
+def iter_batch_items(source: str) -> Iterator[BatchItem]:
+    """
+    Empire scenarios of a batch, read lazily from `source`: `-` for a JSONL
+    stream on stdin, a directory of JSON files, a JSONL file, or a glob of
+    JSON and JSONL files.
+    """
+    if source == "-":
+        yield from iter_jsonl(sys.stdin, "-")
+        return
+
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "*.json")))
+    else:
+        paths = sorted(glob.glob(source))
+    for path in paths:
+        if path.endswith(".jsonl"):
+            with open(path) as file:
+                yield from iter_jsonl(file, path)
+        else:
+            yield (path, None)
+
+
+def solve_batch_item(item: BatchItem, engine: Engine = DEFAULT_ENGINE) -> Dict:
+    # Runs in a worker, on the universe loaded by executor.init_worker.
+    # A bad scenario is reported in its result, the batch goes on
+    source, line = item
+    data: Optional[Union[bytes, str]] = line
+    try:
+        if data is None:
+            with open(source, "rb") as file:
+                data = file.read()
+        empire = parse_empire(data)
+    except (OSError, ValidationError) as exc:
+        return {"source": source, "error": str(exc).replace("\n", " ")}
+
+    odd, _ = give_me_the_odds(
+        millennium_falcon=executor.worker_millennium_falcon,  # type: ignore
+        empire=empire,
+        graph=executor.worker_database.get_universe_graph(),  # type: ignore
+        engine=engine,
+    )
+    return {"source": source, "odd": odd}
+
+
+def run_batch(
+    millennium_falcon: MillenniumFalcon,
+    items: Iterable[BatchItem],
+    output: TextIO,
+    jobs: int = 1,
+    ordered: bool = True,
+    engine: Engine = DEFAULT_ENGINE,
+) -> int:
+    """
+    Writes the odds of every item to `output` as JSONL, as soon as they are
+    known: in the order of the items when `ordered`, else in completion
+    order. Returns the number of items.
+
+    The universe is loaded once per process: with `jobs` > 1, the items are
+    spread on a pool of worker processes that all map the universe snapshot
+    beside the database.
+    """
+    # Compiles the snapshot once, before the workers map it
+    executor.init_worker(millennium_falcon)
+    solve = partial(solve_batch_item, engine=engine)
+
+    pool: Optional[Pool] = None
+    results: Iterable[Dict]
+    if jobs <= 1:
+        results = map(solve, items)
+    else:
+        pool = Pool(
+            jobs, initializer=executor.init_worker, initargs=(millennium_falcon,)
+        )
+        imap = pool.imap if ordered else pool.imap_unordered
+        results = imap(solve, items, chunksize=BATCH_CHUNK_SIZE)
+
+    count = 0
+    try:
+        for result in results:
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            count += 1
+    finally:
+        if pool is not None:
+            # Every result is written, or the batch was interrupted
+            pool.terminate()
+            pool.join()
+    return count
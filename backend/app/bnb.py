@@ -0,0 +1,257 @@
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+
+from .graph import UNREACHABLE, UniverseGraph
+from .models import BountyHuntersIndex
+from .pareto import ParetoLabel, build_plan_from_pareto_label
+from .solver import (
+    PlanNode,
+    SolverStats,
+    can_end_plan,
+    can_wait,
+    check_deadline,
+    get_jumps,
+    get_plan_outside_graph,
+    get_search_bounds,
+)
+
+# (label, fuel left) of a branch of the search
+Branch = Tuple[ParetoLabel, int]
+
+
+def solve_branch_and_bound(
+    start: str,
+    end: str,
+    countdown: int,
+    autonomy: int,
+    graph: UniverseGraph,
+    bounty_hunters_index: BountyHuntersIndex,
+    deadline: Optional[float] = None,
+    stats: Optional[SolverStats] = None,
+    soft_deadline: Optional[float] = None,
+) -> Tuple[int, Optional[PlanNode]]:
+    """
+    Depth first search from the departure, bounded by the best plan found.
+
+    The (encounters, route_len) of the best plan found so far is the bound: a
+    branch is cut as soon as its encounters, and its nodes plus the fewest
+    routes left to the arrival, cannot beat it. The most promising branch is
+    explored first, so a good plan bounds the search early. The search stops
+    as soon as a plan reaches the lower bound of the departure: no other plan
+    can be better.
+
+    Branches cut by the bound are counted in `stats.states_bounded`, the ones
+    dominated by a state already explored in `stats.states_pruned`.
+    Same result as `solver.solve`.
+
+    At `soft_deadline` (a time.time() timestamp) the search stops and returns
+    the best plan found so far, or no plan if none was found yet. The fewest
+    encounters a better plan could have is then set in
+    `stats.encounters_bound`: the encounters of the branches left.
+    """
+    if stats is None:
+        stats = SolverStats()
+
+    start_id = graph.get_planet_id(start)
+    end_id = graph.get_planet_id(end)
+    if start_id is None or end_id is None:
+        return (0, get_plan_outside_graph(start, end, countdown, autonomy))
+
+    _, travel_times_to_end = get_search_bounds(graph, start_id, end_id, autonomy)
+    if travel_times_to_end[start_id] > countdown:
+        return (0, None)
+    hops_to_end = graph.get_travel_times(end_id, autonomy, reverse=True, hops=True)
+
+    # (encounters, route_len) no plan can beat
+    start_encounters = int((start_id, 0) in bounty_hunters_index)
+    lower_bound = (start_encounters, 1 + hops_to_end[start_id])
+    best: Optional[ParetoLabel] = None
+    best_score: Tuple[float, float] = (UNREACHABLE, UNREACHABLE)
+
+    explored = ExploredStates()
+
+    def get_priority(child: Branch):
+        label, _ = child
+        return (
+            label.encounters,
+            label.route_len + hops_to_end[label.planet_id],
+            label.day + travel_times_to_end[label.planet_id],
+        )
+
+    stack: List[Branch] = [
+        (
+            ParetoLabel(
+                planet_id=start_id,
+                day=0,
+                encounters=start_encounters,
+                refills=0,
+                route_len=1,
+            ),
+            autonomy,
+        )
+    ]
+    popped = 0
+    pruned = 0
+    stopped = False
+    while stack:
+        stats.peak_frontier = max(stats.peak_frontier, len(stack))
+        label, fuel = stack.pop()
+        popped += 1
+        if popped % 1024 == 0:
+            check_deadline(deadline)
+        # Checked more often: the budget is usually a few milliseconds
+        if soft_deadline is not None and popped % 64 == 0:
+            if time.time() > soft_deadline:
+                stack.append((label, fuel))
+                stopped = True
+                break
+
+        # The bound may have improved since the label was pushed
+        if is_bounded(label, hops_to_end, best_score):
+            stats.states_bounded += 1
+            continue
+
+        # Reaching the arrival planet ends the plan
+        if label.planet_id == end_id:
+            stats.plans_scored += 1
+            if can_end_plan(graph, end_id, label.day, countdown):
+                best, best_score = label, (label.encounters, label.route_len)
+                if best_score == lower_bound:
+                    break
+            continue
+
+        if explored.is_dominated(label, fuel):
+            pruned += 1
+            continue
+        stats.states_expanded += 1
+
+        children, late = get_children(
+            label,
+            fuel,
+            graph,
+            end_id,
+            countdown,
+            autonomy,
+            travel_times_to_end,
+            bounty_hunters_index,
+        )
+        pruned += late
+        # The most promising child is popped first
+        children.sort(key=get_priority, reverse=True)
+        stack.extend(children)
+    stats.states_pruned += pruned
+
+    # The branches left may hold a better plan
+    if stopped:
+        bound = min(label.encounters for label, _ in stack)
+        if best is not None:
+            bound = min(bound, best.encounters)
+        stats.encounters_bound = bound
+
+    if best is None:
+        return (0, None)
+
+    plan = build_plan_from_pareto_label(
+        best, graph, autonomy, countdown, bounty_hunters_index
+    )
+    return (best.encounters, plan)
+
+
+class ExploredStates:
+    """
+    (fuel, encounters, route_len) of the states explored on every (planet,
+    day): a state with less fuel and no better plan cannot do better.
+    """
+
+    entries: Dict[Tuple[int, int], List[Tuple[int, int, int]]]
+
+    def __init__(self):
+        self.entries = defaultdict(list)
+
+    def is_dominated(self, label: ParetoLabel, fuel: int) -> bool:
+        # Records the state when it is not dominated
+        entries = self.entries[(label.planet_id, label.day)]
+        point = (fuel, label.encounters, label.route_len)
+        for other_fuel, encounters, route_len in entries:
+            if (
+                other_fuel >= fuel
+                and encounters <= label.encounters
+                and route_len <= label.route_len
+            ):
+                return True
+        entries[:] = [
+            entry
+            for entry in entries
+            if not (fuel >= entry[0] and point[1] <= entry[1] and point[2] <= entry[2])
+        ]
+        entries.append(point)
+        return False
+
+
+def is_bounded(
+    label: ParetoLabel,
+    hops_to_end: List[float],
+    best_score: Tuple[float, float],
+) -> bool:
+    # The branch cannot beat the best plan found so far: its encounters, and
+    # its nodes plus the fewest routes left to the arrival
+    score = (label.encounters, label.route_len + hops_to_end[label.planet_id])
+    return score >= best_score
+
+
+def get_children(
+    label: ParetoLabel,
+    fuel: int,
+    graph: UniverseGraph,
+    end_id: int,
+    countdown: int,
+    autonomy: int,
+    travel_times_to_end: List[float],
+    bounty_hunters_index: BountyHuntersIndex,
+) -> Tuple[List[Branch], int]:
+    """
+    Branches from a label: the jumps it can take, then waiting (and
+    refueling) one day on its planet. Returns them with the number of
+    branches pruned because they cannot reach the arrival before the end of
+    the countdown.
+    """
+    planet_id, day = label.planet_id, label.day
+    children: List[Branch] = []
+    late = 0
+
+    # case hyperspace jump
+    for destination_id, travel_time in get_jumps(graph, planet_id, fuel):
+        landing = day + travel_time
+        if landing + travel_times_to_end[destination_id] > countdown:
+            late += 1
+            continue
+        child = ParetoLabel(
+            planet_id=destination_id,
+            day=landing,
+            encounters=label.encounters
+            + ((destination_id, landing) in bounty_hunters_index),
+            refills=label.refills,
+            route_len=label.route_len + 1,
+            parent=label,
+        )
+        children.append((child, fuel - travel_time))
+
+    # case waiting (and refueling) on planet
+    if can_wait(graph, end_id, planet_id):
+        if day + 1 + travel_times_to_end[planet_id] > countdown:
+            return (children, late + 1)
+        child = ParetoLabel(
+            planet_id=planet_id,
+            day=day + 1,
+            encounters=label.encounters
+            + ((planet_id, day + 1) in bounty_hunters_index),
+            refills=label.refills + 1,
+            route_len=label.route_len + 1,
+            parent=label,
+            waited=True,
+        )
+        children.append((child, autonomy))
+
+    return (children, late)
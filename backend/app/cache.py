@@ -0,0 +1,94 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+from .models import DEFAULT_ENGINE, Empire, Engine, MillenniumFalcon, Mode
+
+
+def make_odds_key(
+    millennium_falcon: MillenniumFalcon,
+    empire: Empire,
+    universe_version: Hashable,
+    engine: Engine = DEFAULT_ENGINE,
+    mode: Mode = Mode.best,
+    anytime: bool = False,
+) -> str:
+    # Canonical scenario: the order and duplicates of the bounty hunters
+    # do not change the odds
+    bounty_hunters = sorted({(h.planet, h.day) for h in empire.bounty_hunters})
+    scenario = {
+        "millennium_falcon": millennium_falcon.dict(),
+        "countdown": empire.countdown,
+        "bounty_hunters": bounty_hunters,
+        "universe_version": repr(universe_version),
+        # Engines agree on the odds, not always on the plan among equal ones
+        "engine": Engine(engine).value,
+        "mode": Mode(mode).value,
+        # Responses with a time budget tell if their plan is optimal
+        "anytime": anytime,
+    }
+    data = json.dumps(scenario, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class LRUCache:
+    """
+    Thread safe LRU cache with an optional time to live (in seconds).
+
+    `size` = 0 disables the cache.
+    """
+
+    def __init__(self, size: int = 1024, ttl: Optional[float] = None):
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.items: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            item = self.items.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at is None or time.monotonic() < expires_at:
+                    self.items.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.items[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        if self.size <= 0:
+            return
+        expires_at = None
+        if self.ttl is not None:
+            expires_at = time.monotonic() + self.ttl
+        with self.lock:
+            self.items[key] = (expires_at, value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": len(self.items),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -1,15 +1,54 @@
+import os
+import queue
 import sqlite3
+import threading
 from contextlib import contextmanager
 from abc import ABC, abstractmethod
-from typing import List, Any
+from pathlib import Path
+from typing import List, Any, Iterator, Optional, Hashable, Tuple
 
+from starlette.concurrency import run_in_threadpool
 from .models import Route
+from .graph import RouteRow, UniverseGraph, UniverseGraphBuilder
+from .snapshot import load_or_compile
+
+# Rows fetched at once from the routes table
+ROUTES_CHUNK_SIZE = 10_000
+# Connections opened at most on a database
+DEFAULT_POOL_SIZE = 4
+
+
+def validate_routes_rows(rows: List[RouteRow]) -> List[RouteRow]:
+    # Column level validation: the types of a whole chunk are checked at once
+    # and the rows only go through pydantic when a column needs coercion
+    if not rows:
+        return rows
+    origins, destinations, travel_times = zip(*rows)
+    if (
+        set(map(type, origins)) <= {str}
+        and set(map(type, destinations)) <= {str}
+        and set(map(type, travel_times)) <= {int}
+    ):
+        return rows
+
+    validated = []
+    for origin, destination, travel_time in rows:
+        route = Route(origin=origin, destination=destination, travel_time=travel_time)
+        validated.append((route.origin, route.destination, route.travel_time))
+    return validated
 
 
 class Database(ABC):
     con: Any
     db_path: str
 
+    def __init__(self):
+        # Routes and compiled graph are cached until get_version changes
+        self.routes: Optional[List[Route]] = None
+        self.universe_graph: Optional[UniverseGraph] = None
+        self.universe_version: Optional[Hashable] = None
+        self.lock = threading.Lock()
+
     @abstractmethod
     def connect(self, path: str):
         pass
@@ -19,43 +58,322 @@ class Database(ABC):
         pass
 
     @abstractmethod
-    def get_routes(self) -> List[Route]:
+    def get_version(self) -> Hashable:
+        # Cheap signal that changes whenever the routes may have changed
+        pass
+
+    @abstractmethod
+    def read_routes(self) -> List[Route]:
         pass
 
+    def read_universe_graph(self) -> UniverseGraph:
+        return UniverseGraph.from_routes(self.read_routes())
+
+    def get_routes_page(
+        self,
+        after: int = 0,
+        limit: Optional[int] = None,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+    ) -> Tuple[List[RouteRow], Optional[int]]:
+        """
+        Routes after the `after` cursor, up to `limit`, optionally filtered on
+        their origin and destination. Returns the rows and the cursor of the
+        next page, None on the last one.
+
+        Here the routes are filtered in memory and a cursor is the position,
+        from 1, of the last route of a page.
+        """
+        rows: List[RouteRow] = []
+        cursor = after
+        routes = self.get_routes()
+        for position in range(after + 1, len(routes) + 1):
+            route = routes[position - 1]
+            if origin is not None and route.origin != origin:
+                continue
+            if destination is not None and route.destination != destination:
+                continue
+            if limit is not None and len(rows) == limit:
+                return (rows, cursor)
+            rows.append((route.origin, route.destination, route.travel_time))
+            cursor = position
+        return (rows, None)
+
+    def refresh(self):
+        version = self.get_version()
+        if version == self.universe_version:
+            return
+
+        with self.lock:
+            # Another thread may have reloaded while we were waiting
+            if version == self.universe_version:
+                return
+            self.universe_graph = self.read_universe_graph()
+            # Only read if asked for, the solver needs the graph alone
+            self.routes = None
+            self.universe_version = version
+
+    def get_routes(self) -> List[Route]:
+        self.refresh()
+        with self.lock:
+            if self.routes is None:
+                self.routes = self.read_routes()
+            return self.routes
+
+    def get_universe_graph(self) -> UniverseGraph:
+        self.refresh()
+        return self.universe_graph  # type: ignore
+
+    def get_universe_version(self) -> Hashable:
+        self.refresh()
+        return self.universe_version
+
+    # Same as above, for the async endpoints: the reads (and a reload of the
+    # universe) run in the thread pool, off the event loop
+    async def get_routes_async(self) -> List[Route]:
+        return await run_in_threadpool(self.get_routes)
+
+    async def get_universe_graph_async(self) -> UniverseGraph:
+        return await run_in_threadpool(self.get_universe_graph)
+
+    async def get_universe_version_async(self) -> Hashable:
+        return await run_in_threadpool(self.get_universe_version)
+
+
+class ConnectionPool:
+    """
+    Read only connections to a SQLite database, shared by the threads.
+
+    A connection is used by a single thread at a time: concurrent reads run on
+    their own connections instead of waiting for each other. Connections are
+    opened on demand, up to size, then the threads wait for an idle one.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int = DEFAULT_POOL_SIZE,
+        timeout: Optional[float] = None,
+        busy_timeout: float = 5.0,
+    ):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.path = path
+        self.size = size
+        # Seconds waiting for an idle connection, None waits forever
+        self.timeout = timeout
+        # Seconds waiting for a writer holding a lock on the database (only
+        # with a rollback journal: in WAL mode, writers never block readers)
+        self.busy_timeout = busy_timeout
+        # Last in, first out: the most recently used connections stay warm
+        self.idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self.opened = 0
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def open_connection(self) -> sqlite3.Connection:
+        # mode=ro never creates nor writes the database, and only takes shared
+        # locks. A WAL database stays readable while another process writes.
+        uri = Path(self.path).resolve().as_uri() + "?mode=ro"
+        con = sqlite3.connect(
+            uri, uri=True, timeout=self.busy_timeout, check_same_thread=False
+        )
+        con.execute("PRAGMA query_only = ON;")
+        return con
+
+    def get(self) -> sqlite3.Connection:
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Connection pool is closed")
+            can_open = self.opened < self.size
+            if can_open:
+                self.opened += 1
+        if can_open:
+            try:
+                return self.open_connection()
+            except Exception:
+                with self.lock:
+                    self.opened -= 1
+                raise
+
+        try:
+            return self.idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No idle connection after {self.timeout}s")
+
+    def put(self, con: sqlite3.Connection):
+        with self.lock:
+            if not self.closed:
+                self.idle.put(con)
+                return
+            self.opened -= 1
+        # Returned after close
+        con.close()
+
+    @contextmanager
+    def acquire(self) -> Iterator[sqlite3.Connection]:
+        con = self.get()
+        try:
+            yield con
+        finally:
+            self.put(con)
+
+    def close(self):
+        # Idle connections are closed now, the others when they are returned
+        with self.lock:
+            self.closed = True
+            while True:
+                try:
+                    con = self.idle.get_nowait()
+                except queue.Empty:
+                    break
+                self.opened -= 1
+                con.close()
+
 
 class SqliteDB(Database):
     con: sqlite3.Connection
+    pool: ConnectionPool
+
+    def __init__(self, snapshot: bool = True, pool_size: int = DEFAULT_POOL_SIZE):
+        super().__init__()
+        # Loads the graph from a memory mapped snapshot beside the database,
+        # compiled on first use
+        self.snapshot = snapshot
+        self.pool_size = pool_size
+        self.con_lock = threading.Lock()
 
     def connect(self, path):
-        con = sqlite3.connect(path, check_same_thread=False)
-        self.con = con
+        self.db_path = path
+        self.db_inode = self.get_inode()
+        self.pool = ConnectionPool(path, self.pool_size)
+        # PRAGMA data_version only compares within a connection: the version
+        # is always read on this one
+        self.con = self.pool.open_connection()
 
     def disconnect(self):
         if self.con:
             self.con.close()
+            self.pool.close()
+        self.routes = None
+        self.universe_graph = None
+        self.universe_version = None
+
+    def release_connections(self):
+        # Closes the connections but keeps the universe loaded, eg. before a
+        # fork: a SQLite connection must not be used across processes
+        self.con.close()
+        self.pool.close()
+
+    def reconnect(self):
+        # New connections to the same database, the universe loaded is kept
+        # when the database file did not change since
+        version = self.universe_version
+        self.connect(self.db_path)
+        new_version = self.get_version()
+        # data_version is only comparable within a connection
+        if version is not None and version[:3] == new_version[:3]:  # type: ignore
+            self.universe_version = new_version
 
     @contextmanager
     def get_cur(self):
-        cur = self.con.cursor()
-        try:
-            yield cur
-        finally:
-            cur.close()
+        with self.pool.acquire() as con:
+            cur = con.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
 
-    def get_routes(self) -> List[Route]:
+    def get_inode(self):
+        stat = os.stat(self.db_path)
+        return (stat.st_dev, stat.st_ino)
+
+    def get_version(self) -> Hashable:
+        with self.con_lock:
+            # The file was replaced (eg. mv new.db universe.db): the current
+            # connections still read the old one
+            if self.get_inode() != self.db_inode:
+                self.con.close()
+                self.pool.close()
+                self.connect(self.db_path)
+
+            stat = os.stat(self.db_path)
+            # Changes whenever another connection commits to the database
+            (data_version,) = self.con.execute("PRAGMA data_version;").fetchone()
+
+        return (self.db_inode, stat.st_mtime_ns, stat.st_size, data_version)
+
+    def iter_routes_rows(self) -> Iterator[List[RouteRow]]:
+        # Streams the validated rows of the routes table, by chunks
         with self.get_cur() as cur:
-            res = cur.execute("SELECT * FROM routes;")
-            rows = res.fetchall()
+            cur.arraysize = ROUTES_CHUNK_SIZE
+            cur.execute("SELECT origin, destination, travel_time FROM routes;")
+            while True:
+                rows = cur.fetchmany()
+                if not rows:
+                    return
+                yield validate_routes_rows(rows)
 
+    def read_routes(self) -> List[Route]:
         routes: List[Route] = []
-        for row in rows:
-            origin, destination, travel_time = row
-            routes.append(
-                Route(
+        for rows in self.iter_routes_rows():
+            routes.extend(
+                Route.construct(
                     origin=origin,
                     destination=destination,
                     travel_time=travel_time,
                 )
+                for origin, destination, travel_time in rows
             )
-
         return routes
+
+    def get_routes_page(
+        self,
+        after: int = 0,
+        limit: Optional[int] = None,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+    ) -> Tuple[List[RouteRow], Optional[int]]:
+        # Keyset pagination on the rowid: a page costs the same wherever it is
+        conditions = ["rowid > ?"]
+        params: List[Any] = [after]
+        if origin is not None:
+            conditions.append("origin = ?")
+            params.append(origin)
+        if destination is not None:
+            conditions.append("destination = ?")
+            params.append(destination)
+        query = (
+            "SELECT rowid, origin, destination, travel_time FROM routes"
+            f" WHERE {' AND '.join(conditions)} ORDER BY rowid"
+        )
+        if limit is not None:
+            # One more row tells if there is a next page
+            query += " LIMIT ?"
+            params.append(limit + 1)
+
+        with self.get_cur() as cur:
+            rows = cur.execute(query, params).fetchall()
+
+        cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            cursor = rows[-1][0]
+        return (validate_routes_rows([row[1:] for row in rows]), cursor)
+
+    def read_universe_graph(self) -> UniverseGraph:
+        if self.snapshot:
+            return load_or_compile(self.db_path, self.compile_universe_graph)
+        return self.compile_universe_graph()
+
+    def compile_universe_graph(self) -> UniverseGraph:
+        # Builds the adjacency arrays straight from the rows: no Route objects
+        builder = UniverseGraphBuilder()
+        for rows in self.iter_routes_rows():
+            builder.add_rows(rows)
+        return builder.build()
@@ -0,0 +1,306 @@
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+from array import array
+from bisect import bisect_left
+from weakref import WeakKeyDictionary
+
+np: Any
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+
+from .graph import UniverseGraph
+from .models import BountyHuntersIndex
+from .solver import (
+    PlanNode,
+    SolverStats,
+    Step,
+    build_plan,
+    can_end_plan,
+    can_wait,
+    check_deadline,
+    get_plan_outside_graph,
+    get_search_bounds,
+)
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+
+# Routes of a graph grouped by travel time: { travel_time: (sources,
+# unique destinations, offsets of the destinations) }, per autonomy
+EdgesByTravelTime = Dict[int, Tuple["ndarray", "ndarray", "ndarray"]]
+# (sorted state indexes planet * fuels + fuel, scores, offsets of every day)
+# of the expanded states
+ExpandedStates = Tuple["array[int]", "array[int]", "array[int]"]
+edges_cache: "WeakKeyDictionary[UniverseGraph, Dict[int, EdgesByTravelTime]]" = (
+    WeakKeyDictionary()
+)
+
+
+def is_available() -> bool:
+    return np is not None
+
+
+def get_edges_by_travel_time(graph: UniverseGraph, autonomy: int) -> EdgesByTravelTime:
+    # The routes the MillenniumFalcon can take with a full tank, like
+    # solver.get_jumps, sorted by destination so the best jump to a
+    # destination is a single np.minimum.reduceat
+    by_autonomy = edges_cache.setdefault(graph, {})
+    cached = by_autonomy.get(autonomy)
+    if cached is not None:
+        return cached
+
+    offsets, outgoing_targets, outgoing_travel_times = graph.outgoing
+    sources: "ndarray" = np.repeat(
+        np.arange(len(graph), dtype=np.int64), np.diff(np.asarray(offsets))
+    )
+    targets: "ndarray" = np.asarray(outgoing_targets, dtype=np.int64)
+    travel_times: "ndarray" = np.asarray(outgoing_travel_times, dtype=np.int64)
+
+    edges: EdgesByTravelTime = {}
+    for travel_time in np.unique(travel_times):
+        if travel_time <= 0 or travel_time > autonomy:
+            continue
+        selected = np.flatnonzero(travel_times == travel_time)
+        selected = selected[np.argsort(targets[selected], kind="stable")]
+        destinations, starts = np.unique(targets[selected], return_index=True)
+        edges[int(travel_time)] = (sources[selected], destinations, starts)
+
+    by_autonomy[autonomy] = edges
+    return edges
+
+
+def solve_dense(
+    start: str,
+    end: str,
+    countdown: int,
+    autonomy: int,
+    graph: UniverseGraph,
+    bounty_hunters_index: BountyHuntersIndex,
+    deadline: Optional[float] = None,
+    stats: Optional[SolverStats] = None,
+) -> Tuple[int, Optional[PlanNode]]:
+    """
+    Dynamic programming forward from the departure, one day at a time, on
+    dense NumPy arrays.
+
+    The states of a day are a planets x fuel array of scores: the best
+    (encounters, route_len) from the departure, packed in a single integer.
+    The jumps of a day are computed for every route at once, grouped by
+    travel time, and the waits for every planet at once. Only the days a jump
+    can still land on are kept as arrays; the scores of the states expanded
+    on a day, beaten by neither a fuller tank nor the countdown, are kept
+    compact to rebuild the plan backward from the best arrival.
+
+    The cost is polynomial in planets x countdown x autonomy, like
+    `solver.solve`, with the inner loops in NumPy: fastest on dense universes
+    with a small autonomy. The memory grows with autonomy x planets x fuel,
+    plus the expanded states of every day. Same result as `solver.solve`.
+    """
+    if np is None:
+        raise RuntimeError("the numpy engine requires numpy")
+    if stats is None:
+        stats = SolverStats()
+
+    start_id = graph.get_planet_id(start)
+    end_id = graph.get_planet_id(end)
+    if start_id is None or end_id is None:
+        return (0, get_plan_outside_graph(start, end, countdown, autonomy))
+    if countdown < 0:
+        return (0, None)
+
+    _, travel_times_to_end = get_search_bounds(graph, start_id, end_id, autonomy)
+    if travel_times_to_end[start_id] > countdown:
+        return (0, None)
+    days_to_end: "ndarray" = np.asarray(travel_times_to_end)
+
+    size = len(graph)
+    fuels = autonomy + 1
+    # score = encounters * stride + route_len, route_len <= countdown + 1
+    stride = countdown + 2
+    max_score = (countdown + 2) * stride
+    dtype = np.int32 if 2 * max_score < np.iinfo(np.int32).max else np.int64
+    # Unreached state: adding a transition to it never overflows
+    unreached = np.iinfo(dtype).max // 2
+
+    waiting_planets: "ndarray" = np.array(
+        [can_wait(graph, end_id, planet_id) for planet_id in range(size)], dtype=bool
+    )
+
+    hunters_days: Dict[int, List[int]] = {}
+    for planet_id, day in bounty_hunters_index:
+        if 0 <= day <= countdown:
+            hunters_days.setdefault(day, []).append(planet_id)
+
+    no_hunters: "ndarray" = np.ones(size, dtype=dtype)
+
+    def get_costs(day: int) -> "ndarray":
+        # Score added by landing on every planet on `day`, read only
+        if day not in hunters_days:
+            return no_hunters
+        costs: "ndarray" = np.ones(size, dtype=dtype)
+        costs[hunters_days[day]] += stride
+        return costs
+
+    edges = get_edges_by_travel_time(graph, autonomy)
+    # Scores of the states of the days a jump can still land on, in a ring
+    # buffer: the day `day` is in the slot `day % window`
+    window = max(autonomy, 1) + 1
+    scores: "ndarray" = np.full((window, size, fuels), unreached, dtype=dtype)
+    scores[0, start_id, autonomy] = get_costs(0)[start_id]
+    # Scores of the expanded states of every day, kept once their slot is
+    # recycled, to rebuild the plan
+    state_dtype = np.int32 if size * fuels <= np.iinfo(np.int32).max else np.int64
+    expanded_states: ExpandedStates = (
+        array(np.dtype(state_dtype).char),
+        array(np.dtype(dtype).char),
+        array("q", [0]),
+    )
+
+    pruned = 0
+    arrivals: List[Tuple[int, int, int]] = []
+    for day in range(countdown + 1):
+        check_deadline(deadline)
+        layer = scores[day % window]
+
+        # States that cannot reach the arrival before the end of the countdown
+        late = day + days_to_end > countdown
+        pruned += int(np.count_nonzero(layer[late] < unreached))
+        layer[late] = unreached
+        # States beaten by a fuller tank on the same planet, they take no jump
+        # the fuller one cannot, see solver.get_expanded_states
+        fuller = np.minimum.accumulate(layer[:, :0:-1], axis=1)[:, ::-1]
+        beaten = layer[:, :-1] >= fuller
+        pruned += int(np.count_nonzero(layer[:, :-1][beaten] < unreached))
+        layer[:, :-1][beaten] = unreached
+        reached_states = np.flatnonzero(layer < unreached)
+        reached = len(reached_states)
+        stats.states_expanded += reached
+        stats.peak_frontier = max(stats.peak_frontier, reached)
+        keep_expanded_states(
+            expanded_states,
+            reached_states.astype(state_dtype),
+            layer.ravel()[reached_states],
+        )
+
+        # Reaching the arrival planet ends the plan
+        arrival = int(layer[end_id].min())
+        if arrival < unreached and can_end_plan(graph, end_id, day, countdown):
+            arrivals.append((arrival, day, int(np.argmin(layer[end_id]))))
+        if day < countdown and reached:
+            departures = layer.copy()
+            departures[end_id] = unreached
+
+            # case waiting (and refueling) on planet
+            successors = scores[(day + 1) % window]
+            waits = departures.min(axis=1) + get_costs(day + 1)
+            successors[:, autonomy] = np.where(
+                waiting_planets,
+                np.minimum(successors[:, autonomy], waits),
+                successors[:, autonomy],
+            )
+
+            # case hyperspace jump, every route of a travel time at once
+            for travel_time, (sources, destinations, starts) in edges.items():
+                landing = day + travel_time
+                if landing > countdown:
+                    continue
+                jumps = np.minimum.reduceat(
+                    departures[sources, travel_time:], starts, axis=0
+                )
+                jumps += get_costs(landing)[destinations, None]
+                landed = (landing % window, destinations, slice(0, fuels - travel_time))
+                scores[landed] = np.minimum(scores[landed], jumps)
+
+        # The slot of the day is the slot of the day `day + window` from now
+        layer.fill(unreached)
+    stats.states_pruned += pruned
+    stats.plans_scored += len(arrivals)
+
+    if not arrivals:
+        return (0, None)
+
+    score, day, fuel = min(arrivals)
+    steps = get_steps(
+        expanded_states, graph, end_id, day, fuel, autonomy, countdown, get_costs
+    )
+    plan = build_plan(steps, graph, autonomy, bounty_hunters_index)
+    return (score // stride, plan)
+
+
+def keep_expanded_states(
+    expanded_states: ExpandedStates, states: "ndarray", scores: "ndarray"
+) -> None:
+    # Appends the sorted states of a day and their scores
+    indexes, states_scores, offsets = expanded_states
+    indexes.frombytes(states.tobytes())
+    states_scores.frombytes(scores.tobytes())
+    offsets.append(len(indexes))
+
+
+def get_expanded_score(
+    expanded_states: ExpandedStates, day: int, state: int
+) -> Optional[int]:
+    # Score of the state of a day, None when it was not expanded
+    indexes, states_scores, offsets = expanded_states
+    index = bisect_left(indexes, state, offsets[day], offsets[day + 1])
+    if index < offsets[day + 1] and indexes[index] == state:
+        return states_scores[index]
+    return None
+
+
+def get_steps(
+    expanded_states: ExpandedStates,
+    graph: UniverseGraph,
+    planet_id: int,
+    day: int,
+    fuel: int,
+    autonomy: int,
+    countdown: int,
+    get_costs: Callable[[int], "ndarray"],
+) -> List[Step]:
+    # Walks back from the arrival state through the expanded predecessors
+    # whose score leads to the score of their successor
+    end_id = planet_id
+    fuels = autonomy + 1
+    steps: List[Step] = [(planet_id, day, day < countdown)]
+    while day > 0:
+        state = planet_id * fuels + fuel
+        cost = int(get_costs(day)[planet_id])
+        score = get_expanded_score(expanded_states, day, state) - cost  # type: ignore
+        predecessor = None
+
+        # case previous_state was waiting on planet
+        if fuel == autonomy and can_wait(graph, end_id, planet_id):
+            for waiting_fuel in range(fuels):
+                state = planet_id * fuels + waiting_fuel
+                if get_expanded_score(expanded_states, day - 1, state) == score:
+                    predecessor = (planet_id, day - 1, waiting_fuel, True)
+                    break
+
+        # case previous_state was an hyperspace jump to planet
+        if predecessor is None:
+            for origin_id, travel_time in graph.get_incoming(planet_id):
+                if origin_id == end_id or not 0 < travel_time <= day:
+                    continue
+                if fuel + travel_time > autonomy:
+                    continue
+                state = origin_id * fuels + fuel + travel_time
+                if (
+                    get_expanded_score(expanded_states, day - travel_time, state)
+                    == score
+                ):
+                    predecessor = (
+                        origin_id,
+                        day - travel_time,
+                        fuel + travel_time,
+                        False,
+                    )
+                    break
+
+        planet_id, day, fuel, waited = predecessor  # type: ignore
+        steps.append((planet_id, day, waited))
+
+    steps.reverse()
+    return steps
@@ -0,0 +1,262 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from .database import Database, SqliteDB
+from .graph import UniverseGraph
+from .lib import (
+    give_me_the_odds,
+    give_me_the_odds_batch,
+    give_me_the_pareto_odds,
+    format_plan,
+)
+from .models import (
+    DEFAULT_ENGINE,
+    Empire,
+    Engine,
+    MillenniumFalcon,
+    MillenniumFalconPlan,
+)
+from .solver import SolverStats, SolverTimeout
+
+# (odd, formatted plan): a PlanNode chain is too deep to be pickled back
+# from a worker process
+Odds = Tuple[float, List[MillenniumFalconPlan]]
+# [(odd, arrival day, refills, formatted plan)]
+ParetoOdds = List[Tuple[float, int, int, List[MillenniumFalconPlan]]]
+
+
+def solve_odds(
+    millennium_falcon: MillenniumFalcon,
+    empire: Empire,
+    graph: UniverseGraph,
+    deadline: Optional[float] = None,
+    engine: Engine = DEFAULT_ENGINE,
+    stats: Optional[SolverStats] = None,
+    time_budget_ms: Optional[float] = None,
+) -> Odds:
+    if stats is None:
+        stats = SolverStats()
+
+    odd, plan = give_me_the_odds(
+        millennium_falcon=millennium_falcon,
+        empire=empire,
+        graph=graph,
+        deadline=deadline,
+        engine=engine,
+        stats=stats,
+        time_budget_ms=time_budget_ms,
+    )
+
+    formatted_plan = []
+    with stats.measure("format"):
+        if plan:
+            formatted_plan = format_plan(plan, millennium_falcon.autonomy)
+
+    return (odd, formatted_plan)
+
+
+def solve_pareto_odds(
+    millennium_falcon: MillenniumFalcon,
+    empire: Empire,
+    graph: UniverseGraph,
+    deadline: Optional[float] = None,
+    stats: Optional[SolverStats] = None,
+) -> ParetoOdds:
+    if stats is None:
+        stats = SolverStats()
+
+    frontier = give_me_the_pareto_odds(
+        millennium_falcon=millennium_falcon,
+        empire=empire,
+        graph=graph,
+        deadline=deadline,
+        stats=stats,
+    )
+
+    with stats.measure("format"):
+        return [
+            (odd, arrival_day, refills, format_plan(plan, millennium_falcon.autonomy))
+            for odd, arrival_day, refills, plan in frontier
+        ]
+
+
+def solve_odds_batch(
+    millennium_falcon: MillenniumFalcon,
+    empires: List[Empire],
+    graph: UniverseGraph,
+    deadline: Optional[float] = None,
+    stats: Optional[SolverStats] = None,
+) -> List[Odds]:
+    if stats is None:
+        stats = SolverStats()
+
+    with stats.measure("search"):
+        results = give_me_the_odds_batch(
+            millennium_falcon=millennium_falcon,
+            empires=empires,
+            graph=graph,
+            deadline=deadline,
+        )
+
+    with stats.measure("format"):
+        return [
+            (odd, format_plan(plan, millennium_falcon.autonomy) if plan else [])
+            for odd, plan in results
+        ]
+
+
+# ======================
+# WORKER PROCESS
+# ======================
+worker_database: Optional[Database] = None
+worker_millennium_falcon: Optional[MillenniumFalcon] = None
+
+
+def init_worker(millennium_falcon: MillenniumFalcon):
+    # Each worker loads the universe once, when the pool starts.
+    # Later changes of universe.db are picked up by Database.refresh
+    global worker_database, worker_millennium_falcon
+    worker_millennium_falcon = millennium_falcon
+    worker_database = SqliteDB()
+    worker_database.connect(millennium_falcon.routes_db)
+    worker_database.get_universe_graph()
+
+
+def solve_in_worker(
+    func: Callable[..., Any],
+    deadline: Optional[float],
+    **kwargs,
+) -> Tuple[Any, SolverStats]:
+    # Runs solve_odds, solve_pareto_odds or solve_odds_batch on the universe
+    # of the worker. The stats are sent back along with the result
+    stats = SolverStats()
+    result = func(
+        millennium_falcon=worker_millennium_falcon,
+        graph=worker_database.get_universe_graph(),  # type: ignore
+        deadline=deadline,
+        stats=stats,
+        **kwargs,
+    )
+    return (result, stats)
+
+
+# ======================
+# POOL
+# ======================
+class SolverPool:
+    """
+    Runs give_me_the_odds out of the event loop.
+
+    With `workers` > 0 the searches run in a ProcessPoolExecutor, so they are
+    not serialized by the GIL. Otherwise they run in the server thread pool.
+    Every search is given `timeout` seconds, then SolverTimeout is raised.
+    """
+
+    def __init__(self, workers: int = 0, timeout: Optional[float] = None):
+        self.workers = workers
+        self.timeout = timeout
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self, millennium_falcon: MillenniumFalcon):
+        if self.workers <= 0:
+            return
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_worker,
+            initargs=(millennium_falcon,),
+        )
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def get_deadline(self) -> Optional[float]:
+        # time.time() timestamp a search started now must stop at
+        if self.timeout is None:
+            return None
+        return time.time() + self.timeout
+
+    async def solve(
+        self,
+        millennium_falcon: MillenniumFalcon,
+        empire: Empire,
+        db: Database,
+        engine: Engine = DEFAULT_ENGINE,
+        stats: Optional[SolverStats] = None,
+        time_budget_ms: Optional[float] = None,
+    ) -> Odds:
+        return await self.run(
+            solve_odds,
+            millennium_falcon,
+            db,
+            stats,
+            empire=empire,
+            engine=engine,
+            time_budget_ms=time_budget_ms,
+        )
+
+    async def solve_pareto(
+        self,
+        millennium_falcon: MillenniumFalcon,
+        empire: Empire,
+        db: Database,
+        stats: Optional[SolverStats] = None,
+    ) -> ParetoOdds:
+        return await self.run(
+            solve_pareto_odds, millennium_falcon, db, stats, empire=empire
+        )
+
+    async def solve_batch(
+        self,
+        millennium_falcon: MillenniumFalcon,
+        empires: List[Empire],
+        db: Database,
+        stats: Optional[SolverStats] = None,
+    ) -> List[Odds]:
+        # A single search shares the reachable states between the Empires,
+        # the whole batch is given `timeout` seconds
+        return await self.run(
+            solve_odds_batch, millennium_falcon, db, stats, empires=empires
+        )
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        millennium_falcon: MillenniumFalcon,
+        db: Database,
+        stats: Optional[SolverStats] = None,
+        **kwargs,
+    ) -> Any:
+        # The search itself stops at the deadline, the asyncio timeout
+        # covers the time spent waiting for a free worker
+        deadline = self.get_deadline()
+
+        if self.executor is None:
+            return await run_in_threadpool(
+                lambda: func(
+                    millennium_falcon=millennium_falcon,
+                    graph=db.get_universe_graph(),
+                    deadline=deadline,
+                    stats=stats,
+                    **kwargs,
+                )
+            )
+
+        future = self.executor.submit(solve_in_worker, func, deadline, **kwargs)
+        try:
+            result, worker_stats = await asyncio.wait_for(
+                asyncio.wrap_future(future), self.timeout
+            )
+        except asyncio.TimeoutError:
+            # Drops the search if it is still queued
+            future.cancel()
+            raise SolverTimeout("the search ran past its deadline")
+
+        if stats is not None:
+            stats.update(worker_stats)
+        return result
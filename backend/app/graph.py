@@ -0,0 +1,234 @@
+import heapq
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+from .models import Route
+
+
+# (origin, destination, travel_time) as read from the routes table
+RouteRow = Tuple[str, str, int]
+# (offsets, targets, travel_times)
+Adjacency = Tuple[array, array, array]
+# Travel time to a planet that cannot be reached
+UNREACHABLE = float("inf")
+# Rows buffered by UniverseGraphBuilder before their duplicates are first
+# dropped
+COLLAPSE_MIN_ROWS = 100_000
+
+
+def compile_adjacency(
+    size: int, sources: array, targets: array, travel_times: array
+) -> Adjacency:
+    # Compressed Sparse Row: the edges of planet `i` are stored in
+    # targets[offsets[i]:offsets[i + 1]] and travel_times[offsets[i]:offsets[i + 1]]
+    offsets = array("l", [0]) * (size + 1)
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    sorted_targets = array("l", [0]) * len(targets)
+    sorted_travel_times = array("l", [0]) * len(targets)
+    positions = offsets[:-1]
+    for source, target, travel_time in zip(sources, targets, travel_times):
+        position = positions[source]
+        sorted_targets[position] = target
+        sorted_travel_times[position] = travel_time
+        positions[source] += 1
+
+    return (offsets, sorted_targets, sorted_travel_times)
+
+
+def collapse_parallel_edges(adjacency: Adjacency):
+    # Drops, in place, the repeated (target, travel_time) edges of a planet.
+    # Parallel routes with different travel times are kept: waiting to take
+    # the shorter one is not always possible
+    offsets, targets, travel_times = adjacency
+    size = len(offsets) - 1
+    write = 0
+    start = 0
+    for i in range(size):
+        stop = offsets[i + 1]
+        seen = set()
+        for read in range(start, stop):
+            edge = (targets[read], travel_times[read])
+            if edge in seen:
+                continue
+            seen.add(edge)
+            targets[write] = targets[read]
+            travel_times[write] = travel_times[read]
+            write += 1
+        start = stop
+        offsets[i + 1] = write
+    del targets[write:]
+    del travel_times[write:]
+
+
+def get_sources(offsets: array) -> array:
+    # Source of every edge of a CSR adjacency
+    sources = array("l")
+    for i in range(len(offsets) - 1):
+        sources.extend(array("l", [i]) * (offsets[i + 1] - offsets[i]))
+    return sources
+
+
+class UniverseGraphBuilder:
+    """
+    Builds a UniverseGraph from routes rows, chunk by chunk.
+
+    Rows are interned into flat integer arrays as they come, so a large
+    routes table never lives in memory as Python objects. The duplicated
+    routes are dropped whenever the rows double, so the buffered rows stay
+    within twice the routes of the graph.
+    """
+
+    def __init__(self):
+        self.planets: List[str] = []
+        self.planet_ids: Dict[str, int] = {}
+        self.sources = array("l")
+        self.targets = array("l")
+        self.travel_times = array("l")
+        # Rows left after the duplicates were last dropped
+        self.collapsed_rows = 0
+
+    def intern(self, planet: str) -> int:
+        planet_id = self.planet_ids.get(planet)
+        if planet_id is None:
+            planet_id = self.planet_ids[planet] = len(self.planets)
+            self.planets.append(planet)
+        return planet_id
+
+    def add_rows(self, rows: Iterable[RouteRow]):
+        columns = list(zip(*rows))
+        if not columns:
+            return
+        origins, destinations, travel_times = columns
+        self.sources.extend(map(self.intern, origins))
+        self.targets.extend(map(self.intern, destinations))
+        self.travel_times.extend(travel_times)
+        if len(self.sources) >= 2 * max(self.collapsed_rows, COLLAPSE_MIN_ROWS):
+            self.collapse()
+
+    def collapse(self):
+        # Drops the duplicated rows. compile_adjacency is stable: the routes
+        # keep the order they were read in, as if collapsed once in build
+        outgoing = self.compile()
+        offsets, self.targets, self.travel_times = outgoing
+        self.sources = get_sources(offsets)
+        self.collapsed_rows = len(self.sources)
+
+    def compile(self) -> Adjacency:
+        outgoing = compile_adjacency(
+            len(self.planets), self.sources, self.targets, self.travel_times
+        )
+        # The rows are no longer needed once sorted
+        self.sources, self.targets, self.travel_times = (
+            array("l"),
+            array("l"),
+            array("l"),
+        )
+        collapse_parallel_edges(outgoing)
+        return outgoing
+
+    def build(self) -> "UniverseGraph":
+        size = len(self.planets)
+        outgoing = self.compile()
+        offsets, targets, travel_times = outgoing
+        incoming = compile_adjacency(size, targets, get_sources(offsets), travel_times)
+        return UniverseGraph(self.planets, outgoing, incoming)
+
+
+class UniverseGraph:
+    """
+    Compiled universe, built once and shared by every request.
+
+    Planet names are interned to integer ids and the routes are stored as CSR
+    adjacency arrays in both directions: `outgoing` indexed by origin and
+    `incoming` indexed by destination. Duplicated routes are collapsed.
+    """
+
+    def __init__(self, planets: List[str], outgoing: Adjacency, incoming: Adjacency):
+        self.planets = planets
+        self.planet_ids: Dict[str, int] = {
+            planet: planet_id for planet_id, planet in enumerate(planets)
+        }
+        self.routes_count = len(outgoing[1])
+        self.outgoing = outgoing
+        self.incoming = incoming
+        # { (source_id, max_travel_time, reverse, stop_id, hops): travel times }
+        self.travel_times: Dict[
+            Tuple[int, int, bool, Optional[int], bool], List[float]
+        ] = {}
+
+    @classmethod
+    def from_routes(cls, routes: Iterable[Route]) -> "UniverseGraph":
+        builder = UniverseGraphBuilder()
+        builder.add_rows(
+            (route.origin, route.destination, route.travel_time) for route in routes
+        )
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.planets)
+
+    def get_planet_id(self, planet: str) -> Optional[int]:
+        return self.planet_ids.get(planet)
+
+    def get_outgoing(self, planet_id: int) -> Iterator[Tuple[int, int]]:
+        # (destination, travel_time) of the routes leaving planet_id
+        return iter_adjacency(self.outgoing, planet_id)
+
+    def get_incoming(self, planet_id: int) -> Iterator[Tuple[int, int]]:
+        # (origin, travel_time) of the routes arriving on planet_id
+        return iter_adjacency(self.incoming, planet_id)
+
+    def has_incoming(self, planet_id: int) -> bool:
+        offsets = self.incoming[0]
+        return offsets[planet_id + 1] > offsets[planet_id]
+
+    def get_travel_times(
+        self,
+        source_id: int,
+        max_travel_time: int,
+        reverse: bool = False,
+        stop_id: Optional[int] = None,
+        hops: bool = False,
+    ) -> List[float]:
+        """
+        Shortest travel time from `source_id` to every planet, or to
+        `source_id` from every planet when `reverse`, UNREACHABLE if none.
+        With `hops`, the fewest routes instead of the travel time.
+
+        Only the routes up to `max_travel_time` long are followed, and none
+        leaving `stop_id`. Computed once per graph and arguments (Dijkstra).
+        """
+        key = (source_id, max_travel_time, reverse, stop_id, hops)
+        travel_times = self.travel_times.get(key)
+        if travel_times is not None:
+            return travel_times
+
+        adjacency = self.incoming if reverse else self.outgoing
+        travel_times = [UNREACHABLE] * len(self.planets)
+        travel_times[source_id] = 0
+        queue = [(0, source_id)]
+        while queue:
+            elapsed, planet_id = heapq.heappop(queue)
+            if elapsed > travel_times[planet_id] or planet_id == stop_id:
+                continue
+            for next_id, travel_time in iter_adjacency(adjacency, planet_id):
+                if travel_time <= 0 or travel_time > max_travel_time:
+                    continue
+                cost = elapsed + (1 if hops else travel_time)
+                if cost < travel_times[next_id]:
+                    travel_times[next_id] = cost
+                    heapq.heappush(queue, (cost, next_id))
+
+        self.travel_times[key] = travel_times
+        return travel_times
+
+
+def iter_adjacency(adjacency: Adjacency, planet_id: int) -> Iterator[Tuple[int, int]]:
+    offsets, targets, travel_times = adjacency
+    start, stop = offsets[planet_id], offsets[planet_id + 1]
+    return zip(targets[start:stop], travel_times[start:stop])
@@ -0,0 +1,132 @@
+import io
+import json
+import zipfile
+import zlib
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+orjson: Any
+try:
+    import orjson
+except ImportError:  # orjson is an optional dependency
+    orjson = None
+
+
+from pydantic import ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+
+from .models import BountyHunter, BountyHunters, Empire
+
+# Largest Empire JSON accepted, once decompressed, in bytes
+MAX_EMPIRE_SIZE = 256 * 1024 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+ZIP_MAGIC = b"PK\x03\x04"
+
+# { (planet, day): None }, in the order of the payload
+BountyHuntersKeys = Dict[Tuple[str, int], None]
+BOUNTY_HUNTER_FIELDS = tuple(BountyHunter.__fields__)
+
+
+def is_available() -> bool:
+    return orjson is not None
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def decompress(data: bytes, max_size: int = MAX_EMPIRE_SIZE) -> bytes:
+    """
+    Content of a gzip, or of a zip holding a single file, recognized by their
+    first bytes. Anything else is returned as it is.
+
+    Raises ValueError when the archive is broken or its content larger than
+    `max_size` bytes.
+    """
+    try:
+        if data.startswith(GZIP_MAGIC):
+            decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+            data = decompressor.decompress(data, max_size + 1)
+            if len(data) <= max_size and not decompressor.eof:
+                raise ValueError("truncated gzip data")
+        elif data.startswith(ZIP_MAGIC):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                members = [x for x in archive.infolist() if not x.is_dir()]
+                if len(members) != 1:
+                    raise ValueError("the zip archive must hold a single file")
+                with archive.open(members[0]) as file:
+                    data = file.read(max_size + 1)
+    except (zlib.error, zipfile.BadZipFile) as exc:
+        raise ValueError(str(exc))
+
+    if len(data) > max_size:
+        raise ValueError(f"the Empire data is larger than {max_size} bytes")
+    return data
+
+
+def get_bounty_hunters_keys(obj: Any) -> Optional[BountyHuntersKeys]:
+    # Checks the payload column by column: None when any value is not exactly
+    # of its field type, the pydantic validation then coerces or rejects it
+    if type(obj) is not dict or type(obj.get("countdown")) is not int:
+        return None
+    bounty_hunters = obj.get("bounty_hunters")
+    if type(bounty_hunters) is not list:
+        return None
+    try:
+        planets = [hunter["planet"] for hunter in bounty_hunters]
+        days = [hunter["day"] for hunter in bounty_hunters]
+    except (KeyError, TypeError):
+        return None
+    if not set(map(type, planets)) <= {str} or not set(map(type, days)) <= {int}:
+        return None
+    return dict.fromkeys(zip(planets, days))
+
+
+def make_bounty_hunters(keys: Iterable[Tuple[str, int]]) -> BountyHunters:
+    # Already validated: sets the fields like BountyHunter.construct, at a
+    # fraction of its cost
+    new = object.__new__
+    set_attribute = object.__setattr__
+    bounty_hunters = []
+    for planet, day in keys:
+        hunter = new(BountyHunter)
+        set_attribute(hunter, "__dict__", {"planet": planet, "day": day})
+        # A set of its own: pydantic adds the fields assigned later to it
+        set_attribute(hunter, "__fields_set__", set(BOUNTY_HUNTER_FIELDS))
+        bounty_hunters.append(hunter)
+    return bounty_hunters
+
+
+def parse_empire(data: Union[bytes, str]) -> Empire:
+    """
+    Empire from its JSON, optionally gzip or zip compressed. Same result as
+    `Empire.parse_raw`, without the duplicate bounty hunters.
+
+    The JSON is parsed by orjson when it is installed. The usual payload, an
+    integer countdown and bounty hunters with a string planet and an integer
+    day, is validated column by column instead of one model per bounty
+    hunter; any other payload goes through the pydantic validation, for the
+    same coercions and errors.
+
+    Raises ValidationError.
+    """
+    try:
+        if isinstance(data, bytes):
+            data = decompress(data)
+        obj = loads(data)
+    except ValueError as exc:
+        # Without the document a JSONDecodeError holds, that may be huge
+        error = ValueError(str(exc))
+        raise ValidationError([ErrorWrapper(error, loc="__root__")], Empire)
+
+    keys = get_bounty_hunters_keys(obj)
+    if keys is None:
+        empire = Empire.parse_obj(obj)
+        countdown = empire.countdown
+        keys = dict.fromkeys((x.planet, x.day) for x in empire.bounty_hunters)
+    else:
+        countdown = obj["countdown"]
+    return Empire.construct(
+        countdown=countdown, bounty_hunters=make_bounty_hunters(keys)
+    )
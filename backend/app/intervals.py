@@ -0,0 +1,293 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from itertools import count
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+from .graph import UniverseGraph
+from .models import BountyHuntersIndex
+from .solver import (
+    PlanNode,
+    SolverStats,
+    Step,
+    build_plan,
+    can_end_plan,
+    can_wait,
+    check_deadline,
+    get_jumps,
+    get_plan_outside_graph,
+    get_search_bounds,
+)
+
+
+class Label:
+    """MillenniumFalcon landed on a planet, in the best first search"""
+
+    __slots__ = (
+        "planet_id",
+        "day",
+        "fuel",
+        "encounters",
+        "route_len",
+        "parent",
+        "departure",
+    )
+
+    def __init__(
+        self,
+        planet_id: int,
+        day: int,
+        fuel: int,
+        encounters: int,
+        route_len: int,
+        parent: Optional["Label"] = None,
+        departure: int = 0,
+    ):
+        self.planet_id = planet_id
+        self.day = day
+        self.fuel = fuel
+        self.encounters = encounters
+        self.route_len = route_len
+        self.parent = parent
+        # Day the MillenniumFalcon left the parent planet, after waiting
+        # there when it is greater than parent.day
+        self.departure = departure
+
+
+class HuntersCalendar:
+    """Sorted days of the bounty hunters, per planet"""
+
+    def __init__(self, bounty_hunters_index: BountyHuntersIndex, countdown: int):
+        days: Dict[int, List[int]] = defaultdict(list)
+        for planet_id, day in bounty_hunters_index:
+            if 0 <= day <= countdown:
+                days[planet_id].append(day)
+        self.days: Dict[int, List[int]] = {
+            planet_id: sorted(planet_days) for planet_id, planet_days in days.items()
+        }
+        self.bounty_hunters_index = bounty_hunters_index
+
+    def is_hunted(self, planet_id: int, day: int) -> bool:
+        return (planet_id, day) in self.bounty_hunters_index
+
+    def count(self, planet_id: int, after: int, until: int) -> int:
+        # Number of days with bounty hunters on the planet in (after, until]
+        days = self.days.get(planet_id)
+        if not days:
+            return 0
+        return bisect_right(days, until) - bisect_right(days, after)
+
+    def get_interval(self, planet_id: int, day: int) -> int:
+        # Days of a planet are split in intervals: runs of days without bounty
+        # hunters (even ids) and single days with bounty hunters (odd ids)
+        days = self.days.get(planet_id, [])
+        i = bisect_left(days, day)
+        if i < len(days) and days[i] == day:
+            return 2 * i + 1
+        return 2 * i
+
+    def get_intervals_starts(
+        self, planet_id: int, first: int, last: int
+    ) -> Iterator[int]:
+        # Earliest day in [first, last] of every interval of the planet
+        if first > last:
+            return
+        yield first
+        days = self.days.get(planet_id, [])
+        for i in range(bisect_left(days, first), len(days)):
+            day = days[i]
+            if day > last:
+                return
+            if day > first:
+                yield day
+            if day + 1 <= last and (i + 1 == len(days) or days[i + 1] != day + 1):
+                yield day + 1
+
+
+def solve_intervals(
+    start: str,
+    end: str,
+    countdown: int,
+    autonomy: int,
+    graph: UniverseGraph,
+    bounty_hunters_index: BountyHuntersIndex,
+    deadline: Optional[float] = None,
+    stats: Optional[SolverStats] = None,
+) -> Tuple[int, Optional[PlanNode]]:
+    """
+    Best first search where waiting is compressed.
+
+    Days without bounty hunters on a planet are grouped in intervals. Waiting
+    is never expanded day by day: from a planet, the MillenniumFalcon either
+    jumps right away or waits until the earliest day it can land in each
+    interval of the destination. Landing later in the same interval is never
+    better than landing earlier and waiting there.
+
+    Landings that cannot reach the arrival before the end of the countdown
+    are pruned, and among equally good labels the ones closest to the arrival
+    are expanded first, see get_search_bounds.
+
+    The cost depends on the routes and on the number of bounty hunters, not
+    on `countdown`. Same result as `solver.solve`.
+    """
+    if stats is None:
+        stats = SolverStats()
+
+    start_id = graph.get_planet_id(start)
+    end_id = graph.get_planet_id(end)
+    if start_id is None or end_id is None:
+        return (0, get_plan_outside_graph(start, end, countdown, autonomy))
+
+    _, travel_times_to_end = get_search_bounds(graph, start_id, end_id, autonomy)
+    if travel_times_to_end[start_id] > countdown:
+        return (0, None)
+
+    calendar = HuntersCalendar(bounty_hunters_index, countdown)
+
+    # Labels already expanded, per (planet_id, interval)
+    settled: Dict[Tuple[int, int], List[Label]] = defaultdict(list)
+
+    def is_dominated(label: Label) -> bool:
+        # A settled label in the same interval can wait (without encounters)
+        # until the label's day, and has as much fuel afterwards
+        waits = can_wait(graph, end_id, label.planet_id)
+        key = (label.planet_id, calendar.get_interval(label.planet_id, label.day))
+        for other in settled[key]:
+            if other.day > label.day:
+                continue
+            if other.day < label.day and not waits:
+                continue
+            if other.day == label.day and other.fuel < label.fuel:
+                continue
+            waited_len = other.route_len + label.day - other.day
+            if (other.encounters, waited_len) <= (label.encounters, label.route_len):
+                return True
+        settled[key].append(label)
+        return False
+
+    counter = count()
+    queue: List[Tuple[int, int, float, int, Label]] = []
+
+    def push(label: Label):
+        # Earliest possible arrival day, a tie breaker only: the first label
+        # popped on the arrival still has the best (encounters, route_len)
+        arrival = label.day + travel_times_to_end[label.planet_id]
+        if arrival > countdown:
+            stats.states_pruned += 1
+            return
+        heapq.heappush(
+            queue,
+            (label.encounters, label.route_len, arrival, next(counter), label),
+        )
+
+    push(
+        Label(
+            planet_id=start_id,
+            day=0,
+            fuel=autonomy,
+            encounters=int(calendar.is_hunted(start_id, 0)),
+            route_len=1,
+        )
+    )
+
+    while queue:
+        stats.peak_frontier = max(stats.peak_frontier, len(queue))
+        *_, pushed, label = heapq.heappop(queue)
+        if pushed % 1024 == 0:
+            check_deadline(deadline)
+
+        if label.planet_id == end_id:
+            stats.plans_scored += 1
+            if can_end_plan(graph, end_id, label.day, countdown):
+                plan = build_plan_from_label(
+                    label, graph, autonomy, countdown, bounty_hunters_index
+                )
+                return (label.encounters, plan)
+            continue
+
+        if is_dominated(label):
+            stats.states_pruned += 1
+            continue
+        stats.states_expanded += 1
+
+        for successor in expand_label(
+            label, graph, end_id, calendar, autonomy, countdown
+        ):
+            push(successor)
+
+    return (0, None)
+
+
+def expand_label(
+    label: Label,
+    graph: UniverseGraph,
+    end_id: int,
+    calendar: HuntersCalendar,
+    autonomy: int,
+    countdown: int,
+) -> Iterator[Label]:
+    # Landings from the label: right away, or at the start of every interval
+    # of the destination after waiting (and refueling) on the planet
+    planet_id, day, fuel = label.planet_id, label.day, label.fuel
+    waits = can_wait(graph, end_id, planet_id)
+    # The jumps of a full tank: the ones taken after a refill
+    for destination_id, travel_time in get_jumps(graph, planet_id, autonomy):
+        # case hyperspace jump right away
+        if travel_time <= fuel and day + travel_time <= countdown:
+            landing = day + travel_time
+            yield Label(
+                planet_id=destination_id,
+                day=landing,
+                fuel=fuel - travel_time,
+                encounters=label.encounters
+                + calendar.is_hunted(destination_id, landing),
+                route_len=label.route_len + 1,
+                parent=label,
+                departure=day,
+            )
+
+        # case waiting (and refueling) on planet, then hyperspace jump
+        if not waits:
+            continue
+        for landing in calendar.get_intervals_starts(
+            destination_id, day + 1 + travel_time, countdown
+        ):
+            departure = landing - travel_time
+            yield Label(
+                planet_id=destination_id,
+                day=landing,
+                fuel=autonomy - travel_time,
+                encounters=label.encounters
+                + calendar.count(planet_id, day, departure)
+                + calendar.is_hunted(destination_id, landing),
+                route_len=label.route_len + departure - day + 1,
+                parent=label,
+                departure=departure,
+            )
+
+
+def build_plan_from_label(
+    arrival: Label,
+    graph: UniverseGraph,
+    autonomy: int,
+    countdown: int,
+    bounty_hunters_index: BountyHuntersIndex,
+) -> PlanNode:
+    # Waits are expanded back to one node per day
+    steps: List[Step] = [(arrival.planet_id, arrival.day, arrival.day < countdown)]
+    label: Optional[Label] = arrival.parent
+    successor = arrival
+    while label is not None:
+        departure = successor.departure
+        if departure > label.day:
+            steps.append((label.planet_id, departure, False))
+            for day in range(departure - 1, label.day - 1, -1):
+                steps.append((label.planet_id, day, True))
+        else:
+            steps.append((label.planet_id, label.day, False))
+        successor = label
+        label = label.parent
+
+    steps.reverse()
+    return build_plan(steps, graph, autonomy, bounty_hunters_index)
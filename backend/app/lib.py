@@ -1,25 +1,31 @@
 from typing import List, Tuple, Optional
-from collections import defaultdict
 import json
 import os
+import time
 
 
 from .models import (
+    DEFAULT_ENGINE,
     MillenniumFalconPlan,
-    MillenniumFalconPlanNode,
     MillenniumFalcon,
     Empire,
-    Route,
-    UniverseMap,
-    BountyHuntersMap,
+    BountyHuntersIndex,
     BountyHunters,
+    Engine,
 )
+from .bnb import solve_branch_and_bound
+from .dense import solve_dense
+from .graph import UniverseGraph
+from .ingest import parse_empire
+from .intervals import solve_intervals
+from .pareto import solve_pareto
+from .solver import solve, PlanNode, SolverStats, StateSpace
 
 
 def get_empire_from_file(file_path: str) -> Empire:
-    with open(file_path, "r") as file:
-        data = json.loads(file.read())
-        return Empire.parse_obj(data)
+    # JSON, gzip or zip
+    with open(file_path, "rb") as file:
+        return parse_empire(file.read())
 
 
 def get_millenium_falcon_from_file(file_path: str) -> MillenniumFalcon:
@@ -32,98 +38,17 @@ def get_millenium_falcon_from_file(file_path: str) -> MillenniumFalcon:
         return MillenniumFalcon.parse_obj(data)
 
 
-def generate_universe_map(routes: List[Route]) -> UniverseMap:
-    universe_map = defaultdict(list)
-    for route in routes:
-        universe_map[route.destination].append(route)
-    return universe_map
-
-
-def generate_bounty_hunters_map(bounty_hunters: BountyHunters) -> BountyHuntersMap:
-    bounty_hunters_map = defaultdict(list)
+def generate_bounty_hunters_index(
+    bounty_hunters: BountyHunters,
+    graph: UniverseGraph,
+) -> BountyHuntersIndex:
+    bounty_hunters_index = set()
     for hunter in bounty_hunters:
-        bounty_hunters_map[hunter.day].append(hunter.planet)
-    return bounty_hunters_map
-
-
-def generate_plans_recursive(
-    node: MillenniumFalconPlanNode,
-    universe_map: UniverseMap,
-    start: str,
-    end: str,
-    autonomy: int,
-) -> List[MillenniumFalconPlanNode]:
-    # We dont wait on the arrival planet
-    if node.planet == end:
-        node.parent = None
-
-    # A valid path is found when
-    # current node is departure planet on day 0
-    if node.planet == start and node.day == 0:
-        return [node]
-
-    previous_nodes = universe_map.get(node.planet, [])
-
-    routes: List[MillenniumFalconPlanNode] = []
-    for previous in previous_nodes:
-        # case previous_state was an hyperspace jump to node.planet
-        previous_state_jump = MillenniumFalconPlanNode(
-            parent=node,
-            planet=previous.origin,
-            day=node.day - previous.travel_time,
-            fuel=node.fuel - previous.travel_time,
-            refill=False,
-        )
-        if previous_state_jump.is_valid():
-            routes += generate_plans_recursive(
-                previous_state_jump,
-                universe_map,
-                start,
-                end,
-                autonomy,
-            )
-
-        # case previous_state was waiting on the node.planet
-        previous_state_wait = MillenniumFalconPlanNode(
-            parent=node,
-            planet=node.planet,
-            day=node.day - 1,  # Wait 1 day
-            fuel=autonomy,  # Refuel
-            refill=True,
-        )
-        if previous_state_wait.is_valid():
-            routes += generate_plans_recursive(
-                previous_state_wait,
-                universe_map,
-                start,
-                end,
-                autonomy,
-            )
-
-    return routes
-
-
-def generate_plans(
-    start: str,
-    end: str,
-    countdown: int,
-    autonomy: int,
-    universe_map: UniverseMap,
-) -> List[MillenniumFalconPlanNode]:
-    root = MillenniumFalconPlanNode(
-        parent=None,
-        planet=end,
-        day=countdown,
-        fuel=autonomy,
-        refill=False,
-    )
-    return generate_plans_recursive(
-        node=root,
-        universe_map=universe_map,
-        start=start,
-        end=end,
-        autonomy=autonomy,
-    )
+        planet_id = graph.get_planet_id(hunter.planet)
+        # Bounty hunters outside of the universe are never encountered
+        if planet_id is not None:
+            bounty_hunters_index.add((planet_id, hunter.day))
+    return bounty_hunters_index
 
 
 def compute_odd(encounters: int) -> float:
@@ -133,68 +58,159 @@ def compute_odd(encounters: int) -> float:
     return (1 - res) * 100
 
 
-def compute_route_odd(
-    plan: MillenniumFalconPlanNode,
-    bounty_hunters_map: BountyHuntersMap,
-) -> Tuple[float, int]:
-    encounters = 0
-    route_len = 0
-    while plan:
-        route_len += 1
-        if plan.planet in bounty_hunters_map.get(plan.day, []):
-            encounters += 1
-            plan.hunted = True  # warning: side-effect
-        plan = plan.parent  # type: ignore
-    return (compute_odd(encounters), route_len)
-
-
-def find_best_plan(
-    routes: List[MillenniumFalconPlanNode],
-    bounty_hunters_map: BountyHuntersMap,
-) -> Tuple[float, Optional[MillenniumFalconPlanNode]]:
-    # Find best plan according to:
-    # - lowest odd (minimum number of encounter)
-    # - fastest route (arrive the fastest at arrival)
-
-    if len(routes) == 0:
-        return (0, None)
-
-    routes_with_odds: List[Tuple[float, int, MillenniumFalconPlanNode]] = []
-    for route in routes:
-        route_odd, route_len = compute_route_odd(route, bounty_hunters_map)
-        routes_with_odds.append((route_odd, route_len, route))
-
-    # Sort by maximum route_odd and minimum route_len
-    odd, _, route = max(routes_with_odds, key=lambda x: (x[0], -x[1]))
-    return (odd, route)
-
-
-def format_plan(plan: MillenniumFalconPlanNode, autonomy: int):
+def format_plan(plan: Optional[PlanNode], autonomy: int):
     flattened_plan: List[MillenniumFalconPlan] = []
     while plan:
-        # Because we compute the path from the end to the start
-        # Fuel corresponds to the fuel used, not the fuel available
-        plan.fuel = abs(plan.fuel - autonomy)  # warning: side-effect
-        flattened_plan.append(MillenniumFalconPlan(**plan.dict()))
-        plan = plan.parent  # type: ignore
+        flattened_plan.append(
+            MillenniumFalconPlan(
+                planet=plan.planet,
+                day=plan.day,
+                # Because we compute the path from the end to the start
+                # Fuel corresponds to the fuel used, not the fuel available
+                fuel=abs(plan.fuel - autonomy),
+                refill=plan.refill,
+                hunted=plan.hunted,
+            )
+        )
+        plan = plan.parent
 
     return flattened_plan
 
 
+# "bnb", the default, stops as soon as a plan is proven optimal, eg. a short
+# route without bounty hunters. "dp" walks every day of the countdown,
+# "intervals" only the days with bounty hunters: much faster for a long
+# countdown with few of them. "numpy" walks every day like "dp" on dense
+# arrays, it requires NumPy
+ENGINES = {
+    Engine.dp: solve,
+    Engine.intervals: solve_intervals,
+    Engine.bnb: solve_branch_and_bound,
+    Engine.numpy: solve_dense,
+}
+
+
 def give_me_the_odds(
     millennium_falcon: MillenniumFalcon,
     empire: Empire,
-    routes: List[Route],
+    graph: UniverseGraph,
+    deadline: Optional[float] = None,
+    engine: Engine = DEFAULT_ENGINE,
+    stats: Optional[SolverStats] = None,
+    time_budget_ms: Optional[float] = None,
 ):
-    universe_map = generate_universe_map(routes)
-    bounty_hunters_map = generate_bounty_hunters_map(empire.bounty_hunters)
+    """
+    Odd and plan of the best plan.
+
+    With `time_budget_ms`, the branch and bound search is used whatever the
+    engine: it is stopped when the budget runs out, and the best plan found
+    so far is returned. `stats.encounters_bound` is then set, see get_odds_gap.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine}")
+    if stats is None:
+        stats = SolverStats()
+
+    options = {}
+    if time_budget_ms is not None:
+        # The only search that always holds a plan it can stop with
+        engine = Engine.bnb
+        options["soft_deadline"] = time.time() + time_budget_ms / 1000
+
+    with stats.measure("index"):
+        bounty_hunters_index = generate_bounty_hunters_index(
+            empire.bounty_hunters, graph
+        )
+
+    with stats.measure("search"):
+        encounters, plan = ENGINES[engine](
+            start=millennium_falcon.departure,
+            end=millennium_falcon.arrival,
+            autonomy=millennium_falcon.autonomy,
+            countdown=empire.countdown,
+            graph=graph,
+            bounty_hunters_index=bounty_hunters_index,
+            deadline=deadline,
+            stats=stats,
+            **options,
+        )
+
+    if plan is None:
+        return (0, None)
+
+    return (compute_odd(encounters), plan)
 
-    plans = generate_plans(
+
+def get_odds_gap(odd: float, stats: SolverStats) -> float:
+    # Most the odd of the optimal plan can exceed `odd` by, 0 when the plan
+    # is proven optimal
+    if stats.encounters_bound is None:
+        return 0
+    return compute_odd(stats.encounters_bound) - odd
+
+
+def give_me_the_pareto_odds(
+    millennium_falcon: MillenniumFalcon,
+    empire: Empire,
+    graph: UniverseGraph,
+    deadline: Optional[float] = None,
+    stats: Optional[SolverStats] = None,
+) -> List[Tuple[float, int, int, PlanNode]]:
+    # (odd, arrival day, refills, plan) of the plans that are not dominated
+    if stats is None:
+        stats = SolverStats()
+
+    with stats.measure("index"):
+        bounty_hunters_index = generate_bounty_hunters_index(
+            empire.bounty_hunters, graph
+        )
+
+    with stats.measure("search"):
+        frontier = solve_pareto(
+            start=millennium_falcon.departure,
+            end=millennium_falcon.arrival,
+            autonomy=millennium_falcon.autonomy,
+            countdown=empire.countdown,
+            graph=graph,
+            bounty_hunters_index=bounty_hunters_index,
+            deadline=deadline,
+            stats=stats,
+        )
+
+    return [
+        (compute_odd(encounters), arrival_day, refills, plan)
+        for encounters, arrival_day, refills, plan in frontier
+    ]
+
+
+def give_me_the_odds_batch(
+    millennium_falcon: MillenniumFalcon,
+    empires: List[Empire],
+    graph: UniverseGraph,
+    deadline: Optional[float] = None,
+) -> List[Tuple[float, Optional[PlanNode]]]:
+    if not empires:
+        return []
+
+    # The reachable states do not depend on the bounty hunters:
+    # explore them once up to the longest countdown
+    state_space = StateSpace(
         start=millennium_falcon.departure,
         end=millennium_falcon.arrival,
         autonomy=millennium_falcon.autonomy,
-        countdown=empire.countdown,
-        universe_map=universe_map,
+        countdown=max(empire.countdown for empire in empires),
+        graph=graph,
+        deadline=deadline,
     )
 
-    return find_best_plan(plans, bounty_hunters_map)
+    results: List[Tuple[float, Optional[PlanNode]]] = []
+    for empire in empires:
+        bounty_hunters_index = generate_bounty_hunters_index(
+            empire.bounty_hunters, graph
+        )
+        encounters, plan = state_space.solve(
+            bounty_hunters_index, empire.countdown, deadline
+        )
+        results.append((compute_odd(encounters), plan) if plan else (0, None))
+
+    return results
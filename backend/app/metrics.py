@@ -0,0 +1,264 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+
+from .cache import LRUCache
+from .solver import SolverStats
+
+# Seconds
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+Labels = Tuple[str, ...]
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Metric of the Prometheus text format, with a value per label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+
+    def get_labels(self, labels: Dict[str, str]) -> Labels:
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, value: float = 1, **labels: str):
+        key = self.get_labels(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                labels = format_labels(self.labels, key)
+                lines.append(f"{self.name}{labels} {format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set_max(self, value: float, **labels: str):
+        key = self.get_labels(labels)
+        with self.lock:
+            self.values[key] = max(self.values.get(key, value), value)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(map(float, buckets))) + (float("inf"),)
+        # { labels: (count per bucket, sum) }
+        self.values: Dict[Labels, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self.get_labels(labels)
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * len(self.buckets), 0.0))
+            counts[bisect_left(self.buckets, value)] += 1
+            self.values[key] = (counts, total + value)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self.lock:
+            for key, (counts, total) in sorted(self.values.items()):
+                cumulated = 0
+                for bucket, count in zip(self.buckets, counts):
+                    cumulated += count
+                    labels = format_labels(
+                        self.labels + ("le",), key + (format_value(bucket),)
+                    )
+                    lines.append(f"{self.name}_bucket{labels} {cumulated}")
+                labels = format_labels(self.labels, key)
+                lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {cumulated}")
+        return lines
+
+
+class OddsMetrics:
+    """Metrics of the server, exposed by /api/metrics"""
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            "http_request_duration_seconds",
+            "Duration of the HTTP requests",
+            labels=("method", "handler", "status"),
+        )
+        self.stage_duration = Histogram(
+            "odds_stage_duration_seconds",
+            "Duration of the stages of the /api/odds requests",
+            labels=("stage",),
+        )
+        self.states_expanded = Counter(
+            "solver_states_expanded_total",
+            "States expanded by the searches",
+            labels=("engine",),
+        )
+        self.states_pruned = Counter(
+            "solver_states_pruned_total",
+            "States discarded by the searches, dominated or out of bounds",
+            labels=("engine",),
+        )
+        self.states_bounded = Counter(
+            "solver_states_bounded_total",
+            "States cut by the best plan found so far (branch and bound)",
+            labels=("engine",),
+        )
+        self.plans_scored = Counter(
+            "solver_plans_scored_total",
+            "Complete plans compared by the searches",
+            labels=("engine",),
+        )
+        self.peak_frontier = Gauge(
+            "solver_peak_frontier",
+            "Largest frontier (day layer or queue) of a search",
+            labels=("engine",),
+        )
+        self.metrics: List[Metric] = [
+            self.request_duration,
+            self.stage_duration,
+            self.states_expanded,
+            self.states_pruned,
+            self.states_bounded,
+            self.plans_scored,
+            self.peak_frontier,
+        ]
+        # { name: cache }, their counters are read when rendered
+        self.caches: Dict[str, LRUCache] = {}
+
+    def add_cache(self, name: str, cache: LRUCache):
+        self.caches[name] = cache
+
+    def observe_solver(self, stats: SolverStats, engine: str):
+        self.states_expanded.inc(stats.states_expanded, engine=engine)
+        self.states_pruned.inc(stats.states_pruned, engine=engine)
+        self.states_bounded.inc(stats.states_bounded, engine=engine)
+        self.plans_scored.inc(stats.plans_scored, engine=engine)
+        self.peak_frontier.set_max(stats.peak_frontier, engine=engine)
+
+    def observe_timings(self, timings: Dict[str, float]):
+        for stage, elapsed in timings.items():
+            self.stage_duration.observe(elapsed, stage=stage)
+
+    def get_cache_metrics(self) -> List[Metric]:
+        hits = Counter("cache_hits_total", "Lookups of a cached item", ("cache",))
+        misses = Counter(
+            "cache_misses_total", "Lookups of a missing or expired item", ("cache",)
+        )
+        evictions = Counter(
+            "cache_evictions_total", "Items evicted from a full cache", ("cache",)
+        )
+        size = Gauge("cache_items", "Items held by a cache", ("cache",))
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            hits.inc(stats["hits"], cache=name)
+            misses.inc(stats["misses"], cache=name)
+            evictions.inc(stats["evictions"], cache=name)
+            size.inc(stats["size"], cache=name)
+        return [hits, misses, evictions, size]
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics + self.get_cache_metrics():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    # Server-Timing header, durations in milliseconds
+    return ", ".join(
+        f"{stage};dur={elapsed * 1000:.3f}" for stage, elapsed in timings.items()
+    )
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing the duration of every HTTP request"""
+
+    def __init__(self, app, metrics: OddsMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched endpoint in the scope
+            endpoint = scope.get("endpoint")
+            self.metrics.request_duration.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                handler=getattr(endpoint, "__name__", "unmatched"),
+                status=str(status),
+            )
@@ -1,5 +1,6 @@
+from enum import Enum
 from pydantic import BaseModel, validator
-from typing import List, Dict, Union
+from typing import List, Set, Tuple
 from os import path
 
 
@@ -11,19 +12,6 @@ class MillenniumFalconPlan(BaseModel):
     hunted: bool = False
 
 
-class MillenniumFalconPlanNode(MillenniumFalconPlan):
-    """Represents a Millenium Falcon as a Tree Node"""
-
-    parent: Union["MillenniumFalconPlanNode", None] = None
-    children: List["MillenniumFalconPlanNode"] = []
-
-    def is_valid(self) -> bool:
-        # Indicates if the Millenium Falcon state is legit
-        is_alive = self.day >= 0
-        has_fuel = self.fuel >= 0
-        return is_alive and has_fuel
-
-
 class MillenniumFalcon(BaseModel):
     autonomy: int
     departure: str
@@ -51,13 +39,39 @@ BountyHunters = List[BountyHunter]
 Empire.update_forward_refs()
 
 
+class Engine(str, Enum):
+    """Search used by give_me_the_odds"""
+
+    dp = "dp"
+    intervals = "intervals"
+    bnb = "bnb"
+    numpy = "numpy"
+
+
+# Engine used when none is given: the branch and bound is the fastest on
+# every benchmark scenario, its cost does not grow with the countdown
+DEFAULT_ENGINE = Engine.bnb
+
+
+class Mode(str, Enum):
+    """Result of /api/odds: the best plan, or every non dominated one"""
+
+    best = "best"
+    pareto = "pareto"
+
+
+class RoutesFormat(str, Enum):
+    """Body of /api/routes: a JSON list, or one JSON route per line"""
+
+    json = "json"
+    ndjson = "ndjson"
+
+
 class Route(BaseModel):
     origin: str
     destination: str
     travel_time: int
 
 
-# { destination: [Route] }
-UniverseMap = Dict[str, List[Route]]
-# { day: [planet] }
-BountyHuntersMap = Dict[int, List[str]]
+# { (planet_id, day) }
+BountyHuntersIndex = Set[Tuple[int, int]]
@@ -0,0 +1,225 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+
+from .graph import UniverseGraph
+from .models import BountyHuntersIndex
+from .solver import (
+    PlanNode,
+    SolverStats,
+    Step,
+    build_plan,
+    can_end_plan,
+    can_wait,
+    check_deadline,
+    get_jumps,
+    get_plan_outside_graph,
+    get_search_bounds,
+)
+
+# (encounters, arrival day, refills, plan) of a non dominated plan
+ParetoPlan = Tuple[int, int, int, PlanNode]
+
+
+class ParetoLabel:
+    """Plan from the departure to a (planet, day, fuel) state"""
+
+    __slots__ = (
+        "planet_id",
+        "day",
+        "encounters",
+        "refills",
+        "route_len",
+        "parent",
+        "waited",
+    )
+
+    def __init__(
+        self,
+        planet_id: int,
+        day: int,
+        encounters: int,
+        refills: int,
+        route_len: int,
+        parent: Optional["ParetoLabel"] = None,
+        waited: bool = False,
+    ):
+        self.planet_id = planet_id
+        self.day = day
+        self.encounters = encounters
+        self.refills = refills
+        self.route_len = route_len
+        self.parent = parent
+        # The MillenniumFalcon waited (and refueled) on the parent planet
+        self.waited = waited
+
+    def dominates(self, other: "ParetoLabel") -> bool:
+        # Same state: the plans go on the same way. Plans with the same
+        # encounters and refills are only kept for the fewest nodes.
+        if self.encounters > other.encounters or self.refills > other.refills:
+            return False
+        if (self.encounters, self.refills) != (other.encounters, other.refills):
+            return True
+        return self.route_len <= other.route_len
+
+
+def add_label(labels: List[ParetoLabel], label: ParetoLabel) -> bool:
+    # Adds the label to the non dominated labels of a state, returns False
+    # when it is dominated
+    for other in labels:
+        if other.dominates(label):
+            return False
+    labels[:] = [other for other in labels if not label.dominates(other)]
+    labels.append(label)
+    return True
+
+
+def solve_pareto(
+    start: str,
+    end: str,
+    countdown: int,
+    autonomy: int,
+    graph: UniverseGraph,
+    bounty_hunters_index: BountyHuntersIndex,
+    deadline: Optional[float] = None,
+    stats: Optional[SolverStats] = None,
+) -> List[ParetoPlan]:
+    """
+    Every plan that is not dominated on encounters, arrival day and refills.
+
+    States are explored forward from the departure, one day at a time, like
+    StateSpace. Instead of a single best plan, every (planet, day, fuel) state
+    keeps its non dominated (encounters, refills) plans. The arrivals are then
+    filtered on (encounters, arrival day, refills) in a single pass: one search
+    instead of one per countdown. Refills are the days spent waiting.
+
+    Returns the plans sorted by arrival day, the fewest encounters first among
+    the same day. Among equal plans, the one with the fewest nodes is kept.
+    The encounters of the best plan arriving by a day are the ones `solve`
+    finds with that day as countdown.
+    """
+    if stats is None:
+        stats = SolverStats()
+
+    start_id = graph.get_planet_id(start)
+    end_id = graph.get_planet_id(end)
+    if start_id is None or end_id is None:
+        plan = get_plan_outside_graph(start, end, countdown, autonomy)
+        return [(0, 0, 0, plan)] if plan else []
+
+    _, travel_times_to_end = get_search_bounds(graph, start_id, end_id, autonomy)
+    if travel_times_to_end[start_id] > countdown:
+        return []
+
+    # { (planet_id, fuel): non dominated labels } for a given day
+    layers: Dict[int, Dict[Tuple[int, int], List[ParetoLabel]]] = defaultdict(dict)
+    arrivals: List[ParetoLabel] = []
+    pruned = 0
+
+    def push(label: ParetoLabel, fuel: int):
+        nonlocal pruned
+        if label.day + travel_times_to_end[label.planet_id] > countdown:
+            pruned += 1
+            return
+        labels = layers[label.day].setdefault((label.planet_id, fuel), [])
+        if not add_label(labels, label):
+            pruned += 1
+
+    push(
+        ParetoLabel(
+            planet_id=start_id,
+            day=0,
+            encounters=int((start_id, 0) in bounty_hunters_index),
+            refills=0,
+            route_len=1,
+        ),
+        autonomy,
+    )
+
+    for day in range(countdown + 1):
+        check_deadline(deadline)
+        layer = layers.pop(day, {})
+        stats.peak_frontier = max(stats.peak_frontier, len(layer))
+        for (planet_id, fuel), labels in layer.items():
+            stats.states_expanded += len(labels)
+
+            # Reaching the arrival planet ends the plan
+            if planet_id == end_id:
+                if can_end_plan(graph, end_id, day, countdown):
+                    arrivals.extend(labels)
+                continue
+
+            for label in labels:
+                for destination_id, travel_time in get_jumps(graph, planet_id, fuel):
+                    landing = day + travel_time
+                    push(
+                        ParetoLabel(
+                            planet_id=destination_id,
+                            day=landing,
+                            encounters=label.encounters
+                            + ((destination_id, landing) in bounty_hunters_index),
+                            refills=label.refills,
+                            route_len=label.route_len + 1,
+                            parent=label,
+                        ),
+                        fuel - travel_time,
+                    )
+
+                # case waiting (and refueling) on planet
+                if can_wait(graph, end_id, planet_id):
+                    push(
+                        ParetoLabel(
+                            planet_id=planet_id,
+                            day=day + 1,
+                            encounters=label.encounters
+                            + ((planet_id, day + 1) in bounty_hunters_index),
+                            refills=label.refills + 1,
+                            route_len=label.route_len + 1,
+                            parent=label,
+                            waited=True,
+                        ),
+                        autonomy,
+                    )
+    stats.states_pruned += pruned
+    stats.plans_scored += len(arrivals)
+
+    # Sorted by day: a plan is dominated by one already kept
+    arrivals.sort(key=lambda x: (x.day, x.encounters, x.refills, x.route_len))
+    frontier: List[ParetoLabel] = []
+    for label in arrivals:
+        if not any(
+            other.encounters <= label.encounters and other.refills <= label.refills
+            for other in frontier
+        ):
+            frontier.append(label)
+
+    return [
+        (
+            label.encounters,
+            label.day,
+            label.refills,
+            build_plan_from_pareto_label(
+                label, graph, autonomy, countdown, bounty_hunters_index
+            ),
+        )
+        for label in frontier
+    ]
+
+
+def build_plan_from_pareto_label(
+    arrival: ParetoLabel,
+    graph: UniverseGraph,
+    autonomy: int,
+    countdown: int,
+    bounty_hunters_index: BountyHuntersIndex,
+) -> PlanNode:
+    steps: List[Step] = [(arrival.planet_id, arrival.day, arrival.day < countdown)]
+    label: Optional[ParetoLabel] = arrival.parent
+    successor = arrival
+    while label is not None:
+        steps.append((label.planet_id, label.day, successor.waited))
+        successor = label
+        label = label.parent
+
+    steps.reverse()
+    return build_plan(steps, graph, autonomy, bounty_hunters_index)
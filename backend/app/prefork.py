@@ -0,0 +1,157 @@
+import logging
+import os
+import signal
+import time
+import traceback
+from typing import Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two checks of the workers and of the signals received
+POLL_INTERVAL = 0.1
+
+
+class Prefork:
+    """
+    Runs `serve` in `workers` forked processes, and forks a new one whenever
+    a worker dies.
+
+    `preload` runs in the parent before the workers are forked: what it loads
+    is shared by all of them through copy on write. On SIGHUP, or when
+    `should_reload` returns True (checked every `check_interval` seconds), the
+    workers are reloaded gracefully: `preload` runs again, new workers are
+    forked, then the old ones are sent SIGTERM to finish their requests, and
+    killed after `graceful_timeout` seconds. SIGTERM and SIGINT stop every
+    worker the same way, then `run` returns.
+    """
+
+    def __init__(
+        self,
+        serve: Callable[[], None],
+        workers: int,
+        preload: Optional[Callable[[], None]] = None,
+        should_reload: Optional[Callable[[], bool]] = None,
+        check_interval: float = 5.0,
+        graceful_timeout: float = 30.0,
+    ):
+        self.serve = serve
+        self.workers = max(1, workers)
+        self.preload = preload
+        self.should_reload = should_reload
+        self.check_interval = check_interval
+        self.graceful_timeout = graceful_timeout
+        self.pids: Set[int] = set()
+        # { pid: deadline } of the workers stopping
+        self.retiring: Dict[int, float] = {}
+        self.reload_requested = False
+        self.stop_requested = False
+
+    def run(self):
+        if self.preload:
+            self.preload()
+        signal.signal(signal.SIGHUP, self.handle_reload)
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+
+        self.spawn_workers()
+        next_check = time.monotonic() + self.check_interval
+        while not self.stop_requested:
+            self.reap_workers()
+            if self.stop_requested:
+                break
+            self.spawn_workers()
+
+            if self.should_reload and time.monotonic() >= next_check:
+                next_check = time.monotonic() + self.check_interval
+                if self.should_reload():
+                    logger.info("Universe changed, reloading the workers")
+                    self.reload_requested = True
+            if self.reload_requested:
+                self.reload_requested = False
+                self.reload()
+            time.sleep(POLL_INTERVAL)
+
+        self.stop()
+
+    def handle_reload(self, signum, frame):
+        self.reload_requested = True
+
+    def handle_stop(self, signum, frame):
+        self.stop_requested = True
+
+    def spawn_workers(self):
+        while len(self.pids) < self.workers:
+            self.pids.add(self.spawn_worker())
+
+    def spawn_worker(self) -> int:
+        pid = os.fork()
+        if pid != 0:
+            logger.info("Started worker [%d]", pid)
+            return pid
+
+        # Worker process: the server handles SIGTERM and SIGINT itself
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            self.serve()
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            # Never returns to the parent's loop
+            os._exit(exit_code)
+
+    def reap_workers(self):
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                # No worker left
+                self.pids.clear()
+                self.retiring.clear()
+                return
+            if pid == 0:
+                break
+            if pid in self.pids:
+                logger.warning("Worker [%d] died", pid)
+            self.pids.discard(pid)
+            self.retiring.pop(pid, None)
+
+        now = time.monotonic()
+        for pid, deadline in list(self.retiring.items()):
+            if now >= deadline:
+                self.kill(pid, signal.SIGKILL)
+
+    def retire(self, pids: Set[int]):
+        deadline = time.monotonic() + self.graceful_timeout
+        for pid in pids:
+            self.retiring[pid] = deadline
+            self.kill(pid, signal.SIGTERM)
+
+    def reload(self):
+        if self.preload:
+            try:
+                self.preload()
+            except Exception:
+                logger.exception("Reload failed, the workers are kept")
+                return
+        # The new workers listen along with the old ones: no request is
+        # refused while they swap
+        old_pids, self.pids = self.pids, set()
+        self.spawn_workers()
+        self.retire(old_pids)
+
+    def stop(self):
+        self.retire(self.pids)
+        self.pids = set()
+        while self.retiring:
+            self.reap_workers()
+            time.sleep(POLL_INTERVAL)
+
+    def kill(self, pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
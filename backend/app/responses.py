@@ -0,0 +1,103 @@
+import gzip
+import hashlib
+import json
+from typing import Hashable, Iterator, List, Optional
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.requests import Request
+
+from .database import ROUTES_CHUNK_SIZE, Database
+from .graph import RouteRow
+
+# Level of the cached gzip bodies: close to the smallest size, much faster
+# than level 9
+COMPRESS_LEVEL = 6
+
+
+def make_etag(universe_version: Hashable, *params) -> str:
+    # Strong ETag: the same version and parameters give the same body
+    data = json.dumps([repr(universe_version), *params], separators=(",", ":"))
+    return '"' + hashlib.sha256(data.encode()).hexdigest()[:32] + '"'
+
+
+def is_not_modified(req: Request, etag: str) -> bool:
+    if_none_match = req.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    # Weak comparison, as If-None-Match requires
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def accepts_gzip(req: Request) -> bool:
+    return "gzip" in req.headers.get("Accept-Encoding", "")
+
+
+def get_route_dict(row: RouteRow) -> dict:
+    origin, destination, travel_time = row
+    return {"origin": origin, "destination": destination, "travel_time": travel_time}
+
+
+def encode_routes(rows: List[RouteRow]) -> bytes:
+    return json.dumps(list(map(get_route_dict, rows)), separators=(",", ":")).encode()
+
+
+def compress(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=COMPRESS_LEVEL)
+
+
+def iter_routes_ndjson(
+    db: Database,
+    after: int = 0,
+    limit: Optional[int] = None,
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+) -> Iterator[bytes]:
+    # One JSON route per line, read page by page: neither the routes nor the
+    # body are ever held in memory as a whole
+    while limit is None or limit > 0:
+        page_limit = (
+            ROUTES_CHUNK_SIZE if limit is None else min(limit, ROUTES_CHUNK_SIZE)
+        )
+        rows, cursor = db.get_routes_page(after, page_limit, origin, destination)
+        if rows:
+            yield b"".join(
+                json.dumps(get_route_dict(row), separators=(",", ":")).encode() + b"\n"
+                for row in rows
+            )
+        if cursor is None:
+            return
+        after = cursor
+        if limit is not None:
+            limit -= len(rows)
+
+
+class PrecompressedGZipResponder(GZipResponder):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.passthrough = False
+
+    async def send_with_gzip(self, message):
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.passthrough = "content-encoding" in headers
+        if self.passthrough:
+            await self.send(message)
+            return
+        await super().send_with_gzip(message)
+
+
+class PrecompressedGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware leaving the responses already encoded as they are"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            headers = Headers(scope=scope)
+            if "gzip" in headers.get("Accept-Encoding", ""):
+                responder = PrecompressedGZipResponder(
+                    self.app, self.minimum_size, compresslevel=self.compresslevel
+                )
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
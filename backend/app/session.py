@@ -0,0 +1,124 @@
+import threading
+import time
+from typing import List, Optional, Set, Tuple
+
+
+from .graph import UniverseGraph
+from .lib import compute_odd, generate_bounty_hunters_index
+from .models import Empire, MillenniumFalcon, BountyHuntersIndex
+from .solver import PlanNode, SolverTimeout, StateSpace, StateScore
+
+
+class SolverSession:
+    """
+    Keeps the search tables between two Empires, for a MillenniumFalcon
+    and a universe.
+
+    When a bounty hunter is edited, only the states from its day onward are
+    recomputed, and only while their values keep changing. Changing the
+    countdown within the days already explored costs nothing but picking the
+    arrival again.
+
+    The explored days never exceed `max_countdown`, when given.
+    """
+
+    def __init__(
+        self,
+        millennium_falcon: MillenniumFalcon,
+        graph: UniverseGraph,
+        max_countdown: Optional[int] = None,
+    ):
+        self.millennium_falcon = millennium_falcon
+        self.graph = graph
+        self.max_countdown = max_countdown
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.state_space: Optional[StateSpace] = None
+        self.values: List[StateScore] = []
+        self.parents: List[int] = []
+        self.bounty_hunters_index: BountyHuntersIndex = set()
+        # Days up to which values were computed, and states outdated since
+        self.evaluated_day = -1
+        self.dirty: Set[int] = set()
+
+    def build_state_space(self, countdown: int, deadline: Optional[float] = None):
+        if self.max_countdown and countdown > self.max_countdown:
+            raise ValueError(
+                f"countdown {countdown} is greater than {self.max_countdown}"
+            )
+        # The capacity grows geometrically, so bumping the countdown one day
+        # at a time does not rebuild the states every time
+        if self.state_space is not None:
+            countdown = max(countdown, 2 * self.state_space.countdown)
+            if self.max_countdown:
+                countdown = min(countdown, self.max_countdown)
+
+        self.reset()
+        self.state_space = StateSpace(
+            start=self.millennium_falcon.departure,
+            end=self.millennium_falcon.arrival,
+            autonomy=self.millennium_falcon.autonomy,
+            countdown=countdown,
+            graph=self.graph,
+            deadline=deadline,
+        )
+        self.values, self.parents = self.state_space.new_tables()
+
+    def update(
+        self,
+        empire: Empire,
+        deadline: Optional[float] = None,
+    ) -> Tuple[float, Optional[PlanNode]]:
+        # Waiting for another update of the session counts in the deadline,
+        # like waiting for a free worker of the SolverPool
+        timeout = -1.0 if deadline is None else max(deadline - time.time(), 0.0)
+        if not self.lock.acquire(timeout=timeout):
+            raise SolverTimeout("the search ran past its deadline")
+        try:
+            encounters, plan = self.solve(empire, deadline)
+        except BaseException:
+            # The tables may be half updated
+            self.reset()
+            raise
+        finally:
+            self.lock.release()
+
+        if plan is None:
+            return (0, None)
+        return (compute_odd(encounters), plan)
+
+    def solve(
+        self,
+        empire: Empire,
+        deadline: Optional[float],
+    ) -> Tuple[int, Optional[PlanNode]]:
+        countdown = empire.countdown
+        if self.state_space is None or countdown > self.state_space.countdown:
+            self.build_state_space(countdown, deadline)
+        state_space: StateSpace = self.state_space  # type: ignore
+
+        bounty_hunters_index = generate_bounty_hunters_index(
+            empire.bounty_hunters, self.graph
+        )
+        dirty = set(self.dirty)
+        for planet_id, day in bounty_hunters_index ^ self.bounty_hunters_index:
+            dirty.update(state_space.states_at.get((planet_id, day), ()))
+        for day in range(self.evaluated_day + 1, countdown + 1):
+            dirty.update(state_space.layers[day])
+
+        self.dirty = state_space.evaluate(
+            bounty_hunters_index,
+            self.values,
+            self.parents,
+            until_day=countdown,
+            dirty=dirty,
+            deadline=deadline,
+        )
+        self.bounty_hunters_index = bounty_hunters_index
+        self.evaluated_day = max(self.evaluated_day, countdown)
+
+        return state_space.best_plan(
+            bounty_hunters_index, self.values, self.parents, countdown
+        )
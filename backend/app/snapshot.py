@@ -0,0 +1,166 @@
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from typing import Callable, List, Optional
+
+
+from .graph import UniverseGraph
+
+# Binary snapshot of a UniverseGraph, written beside routes_db:
+#   header | names offsets | names (utf-8, padded to 8 bytes)
+#   | outgoing offsets, targets, travel times
+#   | incoming offsets, sources, travel times
+# Every array is a native int64 array, read in place from the mmap
+MAGIC = b"MFGRAPH\0"
+VERSION = 1
+SUFFIX = ".graph"
+# magic, version, padding, database stamp, planets, routes, names size
+HEADER = struct.Struct("<8sI4x32sQQQ")
+ITEM_SIZE = 8
+
+
+def get_snapshot_path(db_path: str) -> str:
+    return db_path + SUFFIX
+
+
+def get_db_stamp(db_path: str) -> bytes:
+    # Fingerprint of the database, without reading it: the SQLite header
+    # (with its file change counter), size and mtime of the file and its WAL
+    digest = hashlib.sha256()
+    with open(db_path, "rb") as file:
+        digest.update(file.read(100))
+    for path in (db_path, db_path + "-wal"):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        digest.update(struct.pack("<qq", stat.st_size, stat.st_mtime_ns))
+    return digest.digest()
+
+
+def get_padding(size: int) -> int:
+    return -size % ITEM_SIZE
+
+
+def write_snapshot(path: str, graph: UniverseGraph, stamp: bytes):
+    names = [planet.encode() for planet in graph.planets]
+    names_offsets = array("q", [0]) * (len(names) + 1)
+    for i, name in enumerate(names):
+        names_offsets[i + 1] = names_offsets[i] + len(name)
+    names_blob = b"".join(names)
+
+    # Written aside then renamed: readers never see a partial snapshot
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as file:
+            file.write(
+                HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    stamp,
+                    len(graph.planets),
+                    graph.routes_count,
+                    len(names_blob),
+                )
+            )
+            file.write(names_offsets.tobytes())
+            file.write(names_blob + b"\0" * get_padding(len(names_blob)))
+            for section in (*graph.outgoing, *graph.incoming):
+                file.write(array("q", section).tobytes())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_snapshot(path: str, stamp: bytes) -> Optional[UniverseGraph]:
+    """
+    Maps the snapshot in memory, None if it is missing or stale.
+
+    The adjacency arrays of the graph are views on the mapped file: processes
+    loading the same snapshot share a single copy in the page cache.
+    """
+    try:
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        # ValueError: empty file
+        return None
+
+    if len(mapped) < HEADER.size:
+        mapped.close()
+        return None
+    (
+        magic,
+        version,
+        file_stamp,
+        planets_count,
+        routes_count,
+        names_size,
+    ) = HEADER.unpack_from(mapped)
+    names_padded_size = names_size + get_padding(names_size)
+    expected_size = (
+        HEADER.size
+        + ITEM_SIZE * (planets_count + 1) * 3
+        + names_padded_size
+        + ITEM_SIZE * routes_count * 4
+    )
+    if (magic, version, file_stamp, len(mapped)) != (
+        MAGIC,
+        VERSION,
+        stamp,
+        expected_size,
+    ):
+        mapped.close()
+        return None
+
+    view = memoryview(mapped)
+    position = HEADER.size
+
+    def take(size: int) -> memoryview:
+        nonlocal position
+        section = view[position : position + size]
+        position += size
+        return section
+
+    def take_array(count: int) -> memoryview:
+        return take(ITEM_SIZE * count).cast("q")
+
+    names_offsets = take_array(planets_count + 1)
+    names_blob = bytes(take(names_padded_size))
+    planets: List[str] = [
+        names_blob[names_offsets[i] : names_offsets[i + 1]].decode()
+        for i in range(planets_count)
+    ]
+    outgoing = (
+        take_array(planets_count + 1),
+        take_array(routes_count),
+        take_array(routes_count),
+    )
+    incoming = (
+        take_array(planets_count + 1),
+        take_array(routes_count),
+        take_array(routes_count),
+    )
+    return UniverseGraph(planets, outgoing, incoming)  # type: ignore
+
+
+def load_or_compile(
+    db_path: str, compile_graph: Callable[[], UniverseGraph]
+) -> UniverseGraph:
+    stamp = get_db_stamp(db_path)
+    path = get_snapshot_path(db_path)
+    graph = load_snapshot(path, stamp)
+    if graph is not None:
+        return graph
+
+    graph = compile_graph()
+    try:
+        write_snapshot(path, graph, stamp)
+    except OSError:
+        # eg. read only directory: the graph is usable anyway
+        return graph
+    # Mapped right away, to share the pages with the processes loading it
+    return load_snapshot(path, stamp) or graph
@@ -0,0 +1,704 @@
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, Optional
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+import math
+import time
+
+
+from .graph import UniverseGraph
+from .models import BountyHuntersIndex
+
+
+class PlanNode:
+    """
+    Lightweight MillenniumFalcon state used inside the search.
+
+    Same fields as a MillenniumFalconPlan, linked to the next node by
+    `parent`, plus the encounters and route_len of the plan from this node to the
+    arrival. Only the winning plan is converted, see lib.format_plan.
+    """
+
+    __slots__ = (
+        "planet",
+        "day",
+        "fuel",
+        "refill",
+        "hunted",
+        "parent",
+        "encounters",
+        "route_len",
+    )
+    planet: str
+    day: int
+    fuel: int
+    refill: bool
+    hunted: bool
+    parent: Optional["PlanNode"]
+    encounters: int
+    route_len: int
+
+    def __init__(
+        self,
+        planet: str,
+        day: int,
+        fuel: int,
+        refill: bool,
+        hunted: bool = False,
+        parent: Optional["PlanNode"] = None,
+    ):
+        self.planet = planet
+        self.day = day
+        self.fuel = fuel
+        self.refill = refill
+        self.hunted = hunted
+        self.parent = parent
+        self.encounters = hunted + (parent.encounters if parent else 0)
+        self.route_len = 1 + (parent.route_len if parent else 0)
+
+
+# { (planet_id, fuel): best node } for a given day
+Layer = Dict[Tuple[int, int], PlanNode]
+
+
+# (encounters, route_len) of the best plan from the departure to a state
+StateScore = Tuple[int, int]
+NO_SCORE: StateScore = (-1, -1)
+# (planet_id, day, refill) of a plan node
+Step = Tuple[int, int, bool]
+# (sorted state indexes, their parents) of a day of solve
+BackPointers = Tuple["array[int]", "array[int]"]
+
+
+class SolverTimeout(Exception):
+    """Raised when a search runs past its deadline"""
+
+
+class SolverStats:
+    """
+    Counters of a search, and durations (in seconds) of the stages of a
+    request. Plain attributes, so they can be sent back from a worker process.
+    """
+
+    def __init__(self):
+        self.states_expanded = 0
+        self.states_pruned = 0
+        self.plans_scored = 0
+        self.peak_frontier = 0
+        # States cut because they cannot beat the best plan found so far
+        self.states_bounded = 0
+        # Fewest encounters of the optimal plan, when the search stopped at
+        # its time budget before proving the plan found optimal
+        self.encounters_bound: Optional[int] = None
+        self.timings: Dict[str, float] = {}
+
+    def get_counters(self) -> Dict[str, int]:
+        return {
+            "states_expanded": self.states_expanded,
+            "states_pruned": self.states_pruned,
+            "states_bounded": self.states_bounded,
+            "plans_scored": self.plans_scored,
+            "peak_frontier": self.peak_frontier,
+        }
+
+    def update(self, other: "SolverStats"):
+        self.states_expanded += other.states_expanded
+        self.states_pruned += other.states_pruned
+        self.states_bounded += other.states_bounded
+        self.plans_scored += other.plans_scored
+        self.peak_frontier = max(self.peak_frontier, other.peak_frontier)
+        if other.encounters_bound is not None:
+            self.encounters_bound = other.encounters_bound
+        for stage, elapsed in other.timings.items():
+            self.timings[stage] = self.timings.get(stage, 0) + elapsed
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[stage] = self.timings.get(stage, 0) + elapsed
+
+
+def get_search_bounds(
+    graph: UniverseGraph, start_id: int, end_id: int, autonomy: int
+) -> Tuple[List[float], List[float]]:
+    """
+    Lower bounds of the days, whatever the bounty hunters and the countdown.
+
+    Returns the earliest day every planet can be reached from the departure
+    (the plan ends on the arrival, it is never left), and the shortest travel
+    time from every planet to the arrival. Routes longer than the autonomy
+    are never taken. Both are computed once per graph.
+    """
+    earliest_days = graph.get_travel_times(start_id, autonomy, stop_id=end_id)
+    travel_times_to_end = graph.get_travel_times(end_id, autonomy, reverse=True)
+    return earliest_days, travel_times_to_end
+
+
+def check_deadline(deadline: Optional[float]):
+    # deadline is a time.time() timestamp so it can be shared between processes
+    if deadline is not None and time.time() > deadline:
+        raise SolverTimeout("the search ran past its deadline")
+
+
+# ======================
+# TRANSITIONS
+# ======================
+# The moves of the MillenniumFalcon, shared by every engine so their plans
+# cannot drift apart
+def get_jumps(
+    graph: UniverseGraph, planet_id: int, fuel: int
+) -> Iterator[Tuple[int, int]]:
+    # (destination, travel_time) of the routes the MillenniumFalcon can take
+    # with `fuel` left. Instant jumps would break the day ordering
+    for destination_id, travel_time in graph.get_outgoing(planet_id):
+        if 0 < travel_time <= fuel:
+            yield destination_id, travel_time
+
+
+def can_wait(graph: UniverseGraph, end_id: int, planet_id: int) -> bool:
+    # The MillenniumFalcon can only wait on a planet that is the destination
+    # of at least one route. Reaching the arrival planet ends the plan: it is
+    # never left, even to wait
+    return planet_id != end_id and graph.has_incoming(planet_id)
+
+
+def can_end_plan(graph: UniverseGraph, end_id: int, day: int, countdown: int) -> bool:
+    # Landing on the arrival planet on `day` ends a plan. The last day of the
+    # countdown counts, arriving earlier means waiting on the arrival planet
+    # until then
+    return day == countdown or (day < countdown and graph.has_incoming(end_id))
+
+
+def get_plan_outside_graph(
+    start: str, end: str, countdown: int, autonomy: int
+) -> Optional[PlanNode]:
+    # A planet without any route is not in the graph: the MillenniumFalcon
+    # cannot move from or to it. Departing from the arrival planet, the plan
+    # ends on day 0, which must be the last day of the countdown like for any
+    # arrival without incoming routes
+    if start == end and countdown == 0:
+        return PlanNode(planet=start, day=0, fuel=autonomy, refill=False)
+    return None
+
+
+def solve(
+    start: str,
+    end: str,
+    countdown: int,
+    autonomy: int,
+    graph: UniverseGraph,
+    bounty_hunters_index: BountyHuntersIndex,
+    deadline: Optional[float] = None,
+    stats: Optional[SolverStats] = None,
+) -> Tuple[int, Optional[PlanNode]]:
+    """
+    Dynamic programming over the (planet, day, fuel) state space.
+
+    States are explored backward from the arrival planet, one day at a time,
+    from `countdown` down to 0. Every state keeps only the best plan leading
+    from it to the arrival: the one with the fewest encounters, then the
+    fewest nodes. The cost is polynomial in planets x countdown x autonomy,
+    where enumerating every route is exponential.
+
+    States that cannot be reached from the departure by their day are
+    pruned, see get_search_bounds, as well as the states beaten by a fuller
+    tank, see get_expanded_states. Only the back pointers of the expanded
+    states are kept. An arrival that cannot be reached before the end of the
+    countdown returns without searching.
+
+    Returns the number of encounters and the plan, or (0, None) when the
+    arrival cannot be reached before the end of the countdown.
+    Raises SolverTimeout when `deadline` is reached. The search counters are
+    added to `stats`.
+    """
+    if stats is None:
+        stats = SolverStats()
+
+    start_id = graph.get_planet_id(start)
+    end_id = graph.get_planet_id(end)
+    if start_id is None or end_id is None:
+        return (0, get_plan_outside_graph(start, end, countdown, autonomy))
+
+    earliest_days, _ = get_search_bounds(graph, start_id, end_id, autonomy)
+    if earliest_days[end_id] > countdown:
+        return (0, None)
+
+    # A state is the index planet_id * fuels + fuel in the arrays of its day.
+    # score = encounters * stride + route_len, route_len <= countdown + 1
+    fuels = autonomy + 1
+    size = len(graph) * fuels
+    stride = countdown + 2
+    # { day: scores }, { day: parents } and { day: state indexes reached, in
+    # the order they were first reached } of the days not expanded yet, at
+    # most autonomy + 1 of them. The parent of a state is its successor,
+    # day * size + index, times 2 plus 1 for a wait, -1 on the arrival.
+    # Once a day is expanded, only the parents of its expanded states are
+    # kept in `back_pointers`. PlanNodes are only built for the best plan
+    scores: Dict[int, List[float]] = {}
+    parents: Dict[int, "array[int]"] = {}
+    reached: Dict[int, List[int]] = {}
+    back_pointers: Dict[int, BackPointers] = {}
+
+    hunted_planets = get_hunted_planets(bounty_hunters_index, countdown)
+    incoming, waits = get_backward_transitions(graph, end_id, autonomy)
+
+    def get_layer(day: int) -> List[float]:
+        layer = scores.get(day)
+        if layer is None:
+            layer = scores[day] = [math.inf] * size
+            parents[day] = array("q", [-1]) * size
+            reached[day] = []
+            # We dont wait on the arrival planet: arriving on any day before
+            # the end of the countdown terminates the plan
+            if can_end_plan(graph, end_id, day, countdown):
+                index = end_id * fuels + autonomy
+                layer[index] = stride * (end_id in hunted_planets[day]) + 1
+                reached[day].append(index)
+        return layer
+
+    pruned = 0
+
+    def relax(score: int, parent: int, planet_id: int, day: int, fuel: int):
+        nonlocal pruned
+        if fuel < 0 or day < earliest_days[planet_id]:
+            pruned += 1
+            return
+
+        layer = scores[day]
+        index = planet_id * fuels + fuel
+        score += stride * (planet_id in hunted_planets[day]) + 1
+        best = layer[index]
+        if best <= score:
+            pruned += 1
+            return
+        if best == math.inf:
+            reached[day].append(index)
+        layer[index] = score
+        parents[day][index] = parent
+
+    # Days are processed in decreasing order, so every successor of a state
+    # is final before the state itself is expanded. The layers of a day are
+    # created when the first of its successors is expanded
+    get_layer(countdown)
+    for day in range(countdown, 0, -1):
+        check_deadline(deadline)
+        # The predecessors of the day are at most `autonomy` days earlier, or
+        # the day before for a wait
+        for predecessors_day in range(max(0, day - max(autonomy, 1)), day):
+            get_layer(predecessors_day)
+        layer = scores.pop(day)
+        layer_reached = reached.pop(day)
+        expanded = get_expanded_states(layer, layer_reached, fuels)
+        pruned += len(layer_reached) - len(expanded)
+        back_pointers[day] = keep_back_pointers(parents.pop(day), expanded)
+        stats.states_expanded += len(expanded)
+        stats.peak_frontier = max(stats.peak_frontier, len(layer_reached))
+        for index in expanded:
+            score = int(layer[index])
+            planet_id, fuel = divmod(index, fuels)
+            successor = (day * size + index) * 2
+
+            # case previous_state was an hyperspace jump to planet
+            for origin_id, travel_time in incoming[planet_id]:
+                relax(
+                    score,
+                    successor,
+                    origin_id,
+                    day - travel_time,
+                    fuel - travel_time,
+                )
+
+            # case previous_state was waiting on planet: 1 day, refueling
+            if waits[planet_id]:
+                relax(score, successor + 1, planet_id, day - 1, autonomy)
+    stats.states_pruned += pruned
+
+    departures = [index for index in reached.get(0, []) if index // fuels == start_id]
+    stats.plans_scored += len(departures)
+    if not departures:
+        return (0, None)
+
+    index = min(departures, key=lambda x: scores[0][x])
+    back_pointers[0] = keep_back_pointers(parents[0], sorted(departures))
+    steps = get_steps(back_pointers, index, fuels, size, countdown)
+    plan = build_plan(steps, graph, autonomy, bounty_hunters_index)
+    return (plan.encounters, plan)
+
+
+def get_expanded_states(
+    layer: List[float], layer_reached: List[int], fuels: int
+) -> List[int]:
+    """
+    Indexes of the states of a day worth expanding, in increasing order.
+
+    Going backward, a state with more fuel can take every jump a state with
+    less fuel can, on the same planet and day: the states with a score no
+    better than one with more fuel are left out.
+    """
+    expanded: List[int] = []
+    planet_id, best = -1, math.inf
+    # By planet, then from the fullest tank down
+    for index in sorted(layer_reached, reverse=True):
+        if index // fuels != planet_id:
+            planet_id, best = index // fuels, math.inf
+        if layer[index] < best:
+            best = layer[index]
+            expanded.append(index)
+    expanded.reverse()
+    return expanded
+
+
+def keep_back_pointers(parents: "array[int]", indexes: List[int]) -> BackPointers:
+    # The parents of the states `indexes`, sorted, of a day
+    return (array("q", indexes), array("q", [parents[index] for index in indexes]))
+
+
+def get_steps(
+    back_pointers: Dict[int, BackPointers],
+    index: int,
+    fuels: int,
+    size: int,
+    countdown: int,
+) -> List[Step]:
+    # Follows the parents of solve from the departure state `index` on day 0
+    # to the arrival
+    steps: List[Step] = []
+    day, parent = 0, get_parent(back_pointers[0], index)
+    while parent != -1:
+        steps.append((index // fuels, day, parent % 2 == 1))
+        day, index = divmod(parent // 2, size)
+        parent = get_parent(back_pointers[day], index)
+    steps.append((index // fuels, day, day < countdown))
+    return steps
+
+
+def get_parent(back_pointers: BackPointers, index: int) -> int:
+    indexes, parents = back_pointers
+    return parents[bisect_left(indexes, index)]
+
+
+def get_hunted_planets(
+    bounty_hunters_index: BountyHuntersIndex, countdown: int
+) -> List[Set[int]]:
+    # Planets with bounty hunters, for every day of the countdown
+    hunted_planets: List[Set[int]] = [set() for _ in range(countdown + 1)]
+    for planet_id, day in bounty_hunters_index:
+        if 0 <= day <= countdown:
+            hunted_planets[day].add(planet_id)
+    return hunted_planets
+
+
+def get_backward_transitions(
+    graph: UniverseGraph, end_id: int, autonomy: int
+) -> Tuple[List[List[Tuple[int, int]]], List[bool]]:
+    """
+    (origin, travel_time) of the jumps that can lead to every planet, and
+    whether the MillenniumFalcon can wait on every planet.
+    """
+    # The jumps of get_jumps, reversed. Reaching the arrival planet ends the
+    # plan, those states are already accounted for
+    incoming: List[List[Tuple[int, int]]] = [[] for _ in range(len(graph))]
+    for origin_id in range(len(graph)):
+        if origin_id == end_id:
+            continue
+        for destination_id, travel_time in get_jumps(graph, origin_id, autonomy):
+            incoming[destination_id].append((origin_id, travel_time))
+    waits = [can_wait(graph, end_id, planet_id) for planet_id in range(len(graph))]
+    return incoming, waits
+
+
+class StateSpace:
+    """
+    Hunter independent (planet, day, fuel) states reachable from the departure.
+
+    States are explored forward from the departure planet on day 0 up to
+    `countdown`, and stored as integer lists: planet ids, days and fuel left in
+    the tank, with CSR successors and predecessors. The graph of states only
+    depends on the universe, the MillenniumFalcon and the countdown, so it is
+    built once and then scored for as many Empire scenarios as needed.
+
+    The scores are kept in two tables indexed by state id: `values`, the best
+    (encounters, route_len) from the departure, and `parents`, the predecessor
+    it comes from. `evaluate` can recompute only a part of them, see
+    session.SolverSession.
+    """
+
+    def __init__(
+        self,
+        start: str,
+        end: str,
+        countdown: int,
+        autonomy: int,
+        graph: UniverseGraph,
+        deadline: Optional[float] = None,
+    ):
+        self.graph = graph
+        self.start = start
+        self.end = end
+        self.countdown = countdown
+        self.autonomy = autonomy
+        self.start_id = graph.get_planet_id(start)
+        self.end_id = graph.get_planet_id(end)
+
+        self.planets: List[int] = []
+        self.days: List[int] = []
+        self.fuels: List[int] = []
+        self.successors_offsets: List[int] = [0]
+        self.successors: List[int] = []
+        self.predecessors_offsets: List[int] = [0]
+        self.predecessors: List[int] = []
+        # State ids grouped by day, in increasing order
+        self.layers: List[List[int]] = [[] for _ in range(countdown + 1)]
+        # State ids grouped by (planet_id, day), to find the states a bounty
+        # hunter is on
+        self.states_at: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        # States on the arrival planet, in day order
+        self.arrivals: List[int] = []
+
+        if self.start_id is None or self.end_id is None:
+            return
+
+        # States that cannot reach the arrival before the end of the countdown
+        # are never created
+        _, travel_times_to_end = get_search_bounds(
+            graph, self.start_id, self.end_id, autonomy
+        )
+        if travel_times_to_end[self.start_id] > countdown:
+            return
+
+        state_ids: Dict[Tuple[int, int, int], int] = {}
+        successors: List[List[int]] = []
+        predecessors: List[List[int]] = []
+
+        def get_state_id(planet_id: int, day: int, fuel: int) -> int:
+            state_id = state_ids.get((planet_id, day, fuel))
+            if state_id is None:
+                state_id = state_ids[(planet_id, day, fuel)] = len(self.planets)
+                self.planets.append(planet_id)
+                self.days.append(day)
+                self.fuels.append(fuel)
+                self.layers[day].append(state_id)
+                self.states_at[(planet_id, day)].append(state_id)
+                successors.append([])
+                predecessors.append([])
+            return state_id
+
+        def add_transition(state_id: int, successor_id: int):
+            successors[state_id].append(successor_id)
+            predecessors[successor_id].append(state_id)
+
+        get_state_id(self.start_id, 0, autonomy)
+
+        for day in range(countdown + 1):
+            check_deadline(deadline)
+            for state_id in self.layers[day]:
+                planet_id, fuel = self.planets[state_id], self.fuels[state_id]
+                # Reaching the arrival planet ends the plan
+                if planet_id == self.end_id:
+                    self.arrivals.append(state_id)
+                    continue
+
+                for destination_id, travel_time in get_jumps(graph, planet_id, fuel):
+                    landing = day + travel_time
+                    if landing + travel_times_to_end[destination_id] > countdown:
+                        continue
+                    add_transition(
+                        state_id,
+                        get_state_id(destination_id, landing, fuel - travel_time),
+                    )
+
+                if (
+                    can_wait(graph, self.end_id, planet_id)
+                    and day + 1 + travel_times_to_end[planet_id] <= countdown
+                ):
+                    add_transition(state_id, get_state_id(planet_id, day + 1, autonomy))
+
+        for state_successors in successors:
+            self.successors.extend(state_successors)
+            self.successors_offsets.append(len(self.successors))
+        for state_predecessors in predecessors:
+            self.predecessors.extend(state_predecessors)
+            self.predecessors_offsets.append(len(self.predecessors))
+
+    def __len__(self) -> int:
+        return len(self.planets)
+
+    def is_wait(self, state_id: int, successor_id: int) -> bool:
+        # Jumps always burn fuel, only waiting refuels the tank
+        return (
+            self.planets[state_id] == self.planets[successor_id]
+            and self.fuels[successor_id] == self.autonomy
+        )
+
+    def new_tables(self) -> Tuple[List[StateScore], List[int]]:
+        return ([NO_SCORE] * len(self), [-1] * len(self))
+
+    def evaluate(
+        self,
+        bounty_hunters_index: BountyHuntersIndex,
+        values: List[StateScore],
+        parents: List[int],
+        until_day: int,
+        dirty: Optional[Set[int]] = None,
+        deadline: Optional[float] = None,
+    ) -> Set[int]:
+        """
+        Computes `values` and `parents` day by day up to `until_day`.
+
+        With `dirty` states, only those are recomputed, then the states whose
+        predecessors' values changed. Returns the dirty states left after
+        `until_day`. Without, every state is computed.
+        """
+        planets = self.planets
+        predecessors_offsets, predecessors = (
+            self.predecessors_offsets,
+            self.predecessors,
+        )
+        successors_offsets, successors = self.successors_offsets, self.successors
+
+        dirty_layers: Dict[int, Set[int]] = defaultdict(set)
+        for state_id in dirty or ():
+            dirty_layers[self.days[state_id]].add(state_id)
+
+        for day in range(until_day + 1):
+            check_deadline(deadline)
+            if dirty is None:
+                layer: Iterable[int] = self.layers[day]
+            else:
+                layer = sorted(dirty_layers.pop(day, ()))
+
+            for state_id in layer:
+                hunted = (planets[state_id], day) in bounty_hunters_index
+
+                # The departure is the only state without predecessors
+                best, parent = (0, 0), -1
+                for i in range(
+                    predecessors_offsets[state_id], predecessors_offsets[state_id + 1]
+                ):
+                    predecessor_id = predecessors[i]
+                    if parent == -1 or values[predecessor_id] < best:
+                        best, parent = values[predecessor_id], predecessor_id
+                value = (best[0] + hunted, best[1] + 1)
+
+                parents[state_id] = parent
+                if value == values[state_id]:
+                    continue
+                values[state_id] = value
+                if dirty is not None:
+                    for i in range(
+                        successors_offsets[state_id], successors_offsets[state_id + 1]
+                    ):
+                        successor_id = successors[i]
+                        dirty_layers[self.days[successor_id]].add(successor_id)
+
+        return set().union(*dirty_layers.values())
+
+    def best_plan(
+        self,
+        bounty_hunters_index: BountyHuntersIndex,
+        values: List[StateScore],
+        parents: List[int],
+        countdown: int,
+    ) -> Tuple[int, Optional[PlanNode]]:
+        if self.start_id is None or self.end_id is None:
+            plan = get_plan_outside_graph(
+                self.start, self.end, countdown, self.autonomy
+            )
+            return (0, plan)
+        if not self.arrivals:
+            return (0, None)
+
+        arrivals = [
+            state_id
+            for state_id in self.arrivals
+            if can_end_plan(
+                self.graph, self.end_id, self.days[state_id], countdown  # type: ignore
+            )
+        ]
+        if not arrivals:
+            return (0, None)
+
+        arrival_id = min(arrivals, key=lambda x: values[x])
+        plan = self.build_plan(arrival_id, parents, bounty_hunters_index, countdown)
+        return (plan.encounters, plan)
+
+    def solve(
+        self,
+        bounty_hunters_index: BountyHuntersIndex,
+        countdown: Optional[int] = None,
+        deadline: Optional[float] = None,
+    ) -> Tuple[int, Optional[PlanNode]]:
+        """
+        Best plan for one Empire scenario, with `countdown` up to the one the
+        StateSpace was built with. Same result as the `solve` function.
+        """
+        if countdown is None:
+            countdown = self.countdown
+        if countdown > self.countdown:
+            raise ValueError(
+                f"countdown {countdown} is greater than the state space one"
+            )
+
+        values, parents = self.new_tables()
+        self.evaluate(bounty_hunters_index, values, parents, countdown, None, deadline)
+        return self.best_plan(bounty_hunters_index, values, parents, countdown)
+
+    def build_plan(
+        self,
+        arrival_id: int,
+        parents: List[int],
+        bounty_hunters_index: BountyHuntersIndex,
+        countdown: int,
+    ) -> PlanNode:
+        arrival_day = self.days[arrival_id]
+        steps: List[Step] = [
+            (self.planets[arrival_id], arrival_day, arrival_day < countdown)
+        ]
+        successor_id, state_id = arrival_id, parents[arrival_id]
+        while state_id != -1:
+            steps.append(
+                (
+                    self.planets[state_id],
+                    self.days[state_id],
+                    self.is_wait(state_id, successor_id),
+                )
+            )
+            successor_id, state_id = state_id, parents[state_id]
+
+        steps.reverse()
+        return build_plan(steps, self.graph, self.autonomy, bounty_hunters_index)
+
+
+def build_plan(
+    steps: List[Step],
+    graph: UniverseGraph,
+    autonomy: int,
+    bounty_hunters_index: BountyHuntersIndex,
+) -> PlanNode:
+    """
+    PlanNode chain of the steps, from the departure to the arrival.
+
+    Same nodes as the backward search: the fuel of a node is what is left
+    once the fuel used until the next refill is burnt.
+    """
+    plan: Optional[PlanNode] = None
+    for planet_id, day, refill in reversed(steps):
+        if plan is None or refill:
+            fuel = autonomy
+        else:
+            fuel = plan.fuel - (plan.day - day)
+        plan = PlanNode(
+            parent=plan,
+            planet=graph.planets[planet_id],
+            day=day,
+            fuel=fuel,
+            refill=refill,
+            hunted=(planet_id, day) in bounty_hunters_index,
+        )
+
+    return plan  # type: ignore
@@ -0,0 +1,99 @@
+import json
+import os
+import random
+import sqlite3
+from argparse import ArgumentParser
+
+from pydantic import BaseModel
+
+
+class ScenarioParams(BaseModel):
+    """Size of a synthetic scenario, every dimension scales independently"""
+
+    planets: int = 100
+    # Average number of routes leaving a planet
+    density: float = 3.0
+    max_travel_time: int = 6
+    autonomy: int = 6
+    countdown: int = 100
+    hunters: int = 50
+    seed: int = 0
+
+
+def get_planet(i: int) -> str:
+    return f"P{i:06d}"
+
+
+def generate_routes(params: ScenarioParams, rng: random.Random):
+    # A chain through every planet keeps the arrival reachable, the other
+    # routes are picked at random
+    for i in range(params.planets - 1):
+        yield (
+            get_planet(i),
+            get_planet(i + 1),
+            rng.randint(1, min(params.max_travel_time, params.autonomy)),
+        )
+    for _ in range(int(params.planets * params.density) - (params.planets - 1)):
+        yield (
+            get_planet(rng.randrange(params.planets)),
+            get_planet(rng.randrange(params.planets)),
+            rng.randint(1, params.max_travel_time),
+        )
+
+
+def generate_scenario(directory: str, params: ScenarioParams):
+    """
+    Writes universe.db, millennium-falcon.json and empire.json in `directory`.
+
+    The same params always generate the same files.
+    """
+    rng = random.Random(params.seed)
+    os.makedirs(directory, exist_ok=True)
+
+    db_path = os.path.join(directory, "universe.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    con = sqlite3.connect(db_path)
+    con.execute(
+        "CREATE TABLE routes ("
+        "origin TEXT NOT NULL, destination TEXT NOT NULL, travel_time INT NOT NULL"
+        ");"
+    )
+    con.executemany("INSERT INTO routes VALUES(?,?,?)", generate_routes(params, rng))
+    con.commit()
+    con.close()
+
+    millennium_falcon = {
+        "autonomy": params.autonomy,
+        "departure": get_planet(0),
+        "arrival": get_planet(params.planets - 1),
+        "routes_db": "universe.db",
+    }
+    empire = {
+        "countdown": params.countdown,
+        "bounty_hunters": [
+            {
+                "planet": get_planet(rng.randrange(params.planets)),
+                "day": rng.randint(0, params.countdown),
+            }
+            for _ in range(params.hunters)
+        ],
+    }
+    with open(os.path.join(directory, "millennium-falcon.json"), "w") as file:
+        json.dump(millennium_falcon, file, indent=2)
+    with open(os.path.join(directory, "empire.json"), "w") as file:
+        json.dump(empire, file, indent=2)
+
+
+def parser():
+    parser = ArgumentParser(description="Generates a synthetic scenario")
+    parser.add_argument("directory", help="Output directory")
+    for field, default in ScenarioParams().dict().items():
+        parser.add_argument(f"--{field}", type=type(default), default=default)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = vars(parser())
+    directory = args.pop("directory")
+    generate_scenario(directory, ScenarioParams(**args))
@@ -0,0 +1,269 @@
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from typing import Callable, Dict, List
+
+
+from app import dense
+from app.database import SqliteDB
+from app.lib import (
+    give_me_the_odds,
+    get_empire_from_file,
+    get_millenium_falcon_from_file,
+)
+from app.models import Engine
+from .generator import ScenarioParams, generate_scenario
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+EXAMPLES_DIR = os.path.join(BENCHMARKS_DIR, "..", "examples")
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, "baseline.json")
+
+# Every scenario grows one dimension of the "small" one
+SCENARIOS: Dict[str, ScenarioParams] = {
+    "small": ScenarioParams(planets=50, countdown=50, hunters=20),
+    "planets": ScenarioParams(planets=2_000, countdown=50, hunters=200),
+    "density": ScenarioParams(planets=50, density=40, countdown=50, hunters=20),
+    "autonomy": ScenarioParams(
+        planets=50, autonomy=60, max_travel_time=30, countdown=50, hunters=20
+    ),
+    "countdown": ScenarioParams(planets=50, countdown=1_000, hunters=20),
+    "hunters": ScenarioParams(planets=50, countdown=50, hunters=20_000),
+}
+
+# Engines of give_me_the_odds, NumPy is optional
+ENGINES = [
+    engine for engine in Engine if engine != Engine.numpy or dense.is_available()
+]
+
+
+# ======================
+# RUNNERS
+# ======================
+def measure(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    func()  # warm up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "runs": repeat,
+    }
+
+
+def load_scenario(directory: str):
+    millennium_falcon = get_millenium_falcon_from_file(
+        os.path.join(directory, "millennium-falcon.json")
+    )
+    empire = get_empire_from_file(os.path.join(directory, "empire.json"))
+    return millennium_falcon, empire
+
+
+def bench_give_me_the_odds(directory: str, repeat: int, engine: Engine):
+    millennium_falcon, empire = load_scenario(directory)
+    db = SqliteDB(snapshot=False)
+    db.connect(millennium_falcon.routes_db)
+    graph = db.get_universe_graph()
+    try:
+        return measure(
+            lambda: give_me_the_odds(millennium_falcon, empire, graph, engine=engine),
+            repeat,
+        )
+    finally:
+        db.disconnect()
+
+
+def bench_get_routes(directory: str, repeat: int):
+    millennium_falcon, _ = load_scenario(directory)
+
+    def get_routes():
+        db = SqliteDB(snapshot=False)
+        db.connect(millennium_falcon.routes_db)
+        db.get_routes()
+        db.disconnect()
+
+    return measure(get_routes, repeat)
+
+
+def bench_api_odds(directory: str, repeat: int):
+    from fastapi.testclient import TestClient
+    from app import create_app
+    from app.app import get_millennium_falcon, odds_cache
+
+    os.environ["MILLENNIUM_FALCON_PATH"] = os.path.join(
+        directory, "millennium-falcon.json"
+    )
+    get_millennium_falcon.cache_clear()
+    with open(os.path.join(directory, "empire.json")) as file:
+        empire = file.read()
+
+    def post_odds():
+        # Measures the search, not the cache
+        odds_cache.clear()
+        response = client.post("/api/odds", data=empire)
+        response.raise_for_status()
+
+    with TestClient(create_app()) as client:
+        return measure(post_odds, repeat)
+
+
+RUNNERS = {
+    "give_me_the_odds": lambda directory, repeat: bench_give_me_the_odds(
+        directory, repeat, Engine.dp
+    ),
+    "give_me_the_odds_intervals": lambda directory, repeat: bench_give_me_the_odds(
+        directory, repeat, Engine.intervals
+    ),
+    "give_me_the_odds_bnb": lambda directory, repeat: bench_give_me_the_odds(
+        directory, repeat, Engine.bnb
+    ),
+    "give_me_the_odds_numpy": lambda directory, repeat: bench_give_me_the_odds(
+        directory, repeat, Engine.numpy
+    ),
+    "get_routes": bench_get_routes,
+    "api_odds": bench_api_odds,
+}
+
+
+# ======================
+# CORRECTNESS
+# ======================
+def check_examples(examples_dir: str = EXAMPLES_DIR) -> List[Dict]:
+    checks = []
+    for name in sorted(os.listdir(examples_dir)):
+        directory = os.path.join(examples_dir, name)
+        answer_path = os.path.join(directory, "answer.json")
+        if not os.path.isfile(answer_path):
+            continue
+        with open(answer_path) as file:
+            # answer.json holds a probability, give_me_the_odds a percentage
+            expected = round(json.load(file)["odds"] * 100, 6)
+
+        millennium_falcon, empire = load_scenario(directory)
+        db = SqliteDB(snapshot=False)
+        db.connect(millennium_falcon.routes_db)
+        graph = db.get_universe_graph()
+        odds = {
+            engine.value: round(
+                give_me_the_odds(millennium_falcon, empire, graph, engine=engine)[0], 6
+            )
+            for engine in ENGINES
+        }
+        db.disconnect()
+
+        checks.append(
+            {
+                "example": name,
+                "expected": expected,
+                "odds": odds,
+                "ok": all(odd == expected for odd in odds.values()),
+            }
+        )
+    return checks
+
+
+# ======================
+# BASELINE
+# ======================
+def compare(
+    baseline: Dict, results: Dict, max_regression: float, min_delta_ms: float
+) -> List[str]:
+    # A timing regresses when its median grows by more than max_regression
+    # (0.5 = +50%) and by more than min_delta_ms, to ignore noise
+    regressions = []
+    for key, timing in results["timings"].items():
+        reference = baseline.get("timings", {}).get(key)
+        if reference is None:
+            continue
+        median, reference_median = timing["median_ms"], reference["median_ms"]
+        if (
+            median > reference_median * (1 + max_regression)
+            and median - reference_median > min_delta_ms
+        ):
+            regressions.append(f"{key}: {reference_median}ms -> {median}ms")
+    return regressions
+
+
+def run(scenarios: List[str], runners: List[str], repeat: int, work_dir: str) -> Dict:
+    timings = {}
+    for scenario in scenarios:
+        directory = os.path.join(work_dir, scenario)
+        generate_scenario(directory, SCENARIOS[scenario])
+        for runner in runners:
+            timings[f"{scenario}/{runner}"] = RUNNERS[runner](directory, repeat)
+            print(f"{scenario}/{runner}: {timings[f'{scenario}/{runner}']}")
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+            "engines": [engine.value for engine in ENGINES],
+        },
+        "scenarios": {name: SCENARIOS[name].dict() for name in scenarios},
+        "examples": check_examples(),
+        "timings": timings,
+    }
+
+
+def parser():
+    parser = ArgumentParser(description="Runs the benchmarks of give_me_the_odds")
+    parser.add_argument(
+        "--scenario", action="append", choices=SCENARIOS, help="Default: all"
+    )
+    parser.add_argument(
+        "--runner", action="append", choices=RUNNERS, help="Default: all"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Writes the results as JSON")
+    parser.add_argument(
+        "--baseline",
+        help=f"Fails on regressions against a previous output, eg. {BASELINE_PATH}",
+    )
+    parser.add_argument("--max-regression", type=float, default=0.5)
+    parser.add_argument("--min-delta-ms", type=float, default=5.0)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parser()
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = run(
+            scenarios=args.scenario or list(SCENARIOS),
+            runners=args.runner or list(RUNNERS),
+            repeat=args.repeat,
+            work_dir=work_dir,
+        )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    status = 0
+    for check in results["examples"]:
+        if not check["ok"]:
+            print(f"WRONG ODDS {check}")
+            status = 1
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        for regression in compare(
+            baseline, results, args.max_regression, args.min_delta_ms
+        ):
+            print(f"REGRESSION {regression}")
+            status = 1
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
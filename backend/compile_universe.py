@@ -0,0 +1,31 @@
+#!python3
+from argparse import ArgumentParser
+
+
+from app.database import SqliteDB
+from app.snapshot import get_db_stamp, get_snapshot_path, write_snapshot
+
+
+def parser():
+    parser = ArgumentParser(
+        description="Compiles the universe graph snapshot beside the database"
+    )
+    parser.add_argument("routes_db", nargs="+", help="SQLite universe database")
+    return parser.parse_args()
+
+
+def main():
+    args = parser()
+
+    for db_path in args.routes_db:
+        db = SqliteDB(snapshot=False)
+        db.connect(db_path)
+        graph = db.get_universe_graph()
+        path = get_snapshot_path(db_path)
+        write_snapshot(path, graph, get_db_stamp(db_path))
+        db.disconnect()
+        print(f"{path}: {len(graph)} planets, {graph.routes_count} routes")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,22 +3,30 @@ from argparse import ArgumentParser
 from pydantic import ValidationError
 import json
 import os
+import sys
 
 
+from app.batch import iter_batch_items, run_batch
 from app.lib import (
     give_me_the_odds,
     get_empire_from_file,
     get_millenium_falcon_from_file,
 )
 from app.database import SqliteDB
+from app.ingest import decompress
+from app.models import DEFAULT_ENGINE, Engine
 
 
-def is_valid_json_file(parser: ArgumentParser, file_path: str):
+def is_valid_json_file(
+    parser: ArgumentParser, file_path: str, compressed: bool = False
+):
     if not os.path.isfile(file_path):
         parser.error(f"\n\tThe file {file_path} does not exist!")
     try:
-        with open(file_path, "r") as file:
-            json.loads(file.read())
+        with open(file_path, "rb") as file:
+            data = file.read()
+            # gzip or zip JSON
+            json.loads(decompress(data) if compressed else data)
             return file_path
     except ValueError:
         parser.error(f"\n\tThe file {file_path} is not valid JSON!")
@@ -36,11 +44,36 @@ def parser():
     )
     parser.add_argument(
         "empire",
-        help="Empire JSON file",
+        help="Empire JSON file, optionally gzip or zip compressed",
         metavar="empire",
-        type=lambda x: is_valid_json_file(parser, x),
+        nargs="?",
+        type=lambda x: is_valid_json_file(parser, x, compressed=True),
+    )
+    parser.add_argument(
+        "--batch",
+        help="Empire scenarios, prints their odds as JSONL: a directory of JSON files,"
+        " a glob, a JSONL file or - for JSONL on stdin",
+        metavar="source",
+    )
+    parser.add_argument(
+        "--jobs",
+        help="Worker processes of the batch (default: number of CPUs)",
+        type=int,
+        default=os.cpu_count() or 1,
+    )
+    parser.add_argument(
+        "--order",
+        help="Order of the batch results (default: submission)",
+        choices=["submission", "completion"],
+        default="submission",
+    )
+    parser.add_argument(
+        "--engine", type=Engine, choices=list(Engine), default=DEFAULT_ENGINE
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if (args.empire is None) == (args.batch is None):
+        parser.error("either an empire file or --batch is required")
+    return args
 
 
 def main():
@@ -50,6 +83,22 @@ def main():
     # Validate the file data
     try:
         millennium_falcon = get_millenium_falcon_from_file(args.falcon)
+    except ValidationError as err:
+        print(err)
+        return
+
+    if args.batch:
+        run_batch(
+            millennium_falcon=millennium_falcon,
+            items=iter_batch_items(args.batch),
+            output=sys.stdout,
+            jobs=args.jobs,
+            ordered=args.order == "submission",
+            engine=args.engine,
+        )
+        return
+
+    try:
         empire = get_empire_from_file(args.empire)
     except ValidationError as err:
         print(err)
@@ -58,16 +107,20 @@ def main():
     # Read routes from database
     db = SqliteDB()
     db.connect(path=millennium_falcon.routes_db)
-    routes = db.get_routes()
+    graph = db.get_universe_graph()
 
     # Compute the odd
     odd, _ = give_me_the_odds(
         millennium_falcon=millennium_falcon,
         empire=empire,
-        routes=routes,
+        graph=graph,
+        engine=args.engine,
     )
     return odd
 
 
 if __name__ == "__main__":
-    print(main())
+    odd = main()
+    # Batch results are already printed
+    if odd is not None:
+        print(odd)
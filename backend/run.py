@@ -1,9 +1,13 @@
 #!python3
+import logging
 import uvicorn
 from argparse import ArgumentParser
-from os import environ
+from os import cpu_count, environ
 
 
+from app.app import get_millennium_falcon, preload_universe
+from app.database import SqliteDB
+from app.prefork import Prefork
 from give_me_the_odds import is_valid_json_file
 
 
@@ -17,15 +21,91 @@ def parser():
         metavar="falcon_file",
         type=lambda x: is_valid_json_file(parser, x),
     )
+    parser.add_argument(
+        "--production",
+        help="Serve with prefork workers sharing the universe, without auto reload",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--workers",
+        help="Worker processes in production (default: number of CPUs)",
+        type=int,
+        default=int(environ.get("WEB_CONCURRENCY", cpu_count() or 1)),
+    )
+    parser.add_argument(
+        "--keep-alive",
+        help="Seconds an idle connection is kept open (default: 5)",
+        type=int,
+        default=5,
+    )
+    parser.add_argument(
+        "--backlog",
+        help="Connections waiting to be accepted (default: 2048)",
+        type=int,
+        default=2048,
+    )
+    parser.add_argument(
+        "--reload-interval",
+        help="Seconds between two checks of the universe in production,"
+        " the workers are reloaded when it changed (default: 5, 0 disables)",
+        type=float,
+        default=5.0,
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        help="Seconds a stopping worker has to finish its requests (default: 30)",
+        type=float,
+        default=30.0,
+    )
     return parser.parse_args()
 
 
-if __name__ == "__main__":
-    args = parser()
-    environ["MILLENNIUM_FALCON_PATH"] = args.falcon
-    port = int(environ.get("PORT", 8080))
+def run_production(args, port: int):
+    """
+    The universe is loaded once in this process, then `args.workers` server
+    processes are forked: they share the universe and the listening socket.
+    SIGHUP, or a change of the universe, reloads the workers gracefully.
+    """
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
+    config = uvicorn.Config(
+        app="app:create_app",
+        factory=True,
+        port=port,
+        host="0.0.0.0",
+        log_level="info",
+        proxy_headers=True,
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+    )
+    sock = config.bind_socket()
 
-    # Start server
+    def serve():
+        uvicorn.Server(config).run(sockets=[sock])
+
+    # Compares the versions of the database on a connection of its own,
+    # never used by the workers
+    watcher = SqliteDB(snapshot=False, pool_size=1)
+    watcher.connect(get_millennium_falcon().routes_db)
+    universe_version = watcher.get_version()
+
+    def universe_changed() -> bool:
+        nonlocal universe_version
+        version, universe_version = universe_version, watcher.get_version()
+        return version != universe_version
+
+    Prefork(
+        serve,
+        workers=args.workers,
+        preload=preload_universe,
+        should_reload=universe_changed if args.reload_interval > 0 else None,
+        check_interval=args.reload_interval,
+        graceful_timeout=args.graceful_timeout,
+    ).run()
+    sock.close()
+
+
+def run_development(args, port: int):
+    # Single process, restarted whenever the code changes
     config = uvicorn.Config(
         app="app:create_app",
         factory=True,
@@ -33,9 +113,23 @@ if __name__ == "__main__":
         host="0.0.0.0",
         log_level="info",
         proxy_headers=True,
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
         reload=True,
         debug=True,
         reload_dirs=["app"],
     )
     server = uvicorn.Server(config)
     server.run()
+
+
+if __name__ == "__main__":
+    args = parser()
+    environ["MILLENNIUM_FALCON_PATH"] = args.falcon
+    port = int(environ.get("PORT", 8080))
+
+    # Start server
+    if args.production:
+        run_production(args, port)
+    else:
+        run_development(args, port)
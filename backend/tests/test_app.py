@@ -1,10 +1,20 @@
 import unittest
+import gzip
 import json
 from os import environ, path, getcwd
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 
 
-from app import create_app
+from app import create_app, dense
+from app.app import (
+    database,
+    get_solver_pool,
+    odds_cache,
+    preload_universe,
+    routes_cache,
+)
+from app.executor import SolverPool
 
 
 class TestApp(unittest.IsolatedAsyncioTestCase):
@@ -42,6 +52,87 @@ class TestApp(unittest.IsolatedAsyncioTestCase):
                 self.assertEqual(exp.get("destination"), res.get("destination"))
                 self.assertEqual(exp.get("travel_time"), res.get("travel_time"))
 
+    def test_preloaded_universe(self):
+        """
+        GIVEN the universe preloaded, as before the workers are forked
+        WHEN the application starts
+        THEN uses the preloaded universe graph
+        """
+        preload_universe()
+        graph = database.universe_graph
+        self.assertIsNotNone(graph)
+        with TestClient(self.app) as client:
+            self.assertIs(graph, database.get_universe_graph())
+            response = client.get("/api/routes")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(5, len(response.json()))
+
+    def test_get_routes_pages(self):
+        """
+        GIVEN application with fixture
+        WHEN GET /api/routes with a limit, following the next links
+        THEN returns every route once, by pages
+        """
+        with TestClient(self.app) as client:
+            response = client.get("/api/routes?limit=2")
+            pages = [response.json()]
+            while "next" in response.links:
+                response = client.get(response.links["next"]["url"])
+                self.assertEqual(response.status_code, 200)
+                pages.append(response.json())
+            self.assertEqual([2, 2, 1], [len(page) for page in pages])
+            routes = [route for page in pages for route in page]
+            self.assertEqual(client.get("/api/routes").json(), routes)
+
+            response = client.get("/api/routes?origin=Dagobah")
+            self.assertEqual(
+                ["Endor", "Hoth"], [route["destination"] for route in response.json()]
+            )
+            response = client.get("/api/routes?origin=Dagobah&destination=Hoth")
+            self.assertEqual(1, len(response.json()))
+
+    def test_get_routes_ndjson(self):
+        """
+        GIVEN application with fixture
+        WHEN GET /api/routes?format=ndjson
+        THEN streams one JSON route per line
+        """
+        with TestClient(self.app) as client:
+            response = client.get("/api/routes?format=ndjson&destination=Endor")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual("application/x-ndjson", response.headers["content-type"])
+            lines = response.text.splitlines()
+            self.assertEqual(
+                {"origin": "Dagobah", "destination": "Endor", "travel_time": 4},
+                json.loads(lines[0]),
+            )
+            self.assertEqual(2, len(lines))
+
+    def test_get_routes_not_modified(self):
+        """
+        GIVEN application with fixture
+        WHEN GET /api/routes again with the ETag of the previous response
+        THEN returns 304 without body, and the compressed body is cached
+        """
+        with TestClient(self.app) as client:
+            response = client.get("/api/routes")
+            etag = response.headers["ETag"]
+            self.assertEqual("gzip", response.headers["Content-Encoding"])
+
+            response = client.get("/api/routes", headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(b"", response.content)
+            other = client.get("/api/routes?limit=1", headers={"If-None-Match": etag})
+            self.assertEqual(other.status_code, 200)
+
+            hits = routes_cache.hits
+            response = client.get(
+                "/api/routes", headers={"Accept-Encoding": "identity"}
+            )
+            self.assertEqual(hits + 1, routes_cache.hits)
+            self.assertNotIn("Content-Encoding", response.headers)
+            self.assertEqual(5, len(response.json()))
+
     def test_get_millennium_falcon(self):
         millennium_falcon = {"autonomy": 6, "departure": "Tatooine", "arrival": "Endor"}
         with TestClient(self.app) as client:
@@ -78,3 +169,221 @@ class TestApp(unittest.IsolatedAsyncioTestCase):
             self.assertEqual(data.get("odd"), 81)
             for exp, res in zip(expected, data.get("plan")):
                 self.assertDictEqual(res, exp)
+
+    def test_post_odds_cached(self):
+        empire = {"countdown": 9, "bounty_hunters": [{"planet": "Hoth", "day": 6}]}
+        with TestClient(self.app) as client:
+            hits = odds_cache.hits
+            first = client.post("/api/odds", data=json.dumps(empire))
+            second = client.post("/api/odds", data=json.dumps(empire))
+            self.assertEqual(second.status_code, 200)
+            self.assertEqual(first.json(), second.json())
+            self.assertEqual(hits + 1, odds_cache.hits)
+
+    def test_post_odds_compressed(self):
+        """
+        GIVEN application with fixture
+        WHEN POST /api/odds with a gzip or zip Empire, or an invalid one
+        THEN returns the odds of the Empire, or 422
+        """
+        with open("examples/example4/empire.json", "rb") as file:
+            empire = file.read()
+        with open("examples/example4/empire.json.zip", "rb") as file:
+            archive = file.read()
+        with TestClient(self.app) as client:
+            expected = client.post("/api/odds", data=empire)
+            compressed = client.post("/api/odds", data=gzip.compress(empire))
+            zipped = client.post("/api/odds", data=archive)
+            invalid = client.post("/api/odds", data=gzip.compress(b'{"countdown": 1}'))
+            self.assertEqual(expected.status_code, 200)
+            self.assertEqual(expected.json(), compressed.json())
+            self.assertEqual(expected.json(), zipped.json())
+            self.assertEqual(invalid.status_code, 422)
+            self.assertEqual(
+                ["body", "bounty_hunters"], invalid.json()["detail"][0]["loc"]
+            )
+
+    def test_post_odds_engine(self):
+        empire = {
+            "countdown": 10,
+            "bounty_hunters": [
+                {"planet": "Hoth", "day": 6},
+                {"planet": "Hoth", "day": 7},
+                {"planet": "Hoth", "day": 8},
+            ],
+        }
+        with TestClient(self.app) as client:
+            dp = client.post("/api/odds", data=json.dumps(empire))
+            intervals = client.post(
+                "/api/odds?engine=intervals", data=json.dumps(empire)
+            )
+            bnb = client.post("/api/odds?engine=bnb", data=json.dumps(empire))
+            unknown = client.post("/api/odds?engine=unknown", data=json.dumps(empire))
+            self.assertEqual(intervals.status_code, 200)
+            self.assertEqual(dp.json()["odd"], intervals.json()["odd"])
+            self.assertEqual(len(dp.json()["plan"]), len(intervals.json()["plan"]))
+            self.assertEqual(dp.json()["odd"], bnb.json()["odd"])
+            self.assertEqual(len(dp.json()["plan"]), len(bnb.json()["plan"]))
+            self.assertEqual(unknown.status_code, 422)
+            if dense.is_available():
+                numpy = client.post("/api/odds?engine=numpy", data=json.dumps(empire))
+                self.assertEqual(dp.json()["odd"], numpy.json()["odd"])
+                self.assertEqual(len(dp.json()["plan"]), len(numpy.json()["plan"]))
+
+    def test_post_odds_time_budget(self):
+        """
+        GIVEN application with fixture
+        WHEN POST /api/odds with a time budget
+        THEN returns the best plan, proven optimal on this small universe, and
+        reports the branch and bound search whatever the requested engine
+        """
+        empire = {
+            "countdown": 10,
+            "bounty_hunters": [
+                {"planet": "Hoth", "day": 6},
+                {"planet": "Hoth", "day": 7},
+                {"planet": "Hoth", "day": 8},
+            ],
+        }
+        with TestClient(self.app) as client:
+            dp = client.post("/api/odds", data=json.dumps(empire))
+            anytime = client.post(
+                "/api/odds?time_budget_ms=200", data=json.dumps(empire)
+            )
+            intervals = client.post(
+                "/api/odds?time_budget_ms=200&engine=intervals", data=json.dumps(empire)
+            )
+            pareto = client.post(
+                "/api/odds?time_budget_ms=200&mode=pareto", data=json.dumps(empire)
+            )
+            self.assertEqual(anytime.status_code, 200)
+            data = anytime.json()
+            self.assertEqual(dp.json()["odd"], data["odd"])
+            self.assertEqual(len(dp.json()["plan"]), len(data["plan"]))
+            self.assertTrue(data["optimal"])
+            self.assertEqual(0, data["gap"])
+            self.assertEqual("bnb", data["engine"])
+            self.assertEqual(intervals.status_code, 200)
+            self.assertEqual("bnb", intervals.json()["engine"])
+            self.assertEqual(data["odd"], intervals.json()["odd"])
+            self.assertNotIn("engine", dp.json())
+            self.assertEqual(pareto.status_code, 400)
+
+    def test_post_odds_pareto(self):
+        empire = {
+            "countdown": 10,
+            "bounty_hunters": [
+                {"planet": "Hoth", "day": 6},
+                {"planet": "Hoth", "day": 7},
+                {"planet": "Hoth", "day": 8},
+            ],
+        }
+        with TestClient(self.app) as client:
+            response = client.post("/api/odds?mode=pareto", data=json.dumps(empire))
+            data = response.json()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                [(81, 8, 1), (90, 9, 1), (100, 10, 2)],
+                [(x["odd"], x["arrival_day"], x["refills"]) for x in data["frontier"]],
+            )
+            self.assertEqual("Endor", data["frontier"][0]["plan"][-1]["planet"])
+
+            best = client.post("/api/odds", data=json.dumps(empire))
+            self.assertEqual(100, best.json()["odd"])
+
+    def test_post_odds_debug(self):
+        empire = {"countdown": 8, "bounty_hunters": [{"planet": "Hoth", "day": 6}]}
+        with TestClient(self.app) as client:
+            client.post("/api/odds", data=json.dumps(empire))
+            response = client.post("/api/odds?debug=true", data=json.dumps(empire))
+            data = response.json()
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("search;dur=", response.headers["Server-Timing"])
+            self.assertGreater(data["debug"]["states_expanded"], 0)
+            self.assertGreater(data["debug"]["plans_scored"], 0)
+            self.assertIn("search", data["debug"]["timings_ms"])
+
+            cached = client.post("/api/odds", data=json.dumps(empire))
+            self.assertNotIn("debug", cached.json())
+            self.assertIn("universe;dur=", cached.headers["Server-Timing"])
+
+    def test_get_metrics(self):
+        empire = {"countdown": 7, "bounty_hunters": []}
+        with TestClient(self.app) as client:
+            client.post("/api/odds", data=json.dumps(empire))
+            response = client.get("/api/metrics")
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('solver_states_expanded_total{engine="bnb"}', response.text)
+            self.assertIn(
+                f'cache_items{{cache="odds"}} {len(odds_cache)}', response.text
+            )
+            self.assertIn('cache_misses_total{cache="odds"}', response.text)
+            self.assertIn(
+                'http_request_duration_seconds_count{method="POST",'
+                'handler="endpoint_odds",status="200"}',
+                response.text,
+            )
+
+    def test_post_odds_batch(self):
+        empires = [
+            {"countdown": 7, "bounty_hunters": []},
+            {
+                "countdown": 8,
+                "bounty_hunters": [
+                    {"planet": "Hoth", "day": 6},
+                    {"planet": "Hoth", "day": 7},
+                    {"planet": "Hoth", "day": 8},
+                ],
+            },
+            {"countdown": 10, "bounty_hunters": [{"planet": "Hoth", "day": 6}]},
+        ]
+        with TestClient(self.app) as client:
+            response = client.post("/api/odds/batch", data=json.dumps(empires))
+            data = response.json()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([0, 81, 100], [result.get("odd") for result in data])
+            for empire, result in zip(empires, data):
+                response = client.post("/api/odds", data=json.dumps(empire))
+                self.assertEqual(response.json(), result)
+
+    def test_post_odds_limits(self):
+        """
+        GIVEN a countdown above MAX_COUNTDOWN, then a solver timeout
+        WHEN POST /api/odds, /api/odds/batch and /api/sessions/<id>/odds
+        THEN returns 400, then 504 for the batch and the session
+        """
+        empire = {"countdown": 7, "bounty_hunters": []}
+        urls = ["/api/odds", "/api/odds/batch", "/api/sessions/limits/odds"]
+        with TestClient(self.app) as client:
+            with patch("app.app.max_countdown", 6):
+                for url in urls:
+                    data = [empire] if url.endswith("batch") else empire
+                    response = client.post(url, data=json.dumps(data))
+                    self.assertEqual(response.status_code, 400, url)
+
+            self.app.dependency_overrides[get_solver_pool] = lambda: SolverPool(
+                timeout=0
+            )
+            empire = {"countdown": 10_000, "bounty_hunters": []}
+            for url in urls[1:]:
+                data = [empire] if url.endswith("batch") else empire
+                response = client.post(url, data=json.dumps(data))
+                self.assertEqual(response.status_code, 504, url)
+
+    def test_post_session_odds(self):
+        empire = {
+            "countdown": 8,
+            "bounty_hunters": [
+                {"planet": "Hoth", "day": 6},
+                {"planet": "Hoth", "day": 7},
+            ],
+        }
+        with TestClient(self.app) as client:
+            response = client.post("/api/sessions/test/odds", data=json.dumps(empire))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(81, response.json().get("odd"))
+
+            empire["bounty_hunters"].pop()
+            response = client.post("/api/sessions/test/odds", data=json.dumps(empire))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(90, response.json().get("odd"))
@@ -0,0 +1,122 @@
+import io
+import json
+import tempfile
+import unittest
+from os import path, getcwd
+
+
+from app.batch import iter_batch_items, run_batch
+from app.lib import get_millenium_falcon_from_file
+from app.models import Empire, BountyHunter
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.millennium_falcon = get_millenium_falcon_from_file(
+            path.join(getcwd(), "tests", "fixture", "millennium-falcon.json")
+        )
+        self.tmp = tempfile.TemporaryDirectory()
+        self.hunted = Empire(
+            countdown=8,
+            bounty_hunters=[
+                BountyHunter(planet="Hoth", day=6),
+                BountyHunter(planet="Hoth", day=7),
+                BountyHunter(planet="Hoth", day=8),
+            ],
+        ).json()
+        self.safe = Empire(countdown=8, bounty_hunters=[]).json()
+        self.too_short = Empire(countdown=6, bounty_hunters=[]).json()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def write(self, name: str, data: str) -> str:
+        file_path = path.join(self.tmp.name, name)
+        with open(file_path, "w") as file:
+            file.write(data)
+        return file_path
+
+    def run_batch(self, source: str, **kwargs):
+        output = io.StringIO()
+        count = run_batch(
+            self.millennium_falcon, iter_batch_items(source), output, **kwargs
+        )
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(count, len(results))
+        return results
+
+    def test_batch_directory(self):
+        """
+        GIVEN a directory of Empire JSON files
+        WHEN run_batch
+        THEN writes the odd of every file, in the order of the file names
+        """
+        first = self.write("1.json", self.hunted)
+        second = self.write("2.json", self.safe)
+        third = self.write("3.json", self.too_short)
+        self.write("notes.txt", "not a scenario")
+
+        results = self.run_batch(self.tmp.name)
+        self.assertEqual(
+            [
+                {"source": first, "odd": 81},
+                {"source": second, "odd": 100},
+                {"source": third, "odd": 0},
+            ],
+            results,
+        )
+
+    def test_batch_jsonl(self):
+        """
+        GIVEN a JSONL file of Empire scenarios, matched by a glob
+        WHEN run_batch
+        THEN writes the odd of every line, sourced by its line number
+        """
+        file_path = self.write(
+            "empires.jsonl", "\n".join([self.hunted, "", self.safe]) + "\n"
+        )
+
+        results = self.run_batch(path.join(self.tmp.name, "*.jsonl"))
+        self.assertEqual(
+            [
+                {"source": f"{file_path}:1", "odd": 81},
+                {"source": f"{file_path}:3", "odd": 100},
+            ],
+            results,
+        )
+
+    def test_batch_invalid_scenario(self):
+        """
+        GIVEN a JSONL file with an invalid scenario
+        WHEN run_batch
+        THEN reports the error in its result and solves the other scenarios
+        """
+        file_path = self.write("empires.jsonl", '{"countdown": 8}\n' + self.safe)
+
+        results = self.run_batch(file_path)
+        self.assertEqual(2, len(results))
+        self.assertEqual(f"{file_path}:1", results[0]["source"])
+        self.assertIn("bounty_hunters", results[0]["error"])
+        self.assertEqual({"source": f"{file_path}:2", "odd": 100}, results[1])
+
+    def test_batch_in_workers(self):
+        """
+        GIVEN a JSONL file of Empire scenarios
+        WHEN run_batch with worker processes
+        THEN writes the same results as without workers, in the same order
+        unless the completion order is requested
+        """
+        file_path = self.write(
+            "empires.jsonl",
+            "\n".join([self.hunted, self.safe, self.too_short] * 20),
+        )
+
+        expected = self.run_batch(file_path)
+        self.assertEqual(60, len(expected))
+        self.assertEqual(expected, self.run_batch(file_path, jobs=2))
+        unordered = self.run_batch(file_path, jobs=2, ordered=False)
+        self.assertCountEqual(expected, unordered)
+
+
+if __name__ == "__main__":
+    unittest.main()
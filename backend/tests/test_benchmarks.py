@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+
+from benchmarks.generator import ScenarioParams, generate_scenario
+from benchmarks.run import check_examples, compare
+
+
+def read_scenario(directory: str):
+    files = []
+    for name in ("millennium-falcon.json", "empire.json"):
+        with open(os.path.join(directory, name)) as file:
+            files.append(file.read())
+    con = sqlite3.connect(os.path.join(directory, "universe.db"))
+    rows = con.execute("SELECT * FROM routes;").fetchall()
+    con.close()
+    return files, rows
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_generate_scenario(self):
+        """
+        GIVEN scenario params
+        WHEN generate_scenario twice with the same seed
+        THEN writes the same files, with the requested sizes
+        """
+        params = ScenarioParams(planets=20, density=2, countdown=30, hunters=15)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            first = os.path.join(tmp_dir, "first")
+            second = os.path.join(tmp_dir, "second")
+            generate_scenario(first, params)
+            generate_scenario(second, params)
+            files, rows = read_scenario(first)
+            self.assertEqual((files, rows), read_scenario(second))
+
+        self.assertEqual(40, len(rows))
+        self.assertIn('"countdown": 30', files[1])
+
+    def test_examples(self):
+        """
+        GIVEN the examples directory
+        WHEN check_examples
+        THEN every engine returns the expected answer
+        """
+        checks = check_examples()
+        self.assertEqual(4, len(checks))
+        for check in checks:
+            self.assertTrue(check["ok"], check)
+
+    def test_compare(self):
+        """
+        GIVEN a baseline and results
+        WHEN compare
+        THEN reports the timings slower by more than the ratio and the delta
+        """
+        baseline = {
+            "timings": {
+                "small/get_routes": {"median_ms": 1.0},
+                "countdown/give_me_the_odds": {"median_ms": 100.0},
+                "planets/give_me_the_odds": {"median_ms": 100.0},
+            }
+        }
+        results = {
+            "timings": {
+                "small/get_routes": {"median_ms": 3.0},
+                "countdown/give_me_the_odds": {"median_ms": 120.0},
+                "planets/give_me_the_odds": {"median_ms": 200.0},
+                "new/give_me_the_odds": {"median_ms": 200.0},
+            }
+        }
+        self.assertEqual(
+            ["planets/give_me_the_odds: 100.0ms -> 200.0ms"],
+            compare(baseline, results, max_regression=0.5, min_delta_ms=5),
+        )
@@ -0,0 +1,108 @@
+import random
+import unittest
+
+
+from app.models import BountyHunter, Route
+from app.lib import generate_bounty_hunters_index
+from app.graph import UniverseGraph
+from app.bnb import solve_branch_and_bound
+from app.solver import SolverStats, solve
+from test_engines import FIXTURE_ROUTES
+
+
+class TestBranchAndBound(unittest.TestCase):
+    def setUp(self) -> None:
+        self.routes = FIXTURE_ROUTES
+        self.graph = UniverseGraph.from_routes(self.routes)
+
+    def test_stops_on_optimal_plan(self):
+        """
+        GIVEN a route without bounty hunters and a long countdown
+        WHEN solve_branch_and_bound
+        THEN stops on the first plan, proven optimal, without exploring
+        the countdown
+        """
+        stats = SolverStats()
+        encounters, plan = solve_branch_and_bound(
+            start="Tatooine",
+            end="Endor",
+            countdown=1000,
+            autonomy=10,
+            graph=self.graph,
+            bounty_hunters_index=set(),
+            stats=stats,
+        )
+        self.assertEqual(0, encounters)
+        self.assertEqual(3, plan.route_len)
+        self.assertEqual(1, stats.plans_scored)
+        self.assertLess(stats.states_expanded, 10)
+
+    def test_bounded_branches(self):
+        """
+        GIVEN bounty hunters on the fastest route
+        WHEN solve_branch_and_bound
+        THEN the branches that cannot beat the best plan are cut and counted
+        """
+        hoth = self.graph.get_planet_id("Hoth")
+        stats = SolverStats()
+        encounters, plan = solve_branch_and_bound(
+            start="Tatooine",
+            end="Endor",
+            countdown=10,
+            autonomy=6,
+            graph=self.graph,
+            bounty_hunters_index={(hoth, 6), (hoth, 7), (hoth, 8)},
+            stats=stats,
+        )
+        self.assertEqual((0, 6), (encounters, plan.route_len))
+        self.assertGreater(stats.states_bounded, 0)
+
+    def test_soft_deadline(self):
+        """
+        GIVEN random universes and a soft deadline already reached
+        WHEN solve_branch_and_bound
+        THEN stops with the best plan found so far, and a bound on the
+        encounters that is never above the optimal ones
+        """
+        stopped = 0
+        for seed in range(20):
+            rng = random.Random(seed)
+            planets = [f"P{i}" for i in range(40)]
+            graph = UniverseGraph.from_routes(
+                [
+                    Route(
+                        origin=rng.choice(planets),
+                        destination=rng.choice(planets),
+                        travel_time=rng.randint(1, 3),
+                    )
+                    for _ in range(160)
+                ]
+            )
+            bounty_hunters = [
+                BountyHunter(planet=rng.choice(planets), day=rng.randint(0, 40))
+                for _ in range(800)
+            ]
+            bounty_hunters_index = generate_bounty_hunters_index(bounty_hunters, graph)
+            params = dict(
+                start="P0",
+                end="P1",
+                countdown=40,
+                autonomy=4,
+                graph=graph,
+                bounty_hunters_index=bounty_hunters_index,
+            )
+            expected_encounters, expected_plan = solve(**params)
+            stats = SolverStats()
+            encounters, plan = solve_branch_and_bound(
+                **params, stats=stats, soft_deadline=0
+            )
+            with self.subTest(seed=seed):
+                if stats.encounters_bound is None:
+                    self.assertEqual(expected_encounters, encounters)
+                    continue
+                stopped += 1
+                self.assertLessEqual(stats.encounters_bound, expected_encounters)
+                if plan is not None:
+                    self.assertGreaterEqual(encounters, expected_encounters)
+                    self.assertEqual(encounters, plan.encounters)
+        self.assertGreater(stopped, 0)
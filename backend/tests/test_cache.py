@@ -0,0 +1,79 @@
+import unittest
+import tempfile
+import time
+
+
+from app.cache import LRUCache, make_odds_key
+from app.models import MillenniumFalcon, Empire, BountyHunter
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self) -> None:
+        _, tmp = tempfile.mkstemp()
+        self.millennium_falcon = MillenniumFalcon(
+            autonomy=6,
+            departure="Tatooine",
+            arrival="Endor",
+            routes_db=tmp,
+        )
+
+    def test_make_odds_key_canonical(self):
+        """
+        GIVEN the same Empire with bounty hunters shuffled and duplicated
+        WHEN make_odds_key
+        THEN returns the same key
+        """
+        empire = Empire(
+            countdown=8,
+            bounty_hunters=[
+                BountyHunter(planet="Hoth", day=6),
+                BountyHunter(planet="Hoth", day=7),
+            ],
+        )
+        shuffled = Empire(
+            countdown=8,
+            bounty_hunters=[
+                BountyHunter(planet="Hoth", day=7),
+                BountyHunter(planet="Hoth", day=6),
+                BountyHunter(planet="Hoth", day=7),
+            ],
+        )
+        self.assertEqual(
+            make_odds_key(self.millennium_falcon, empire, 1),
+            make_odds_key(self.millennium_falcon, shuffled, 1),
+        )
+        self.assertNotEqual(
+            make_odds_key(self.millennium_falcon, empire, 1),
+            make_odds_key(self.millennium_falcon, empire, 2),
+        )
+
+    def test_lru_eviction(self):
+        """
+        GIVEN LRUCache full
+        WHEN set a new key
+        THEN the least recently used key is evicted
+        """
+        cache = LRUCache(size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(1, cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(3, cache.get("c"))
+        self.assertEqual(
+            {"size": 2, "hits": 3, "misses": 1, "evictions": 1}, cache.stats()
+        )
+
+    def test_ttl(self):
+        """
+        GIVEN LRUCache with a ttl
+        WHEN the ttl is elapsed
+        THEN the key is a miss
+        """
+        cache = LRUCache(size=2, ttl=0.01)
+        cache.set("a", 1)
+        self.assertEqual(1, cache.get("a"))
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(0, len(cache))
@@ -1,9 +1,30 @@
 import unittest
 import sqlite3
 import tempfile
+import threading
+from unittest import mock
 
 
-from app.database import SqliteDB
+from app.database import ConnectionPool, Database, SqliteDB, validate_routes_rows
+from app.models import Route
+
+
+class InMemoryDB(Database):
+    def __init__(self, routes):
+        super().__init__()
+        self.memory_routes = routes
+
+    def connect(self, path):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def get_version(self):
+        return 0
+
+    def read_routes(self):
+        return self.memory_routes
 
 
 class TestDatabase(unittest.TestCase):
@@ -43,3 +64,225 @@ class TestDatabase(unittest.TestCase):
             self.assertEqual(route.origin, data[0])
             self.assertEqual(route.destination, data[1])
             self.assertEqual(route.travel_time, data[2])
+
+    def test_get_universe_graph_cached(self):
+        """
+        GIVEN SqliteDB instance with routes data
+        WHEN get_universe_graph is called twice without changes
+        THEN returns the same compiled graph
+        """
+        db = SqliteDB()
+        db.connect(self.sqlite_path)
+        version = db.get_version()
+        graph = db.get_universe_graph()
+        self.assertIs(graph, db.get_universe_graph())
+        self.assertEqual(version, db.get_version())
+
+    def test_get_universe_graph_reloaded(self):
+        """
+        GIVEN SqliteDB instance with cached routes
+        WHEN the routes table is updated by another connection
+        THEN routes and compiled graph are reloaded
+        """
+        db = SqliteDB()
+        db.connect(self.sqlite_path)
+        graph = db.get_universe_graph()
+        self.assertIsNone(graph.get_planet_id("Alderaan"))
+
+        con = sqlite3.connect(self.sqlite_path)
+        con.execute("INSERT INTO routes VALUES('Alderaan', 'Hoth', 2)")
+        con.commit()
+        con.close()
+
+        self.assertIsNot(graph, db.get_universe_graph())
+        self.assertIsNotNone(db.get_universe_graph().get_planet_id("Alderaan"))
+        self.assertEqual(len(self.data) + 1, len(db.get_routes()))
+
+    def test_reconnect(self):
+        """
+        GIVEN SqliteDB instance with the universe loaded and its connections
+        released
+        WHEN reconnect
+        THEN keeps the universe while the database is unchanged, and reloads
+        it after a change
+        """
+        db = SqliteDB()
+        db.connect(self.sqlite_path)
+        graph = db.get_universe_graph()
+        db.release_connections()
+
+        db.reconnect()
+        self.assertIs(graph, db.get_universe_graph())
+        db.release_connections()
+
+        con = sqlite3.connect(self.sqlite_path)
+        con.execute("INSERT INTO routes VALUES('Alderaan', 'Hoth', 2)")
+        con.commit()
+        con.close()
+
+        db.reconnect()
+        self.assertIsNotNone(db.get_universe_graph().get_planet_id("Alderaan"))
+
+    def test_read_routes_by_chunks(self):
+        """
+        GIVEN SqliteDB instance with routes data
+        WHEN routes and graph are read by chunks smaller than the table
+        THEN every row is read
+        """
+        con = sqlite3.connect(self.sqlite_path)
+        con.execute("INSERT INTO routes VALUES('Alderaan', 'Hoth', 2)")
+        con.commit()
+        con.close()
+
+        db = SqliteDB()
+        db.connect(self.sqlite_path)
+        with mock.patch("app.database.ROUTES_CHUNK_SIZE", 2):
+            routes = db.get_routes()
+            graph = db.get_universe_graph()
+
+        self.assertEqual(len(self.data) + 1, len(routes))
+        self.assertEqual(2, routes[-1].travel_time)
+        self.assertEqual(len(self.data) + 1, graph.routes_count)
+        alderaan = graph.get_planet_id("Alderaan")
+        self.assertEqual(
+            [(graph.get_planet_id("Hoth"), 2)], list(graph.get_outgoing(alderaan))
+        )
+
+    def test_get_routes_page(self):
+        """
+        GIVEN SqliteDB instance with routes data
+        WHEN get_routes_page with a limit, from the cursor of every page
+        THEN returns the routes page by page, with or without filters, like
+        the in memory pagination of Database
+        """
+        db = SqliteDB()
+        db.connect(self.sqlite_path)
+        memory = InMemoryDB(
+            [Route(origin=o, destination=d, travel_time=t) for o, d, t in self.data]
+        )
+        for source in (db, memory):
+            with self.subTest(source=type(source).__name__):
+                rows, cursor = source.get_routes_page(limit=2)
+                self.assertEqual(self.data[:2], rows)
+                rows, cursor = source.get_routes_page(after=cursor, limit=2)
+                self.assertEqual(self.data[2:4], rows)
+                rows, cursor = source.get_routes_page(after=cursor, limit=2)
+                self.assertEqual((self.data[4:], None), (rows, cursor))
+
+                rows, cursor = source.get_routes_page(origin="Dagobah", limit=1)
+                self.assertEqual([("Dagobah", "Hoth", 1)], rows)
+                self.assertEqual(
+                    ([("Dagobah", "Endor", 1)], None),
+                    source.get_routes_page(after=cursor, origin="Dagobah"),
+                )
+                self.assertEqual(
+                    ([("Tatoine", "Hoth", 4), ("Dagobah", "Hoth", 1)], None),
+                    source.get_routes_page(destination="Hoth"),
+                )
+
+    def test_validate_routes_rows(self):
+        """
+        GIVEN chunks of routes rows
+        WHEN validate_routes_rows
+        THEN rows of the right types are returned as is, others are coerced
+        or rejected like a Route
+        """
+        rows = [("Tatoine", "Hoth", 4), ("Hoth", "Endor", 1)]
+        self.assertIs(rows, validate_routes_rows(rows))
+        self.assertEqual(
+            [("Tatoine", "Hoth", 4), ("Hoth", "Endor", 1)],
+            validate_routes_rows([("Tatoine", "Hoth", "4"), ("Hoth", "Endor", 1)]),
+        )
+        with self.assertRaises(ValueError):
+            validate_routes_rows([("Tatoine", "Hoth", "four")])
+
+    def test_connection_pool(self):
+        """
+        GIVEN a pool of 2 connections
+        WHEN threads acquire connections at the same time
+        THEN each thread reads on its own read only connection, and a third
+        one waits for an idle connection
+        """
+        pool = ConnectionPool(self.sqlite_path, size=2, timeout=0.1)
+        barrier = threading.Barrier(2)
+        used = []
+
+        def read():
+            with pool.acquire() as con:
+                used.append(con)
+                barrier.wait(timeout=5)
+                con.execute("SELECT COUNT(*) FROM routes;").fetchone()
+                barrier.wait(timeout=5)
+
+        threads = [threading.Thread(target=read) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertIsNot(used[0], used[1])
+        self.assertEqual(2, pool.opened)
+
+        with pool.acquire() as first, pool.acquire() as second:
+            self.assertIsNot(first, second)
+            with self.assertRaises(TimeoutError):
+                pool.get()
+            with self.assertRaises(sqlite3.OperationalError):
+                first.execute("INSERT INTO routes VALUES('Alderaan', 'Hoth', 2)")
+
+        pool.close()
+        self.assertEqual(0, pool.opened)
+        with self.assertRaises(RuntimeError):
+            pool.get()
+
+    def test_get_routes_concurrently(self):
+        """
+        GIVEN SqliteDB instance with a pool of connections
+        WHEN threads check the version and read the routes at the same time
+        THEN they all read the same routes and version
+        """
+        db = SqliteDB(snapshot=False, pool_size=2)
+        db.connect(self.sqlite_path)
+        results = []
+
+        def read():
+            with db.get_cur() as cur:
+                count = cur.execute("SELECT COUNT(*) FROM routes;").fetchone()
+            results.append((db.get_universe_version(), count, len(db.get_routes())))
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(8, len(results))
+        self.assertEqual(1, len(set(results)))
+        self.assertLessEqual(db.pool.opened, 2)
+        db.disconnect()
+
+
+class TestDatabaseAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_get_routes_async(self):
+        """
+        GIVEN SqliteDB instance with routes data
+        WHEN the async interface is awaited
+        THEN returns the same routes and graph as the sync one
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            sqlite_path = f"{directory}/universe.db"
+            con = sqlite3.connect(sqlite_path)
+            con.execute(
+                "CREATE TABLE routes (origin TEXT, destination TEXT, travel_time INT)"
+            )
+            con.execute("INSERT INTO routes VALUES('Tatoine', 'Hoth', 4)")
+            con.commit()
+            con.close()
+
+            db = SqliteDB(snapshot=False)
+            db.connect(sqlite_path)
+            routes = await db.get_routes_async()
+            graph = await db.get_universe_graph_async()
+            version = await db.get_universe_version_async()
+            self.assertEqual(db.get_routes(), routes)
+            self.assertIs(db.get_universe_graph(), graph)
+            self.assertEqual(db.get_universe_version(), version)
+            db.disconnect()
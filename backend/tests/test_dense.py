@@ -0,0 +1,73 @@
+import tracemalloc
+import unittest
+
+
+from app import dense
+from app.models import Route
+from app.graph import UniverseGraph
+from app.dense import solve_dense
+from app.solver import SolverStats
+from test_engines import FIXTURE_ROUTES
+
+
+@unittest.skipUnless(dense.is_available(), "numpy is not installed")
+class TestDense(unittest.TestCase):
+    def setUp(self) -> None:
+        self.routes = FIXTURE_ROUTES
+        self.graph = UniverseGraph.from_routes(self.routes)
+
+    def test_stats(self):
+        """
+        GIVEN bounty hunters on the fastest route
+        WHEN solve_dense
+        THEN counts the states reached and the late ones pruned
+        """
+        hoth = self.graph.get_planet_id("Hoth")
+        stats = SolverStats()
+        encounters, plan = solve_dense(
+            start="Tatooine",
+            end="Endor",
+            countdown=10,
+            autonomy=6,
+            graph=self.graph,
+            bounty_hunters_index={(hoth, 6), (hoth, 7), (hoth, 8)},
+            stats=stats,
+        )
+        self.assertEqual((0, 6), (encounters, plan.route_len))
+        self.assertGreater(stats.states_expanded, 0)
+        self.assertGreater(stats.states_pruned, 0)
+        self.assertGreater(stats.plans_scored, 0)
+
+    def test_memory(self):
+        """
+        GIVEN a universe of a thousand planets the departure cannot reach
+        WHEN solve_dense with a countdown of 1000 days
+        THEN the peak memory stays far below the scores of every day, planet
+        and fuel
+        """
+        graph = UniverseGraph.from_routes(
+            FIXTURE_ROUTES
+            + [
+                Route(origin=f"P{i}", destination=f"P{i + 1}", travel_time=1)
+                for i in range(1000)
+            ]
+        )
+        tracemalloc.start()
+        try:
+            encounters, plan = solve_dense(
+                start="Tatooine",
+                end="Endor",
+                countdown=1000,
+                autonomy=6,
+                graph=graph,
+                bounty_hunters_index=set(),
+            )
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual((0, 4), (encounters, plan.route_len))
+        self.assertLess(peak, 1001 * len(graph) * 7 * 4 // 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,305 @@
+import random
+import unittest
+
+
+from app import dense
+from app.models import BountyHunter, Engine, Route
+from app.lib import ENGINES, generate_bounty_hunters_index, format_plan
+from app.graph import UniverseGraph
+from app.pareto import solve_pareto
+from app.solver import StateSpace, solve
+
+FIXTURE_ROUTES = [
+    Route(origin="Tatooine", destination="Dagobah", travel_time=6),
+    Route(origin="Dagobah", destination="Endor", travel_time=4),
+    Route(origin="Dagobah", destination="Hoth", travel_time=1),
+    Route(origin="Hoth", destination="Endor", travel_time=1),
+    Route(origin="Tatooine", destination="Hoth", travel_time=6),
+]
+
+
+def get_planet_id(graph: UniverseGraph, planet: str) -> int:
+    planet_id = graph.get_planet_id(planet)
+    assert planet_id is not None, planet
+    return planet_id
+
+
+def get_engines():
+    # (engine, solver) of ENGINES, NumPy is optional
+    return [
+        (engine, solver)
+        for engine, solver in ENGINES.items()
+        if engine != Engine.numpy or dense.is_available()
+    ]
+
+
+def generate_universe(rng: random.Random, planets_count: int, routes_count: int):
+    # Random routes, with loops and parallel routes: some pairs of planets
+    # are linked twice, with the same or another travel time
+    planets = [f"P{i}" for i in range(planets_count)]
+    routes = [
+        Route(
+            origin=rng.choice(planets),
+            destination=rng.choice(planets),
+            travel_time=rng.randint(1, 5),
+        )
+        for _ in range(routes_count)
+    ]
+    for route in rng.sample(routes, len(routes) // 3):
+        routes.append(
+            Route(
+                origin=route.origin,
+                destination=route.destination,
+                travel_time=rng.choice([route.travel_time, rng.randint(1, 5)]),
+            )
+        )
+    return planets, UniverseGraph.from_routes(routes)
+
+
+def generate_scenarios():
+    """
+    (name, params) of the searches every engine must agree on: the fixture
+    universe, random universes, long countdowns where the MillenniumFalcon
+    waits for the bounty hunters to leave, and universes where refueling and
+    waiting give plans with the same encounters and nodes.
+    """
+    rng = random.Random(0)
+    graph = UniverseGraph.from_routes(FIXTURE_ROUTES)
+    planets = ["Tatooine", "Dagobah", "Hoth", "Endor"]
+    for countdown in range(0, 20):
+        bounty_hunters = [
+            BountyHunter(planet=rng.choice(planets), day=rng.randint(0, countdown))
+            for _ in range(rng.randint(0, 8))
+        ]
+        for autonomy in (6, 7, 10):
+            yield (
+                f"fixture/{countdown}/{autonomy}",
+                dict(
+                    start="Tatooine",
+                    end="Endor",
+                    countdown=countdown,
+                    autonomy=autonomy,
+                    graph=graph,
+                    bounty_hunters_index=generate_bounty_hunters_index(
+                        bounty_hunters, graph
+                    ),
+                ),
+            )
+
+    for seed in range(150):
+        planets, graph = generate_universe(rng, rng.randint(2, 7), rng.randint(1, 12))
+        countdown = rng.randint(0, 25)
+        bounty_hunters = [
+            BountyHunter(planet=rng.choice(planets), day=rng.randint(0, countdown))
+            for _ in range(rng.randint(0, 15))
+        ]
+        yield (
+            f"random/{seed}",
+            dict(
+                start="P0",
+                end=rng.choice(planets),
+                countdown=countdown,
+                autonomy=rng.randint(1, 6),
+                graph=graph,
+                bounty_hunters_index=generate_bounty_hunters_index(
+                    bounty_hunters, graph
+                ),
+            ),
+        )
+
+    for seed in range(20):
+        # Bounty hunters on every planet but the departure for most of a long
+        # countdown: the best plans wait dozens of days
+        planets, graph = generate_universe(rng, 5, 10)
+        countdown = rng.randint(60, 120)
+        blocked = rng.randint(countdown // 2, countdown - 10)
+        bounty_hunters = [
+            BountyHunter(planet=planet, day=day)
+            for planet in planets[1:]
+            for day in range(blocked)
+            if rng.random() < 0.8
+        ]
+        yield (
+            f"long_wait/{seed}",
+            dict(
+                start="P0",
+                end=planets[-1],
+                countdown=countdown,
+                autonomy=rng.randint(2, 6),
+                graph=graph,
+                bounty_hunters_index=generate_bounty_hunters_index(
+                    bounty_hunters, graph
+                ),
+            ),
+        )
+
+    for seed in range(20):
+        # Routes as long as the autonomy: every jump empties the tank, so
+        # refueling and waiting tie on encounters and nodes
+        autonomy = rng.randint(1, 3)
+        planets = [f"P{i}" for i in range(4)]
+        routes = [
+            Route(origin=origin, destination=destination, travel_time=autonomy)
+            for origin in planets
+            for destination in planets
+            if origin != destination and rng.random() < 0.6
+        ]
+        graph = UniverseGraph.from_routes(routes)
+        countdown = rng.randint(autonomy, 12)
+        bounty_hunters = [
+            BountyHunter(planet=rng.choice(planets), day=rng.randint(0, countdown))
+            for _ in range(rng.randint(0, 3))
+        ]
+        yield (
+            f"ties/{seed}",
+            dict(
+                start="P0",
+                end="P3",
+                countdown=countdown,
+                autonomy=autonomy,
+                graph=graph,
+                bounty_hunters_index=generate_bounty_hunters_index(
+                    bounty_hunters, graph
+                ),
+            ),
+        )
+
+
+class TestEngines(unittest.TestCase):
+    def assert_valid_plan(self, params, encounters: int, plan):
+        # The plan follows the routes and the fuel of the MillenniumFalcon,
+        # from the departure on day 0 to the arrival, with `encounters`
+        graph: UniverseGraph = params["graph"]
+        autonomy, countdown = params["autonomy"], params["countdown"]
+        nodes = format_plan(plan, autonomy)
+        self.assertEqual(params["start"], nodes[0].planet)
+        self.assertEqual(0, nodes[0].day)
+        self.assertEqual(params["end"], nodes[-1].planet)
+        self.assertLessEqual(nodes[-1].day, countdown)
+        self.assertEqual(plan.route_len, len(nodes))
+
+        end_id = get_planet_id(graph, params["end"])
+        if nodes[-1].day < countdown:
+            self.assertTrue(graph.has_incoming(end_id))
+
+        fuel = autonomy
+        for node, successor in zip(nodes, nodes[1:]):
+            planet_id = get_planet_id(graph, node.planet)
+            self.assertNotEqual(end_id, planet_id)
+            days = successor.day - node.day
+            if node.planet == successor.planet and days == 1:
+                if graph.has_incoming(planet_id):
+                    fuel = autonomy
+                    continue
+            destination_id = get_planet_id(graph, successor.planet)
+            self.assertIn((destination_id, days), list(graph.get_outgoing(planet_id)))
+            fuel -= days
+            self.assertGreaterEqual(fuel, 0)
+
+        index = params["bounty_hunters_index"]
+        hunted = [(graph.get_planet_id(x.planet), x.day) in index for x in nodes]
+        self.assertEqual(hunted, [x.hunted for x in nodes])
+        self.assertEqual(encounters, sum(hunted))
+
+    def test_same_as_solve(self):
+        """
+        GIVEN fixture, random, long wait and tie scenarios
+        WHEN every engine of ENGINES
+        THEN returns the same encounters and route_len as solve, and a valid
+        plan with those encounters
+        """
+        engines = get_engines()
+        for name, params in generate_scenarios():
+            expected_encounters, expected_plan = solve(**params)
+            for engine, solver in engines:
+                with self.subTest(scenario=name, engine=engine.value):
+                    encounters, plan = solver(**params)
+                    if expected_plan is None:
+                        self.assertIsNone(plan)
+                        continue
+                    self.assertEqual(
+                        (expected_encounters, expected_plan.route_len),
+                        (encounters, plan.route_len),
+                    )
+                    self.assert_valid_plan(params, encounters, plan)
+
+    def test_pareto_same_as_solve(self):
+        """
+        GIVEN fixture, random, long wait and tie scenarios
+        WHEN solve_pareto
+        THEN the best plan arriving by a day has the encounters solve finds
+        with that day as countdown, and every plan is valid
+        """
+        for name, params in generate_scenarios():
+            frontier = solve_pareto(**params)
+            graph = params["graph"]
+            # Without incoming routes the arrival cannot be waited on: only
+            # the plans arriving on the last day are kept
+            countdowns = [params["countdown"]]
+            end_id = graph.get_planet_id(params["end"])
+            if end_id is not None and graph.has_incoming(end_id):
+                countdowns = list(range(params["countdown"] + 1))
+            for countdown in countdowns:
+                expected_encounters, expected_plan = solve(
+                    **{**params, "countdown": countdown}
+                )
+                arrived = [x[0] for x in frontier if x[1] <= countdown]
+                with self.subTest(scenario=name, countdown=countdown):
+                    if expected_plan is None:
+                        self.assertEqual([], arrived)
+                        continue
+                    self.assertEqual(expected_encounters, min(arrived))
+            for encounters, _, _, plan in frontier:
+                with self.subTest(scenario=name):
+                    self.assert_valid_plan(params, encounters, plan)
+
+    def test_departure_is_arrival(self):
+        """
+        GIVEN a departure that is the arrival, with and without routes
+        WHEN every engine, solve_pareto and StateSpace
+        THEN returns a one node plan on day 0 when the plan can end then, like
+        give_me_the_odds always did, and no plan otherwise
+        """
+        leaving = [Route(origin="Alderaan", destination="Hoth", travel_time=1)]
+        incoming = [Route(origin="Hoth", destination="Alderaan", travel_time=1)]
+        PARAMETERS = [
+            # (routes, countdown, has a plan)
+            ([], 0, True),
+            ([], 5, False),
+            (leaving, 0, True),
+            (leaving, 5, False),
+            (incoming, 0, True),
+            (incoming, 5, True),
+        ]
+        for routes, countdown, has_plan in PARAMETERS:
+            params = dict(
+                start="Alderaan",
+                end="Alderaan",
+                countdown=countdown,
+                autonomy=6,
+                graph=UniverseGraph.from_routes(routes),
+                bounty_hunters_index=set(),
+            )
+            results = [
+                (engine.value, solver(**params)) for engine, solver in get_engines()
+            ]
+            state_space = StateSpace(
+                **{k: v for k, v in params.items() if k != "bounty_hunters_index"}
+            )
+            results.append(("state_space", state_space.solve(set())))
+            frontier = solve_pareto(**params)
+            results.append(("pareto", (0, frontier[0][3]) if frontier else (0, None)))
+            for name, (encounters, plan) in results:
+                with self.subTest(routes=routes, countdown=countdown, engine=name):
+                    if not has_plan:
+                        self.assertIsNone(plan)
+                        continue
+                    self.assertEqual(0, encounters)
+                    self.assertEqual(
+                        [("Alderaan", 0, 0)],
+                        [(x.planet, x.day, x.fuel) for x in format_plan(plan, 6)],
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+from os import path, getcwd
+
+
+from app.database import SqliteDB
+from app.executor import SolverPool
+from app.lib import get_millenium_falcon_from_file
+from app.models import Empire, BountyHunter, Engine
+from app.solver import SolverTimeout
+
+
+class TestExecutor(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.millennium_falcon = get_millenium_falcon_from_file(
+            path.join(getcwd(), "tests", "fixture", "millennium-falcon.json")
+        )
+        self.db = SqliteDB()
+        self.db.connect(self.millennium_falcon.routes_db)
+        self.empire = Empire(
+            countdown=8,
+            bounty_hunters=[
+                BountyHunter(planet="Hoth", day=6),
+                BountyHunter(planet="Hoth", day=7),
+                BountyHunter(planet="Hoth", day=8),
+            ],
+        )
+
+    async def asyncTearDown(self) -> None:
+        self.db.disconnect()
+
+    async def test_solve_in_thread(self):
+        """
+        GIVEN SolverPool without workers
+        WHEN solve
+        THEN returns the odd and the formatted plan
+        """
+        pool = SolverPool(workers=0)
+        pool.start(self.millennium_falcon)
+        odd, plan = await pool.solve(self.millennium_falcon, self.empire, self.db)
+        self.assertEqual(81, odd)
+        self.assertEqual(4, len(plan))
+
+    async def test_solve_in_workers(self):
+        """
+        GIVEN SolverPool with worker processes
+        WHEN solve
+        THEN returns the same odd and plan as without workers
+        """
+        pool = SolverPool(workers=2)
+        pool.start(self.millennium_falcon)
+        try:
+            odd, plan = await pool.solve(self.millennium_falcon, self.empire, self.db)
+        finally:
+            pool.shutdown()
+        expected = await SolverPool().solve(
+            self.millennium_falcon, self.empire, self.db
+        )
+        self.assertEqual(expected, (odd, plan))
+
+    async def test_solve_pareto_in_workers(self):
+        """
+        GIVEN SolverPool with worker processes
+        WHEN solve_pareto
+        THEN returns the same frontier as without workers
+        """
+        pool = SolverPool(workers=1)
+        pool.start(self.millennium_falcon)
+        try:
+            frontier = await pool.solve_pareto(
+                self.millennium_falcon, self.empire, self.db
+            )
+        finally:
+            pool.shutdown()
+        expected = await SolverPool().solve_pareto(
+            self.millennium_falcon, self.empire, self.db
+        )
+        self.assertEqual(expected, frontier)
+        self.assertEqual([(81, 8, 1)], [x[:3] for x in frontier])
+
+    async def test_solve_batch_in_workers(self):
+        """
+        GIVEN SolverPool with worker processes
+        WHEN solve_batch
+        THEN returns the same odds and plans as solve, in the order of the Empires
+        """
+        empires = [self.empire, Empire(countdown=10, bounty_hunters=[])]
+        pool = SolverPool(workers=1)
+        pool.start(self.millennium_falcon)
+        try:
+            results = await pool.solve_batch(self.millennium_falcon, empires, self.db)
+        finally:
+            pool.shutdown()
+        expected = [
+            await SolverPool().solve(self.millennium_falcon, empire, self.db)
+            for empire in empires
+        ]
+        self.assertEqual(expected, results)
+
+    async def test_solve_timeout(self):
+        """
+        GIVEN SolverPool with a timeout
+        WHEN the search runs past the timeout
+        THEN SolverTimeout is raised
+        """
+        pool = SolverPool(workers=0, timeout=0)
+        with self.assertRaises(SolverTimeout):
+            # The dynamic programming walks every day of the countdown
+            await pool.solve(
+                self.millennium_falcon,
+                Empire(countdown=10_000, bounty_hunters=[]),
+                self.db,
+                Engine.dp,
+            )
+
+    async def test_solve_batch_timeout(self):
+        """
+        GIVEN SolverPool with a timeout
+        WHEN the batch runs past the timeout
+        THEN SolverTimeout is raised
+        """
+        pool = SolverPool(workers=0, timeout=0)
+        with self.assertRaises(SolverTimeout):
+            await pool.solve_batch(
+                self.millennium_falcon,
+                [self.empire, Empire(countdown=10_000, bounty_hunters=[])],
+                self.db,
+            )
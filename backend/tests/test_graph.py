@@ -0,0 +1,139 @@
+import unittest
+from unittest import mock
+
+
+from app.models import Route
+from app.graph import UNREACHABLE, UniverseGraph, UniverseGraphBuilder
+
+
+class TestGraph(unittest.TestCase):
+    def setUp(self) -> None:
+        self.routes = [
+            Route(origin="Tatoine", destination="Dagobah", travel_time=6),
+            Route(origin="Tatoine", destination="Hoth", travel_time=4),
+            Route(origin="Dagobah", destination="Hoth", travel_time=1),
+            Route(origin="Hoth", destination="Endor", travel_time=1),
+            Route(origin="Dagobah", destination="Endor", travel_time=1),
+        ]
+        self.graph = UniverseGraph.from_routes(self.routes)
+
+    def test_planet_ids(self):
+        """
+        GIVEN routes
+        WHEN UniverseGraph.from_routes
+        THEN every planet is interned to an integer id
+        """
+        self.assertEqual(4, len(self.graph))
+        for planet_id, planet in enumerate(self.graph.planets):
+            self.assertEqual(planet_id, self.graph.get_planet_id(planet))
+        self.assertIsNone(self.graph.get_planet_id("Alderaan"))
+
+    def test_adjacency(self):
+        """
+        GIVEN UniverseGraph
+        WHEN get_outgoing and get_incoming
+        THEN returns every route in both directions
+        """
+        planets = self.graph.planets
+        outgoing = {
+            (planets[origin], planets[destination], travel_time)
+            for origin in range(len(self.graph))
+            for destination, travel_time in self.graph.get_outgoing(origin)
+        }
+        incoming = {
+            (planets[origin], planets[destination], travel_time)
+            for destination in range(len(self.graph))
+            for origin, travel_time in self.graph.get_incoming(destination)
+        }
+        expected = {(r.origin, r.destination, r.travel_time) for r in self.routes}
+        self.assertEqual(expected, outgoing)
+        self.assertEqual(expected, incoming)
+
+    def test_has_incoming(self):
+        """
+        GIVEN UniverseGraph
+        WHEN has_incoming
+        THEN returns if the planet is the destination of a route
+        """
+        self.assertFalse(self.graph.has_incoming(self.graph.planet_ids["Tatoine"]))
+        self.assertTrue(self.graph.has_incoming(self.graph.planet_ids["Endor"]))
+
+    def test_parallel_routes_collapsed(self):
+        """
+        GIVEN duplicated routes and parallel routes with other travel times
+        WHEN UniverseGraph.from_routes
+        THEN duplicates are stored once, other travel times are kept
+        """
+        routes = self.routes + [
+            Route(origin="Tatoine", destination="Hoth", travel_time=4),
+            Route(origin="Tatoine", destination="Hoth", travel_time=5),
+        ]
+        graph = UniverseGraph.from_routes(routes)
+        tatoine = graph.get_planet_id("Tatoine")
+        hoth = graph.get_planet_id("Hoth")
+        self.assertEqual(len(self.routes) + 1, graph.routes_count)
+        self.assertEqual(
+            [4, 5],
+            sorted(t for planet, t in graph.get_outgoing(tatoine) if planet == hoth),
+        )
+        self.assertEqual(
+            [4, 5],
+            sorted(t for planet, t in graph.get_incoming(hoth) if planet == tatoine),
+        )
+
+    def test_builder_collapses_chunks(self):
+        """
+        GIVEN chunks of rows repeating the same routes
+        WHEN UniverseGraphBuilder.add_rows
+        THEN the duplicates are dropped as the rows double, and the graph is
+        the one built from the routes at once
+        """
+        rows = [
+            (route.origin, route.destination, route.travel_time)
+            for route in self.routes
+        ]
+        with mock.patch("app.graph.COLLAPSE_MIN_ROWS", 4):
+            builder = UniverseGraphBuilder()
+            for _ in range(10):
+                builder.add_rows(rows)
+                self.assertEqual(len(rows), len(builder.sources))
+            graph = builder.build()
+        self.assertEqual(self.graph.planets, graph.planets)
+        self.assertEqual(self.graph.outgoing, graph.outgoing)
+        self.assertEqual(self.graph.incoming, graph.incoming)
+
+    def test_get_travel_times(self):
+        """
+        GIVEN UniverseGraph
+        WHEN get_travel_times from a planet, and to a planet
+        THEN returns the shortest travel times, with routes up to the maximum
+        travel time and without leaving the stop planet
+        """
+        ids = self.graph.planet_ids
+        tatoine, dagobah, hoth, endor = (
+            ids["Tatoine"],
+            ids["Dagobah"],
+            ids["Hoth"],
+            ids["Endor"],
+        )
+
+        from_tatoine = self.graph.get_travel_times(tatoine, 6)
+        self.assertEqual(
+            [0, 6, 4, 5], [from_tatoine[i] for i in (tatoine, dagobah, hoth, endor)]
+        )
+        self.assertIs(from_tatoine, self.graph.get_travel_times(tatoine, 6))
+
+        short_routes = self.graph.get_travel_times(tatoine, 4)
+        self.assertEqual(UNREACHABLE, short_routes[dagobah])
+        stopped = self.graph.get_travel_times(tatoine, 6, stop_id=hoth)
+        self.assertEqual(7, stopped[endor])
+
+        hops = self.graph.get_travel_times(tatoine, 6, hops=True)
+        self.assertEqual(
+            [0, 1, 1, 2], [hops[i] for i in (tatoine, dagobah, hoth, endor)]
+        )
+
+        to_endor = self.graph.get_travel_times(endor, 6, reverse=True)
+        self.assertEqual(
+            [5, 1, 1, 0], [to_endor[i] for i in (tatoine, dagobah, hoth, endor)]
+        )
@@ -0,0 +1,129 @@
+import gzip
+import io
+import json
+import pickle
+import unittest
+import zipfile
+from pydantic.error_wrappers import ValidationError
+
+
+from app.ingest import decompress, parse_empire
+from app.lib import get_empire_from_file
+from app.models import Empire
+
+
+class TestIngest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.data = {
+            "countdown": 10,
+            "bounty_hunters": [
+                {"planet": "Hoth", "day": 6},
+                {"planet": "Hoth", "day": 7},
+                {"planet": "Hoth", "day": 6},
+                {"planet": "Hoth", "day": 8},
+            ],
+        }
+        self.raw = json.dumps(self.data).encode()
+
+    def test_parse_empire(self):
+        """
+        GIVEN Empire JSON with a duplicate bounty hunter
+        WHEN parse_empire
+        THEN returns the Empire of Empire.parse_raw, without the duplicate
+        """
+        bounty_hunters = self.data["bounty_hunters"]
+        expected = Empire.parse_obj(
+            {**self.data, "bounty_hunters": bounty_hunters[:2] + bounty_hunters[3:]}
+        )
+
+        empire = parse_empire(self.raw)
+        self.assertEqual(expected, empire)
+        self.assertEqual(expected.json(), empire.json())
+        self.assertEqual(expected, pickle.loads(pickle.dumps(empire)))
+        self.assertEqual(expected, parse_empire(self.raw.decode()))
+
+    def test_parse_empire_assignment(self):
+        """
+        GIVEN an Empire from parse_empire
+        WHEN a field of one of its bounty hunters is assigned
+        THEN only that bounty hunter changes, and keeps every field set
+        """
+        empire = parse_empire(self.raw)
+        first, second = empire.bounty_hunters[:2]
+        first.day = 9
+        self.assertEqual(9, first.day)
+        self.assertEqual(7, second.day)
+        self.assertEqual({"planet", "day"}, first.__fields_set__)
+        self.assertIsNot(first.__fields_set__, second.__fields_set__)
+
+    def test_parse_empire_coerced(self):
+        """
+        GIVEN Empire JSON with values pydantic coerces
+        WHEN parse_empire
+        THEN returns the coerced values, without the duplicates
+        """
+        raw = json.dumps(
+            {
+                "countdown": "10",
+                "bounty_hunters": [
+                    {"planet": "Hoth", "day": "6"},
+                    {"planet": "Hoth", "day": 6.0},
+                ],
+            }
+        )
+        empire = parse_empire(raw)
+        self.assertEqual(10, empire.countdown)
+        self.assertEqual(
+            [("Hoth", 6)], [(x.planet, x.day) for x in empire.bounty_hunters]
+        )
+
+    def test_parse_empire_invalid(self):
+        """
+        GIVEN invalid Empire data
+        WHEN parse_empire
+        THEN raises ValidationError
+        """
+        PARAMETERS = [
+            b"{",
+            b"[]",
+            b'{"countdown": 10}',
+            b'{"countdown": 10, "bounty_hunters": [{"planet": "Hoth"}]}',
+            b'{"countdown": 10, "bounty_hunters": [{"planet": "Hoth", "day": "x"}]}',
+            b"\x1f\x8bnot gzip",
+            b"PK\x03\x04not zip",
+        ]
+        for raw in PARAMETERS:
+            with self.subTest(raw=raw):
+                with self.assertRaises(ValidationError):
+                    parse_empire(raw)
+
+    def test_decompress(self):
+        """
+        GIVEN gzip, zip and plain Empire JSON
+        WHEN decompress
+        THEN returns the JSON, or raises ValueError above the maximum size
+        """
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as file:
+            file.writestr("empire.json", self.raw)
+
+        for data in (self.raw, gzip.compress(self.raw), archive.getvalue()):
+            with self.subTest(data=data[:4]):
+                self.assertEqual(self.raw, decompress(data))
+                with self.assertRaises(ValueError):
+                    decompress(data, max_size=len(self.raw) - 1)
+
+    def test_get_empire_from_file(self):
+        """
+        GIVEN the Empire of example4, as JSON and zip
+        WHEN get_empire_from_file
+        THEN returns the same Empire
+        """
+        self.assertEqual(
+            get_empire_from_file("examples/example4/empire.json"),
+            get_empire_from_file("examples/example4/empire.json.zip"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
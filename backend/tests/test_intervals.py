@@ -0,0 +1,61 @@
+import unittest
+
+
+from app.models import BountyHunter, Route
+from app.lib import generate_bounty_hunters_index, format_plan
+from app.graph import UniverseGraph
+from app.intervals import HuntersCalendar, solve_intervals
+from test_engines import FIXTURE_ROUTES
+
+
+class TestIntervals(unittest.TestCase):
+    def setUp(self) -> None:
+        self.routes = FIXTURE_ROUTES
+        self.graph = UniverseGraph.from_routes(self.routes)
+
+    def test_intervals_starts(self):
+        """
+        GIVEN bounty hunters on days 3, 4 and 8 of a planet
+        WHEN get_intervals_starts
+        THEN returns the earliest day of every interval within the bounds
+        """
+        hoth = self.graph.get_planet_id("Hoth")
+        calendar = HuntersCalendar({(hoth, 3), (hoth, 4), (hoth, 8)}, countdown=20)
+        self.assertEqual(
+            [0, 3, 4, 5, 8, 9], list(calendar.get_intervals_starts(hoth, 0, 20))
+        )
+        self.assertEqual([4, 5, 8], list(calendar.get_intervals_starts(hoth, 4, 8)))
+        self.assertEqual(2, calendar.count(hoth, 3, 8))
+
+    def test_long_countdown(self):
+        """
+        GIVEN a countdown of 100000 days and bounty hunters on Hoth and Dagobah
+        WHEN solve_intervals
+        THEN waits on Tatooine until Hoth is free
+        """
+        bounty_hunters = [
+            BountyHunter(planet=planet, day=day)
+            for planet in ("Hoth", "Dagobah")
+            for day in range(6, 50)
+        ]
+        routes = self.routes + [
+            Route(origin="Hoth", destination="Tatooine", travel_time=1)
+        ]
+        graph = UniverseGraph.from_routes(routes)
+        bounty_hunters_index = generate_bounty_hunters_index(bounty_hunters, graph)
+
+        encounters, plan = solve_intervals(
+            start="Tatooine",
+            end="Endor",
+            countdown=100_000,
+            autonomy=6,
+            graph=graph,
+            bounty_hunters_index=bounty_hunters_index,
+        )
+        formatted_plan = format_plan(plan, 6)
+        self.assertEqual(0, encounters)
+        self.assertEqual(48, len(formatted_plan))
+        self.assertEqual(
+            ("Tatooine", 44), (formatted_plan[44].planet, formatted_plan[44].day)
+        )
+        self.assertNotEqual("Tatooine", formatted_plan[45].planet)
@@ -0,0 +1,72 @@
+import unittest
+
+
+from app.cache import LRUCache
+from app.metrics import Histogram, Gauge, OddsMetrics, format_server_timing
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram(self):
+        """
+        GIVEN a histogram with observations
+        WHEN render
+        THEN returns cumulated buckets, sum and count in the Prometheus format
+        """
+        histogram = Histogram("duration_seconds", "Duration", ("stage",), (0.5, 1))
+        histogram.observe(0.25, stage="search")
+        histogram.observe(0.5, stage="search")
+        histogram.observe(2, stage="search")
+        self.assertEqual(
+            [
+                "# HELP duration_seconds Duration",
+                "# TYPE duration_seconds histogram",
+                'duration_seconds_bucket{stage="search",le="0.5"} 2',
+                'duration_seconds_bucket{stage="search",le="1.0"} 2',
+                'duration_seconds_bucket{stage="search",le="+Inf"} 3',
+                'duration_seconds_sum{stage="search"} 2.75',
+                'duration_seconds_count{stage="search"} 3',
+            ],
+            histogram.render(),
+        )
+
+    def test_gauge_max(self):
+        """
+        GIVEN a gauge
+        WHEN set_max
+        THEN keeps the largest value
+        """
+        gauge = Gauge("peak", "Peak")
+        gauge.set_max(3)
+        gauge.set_max(2)
+        self.assertEqual("peak 3", gauge.render()[-1])
+
+    def test_cache_metrics(self):
+        """
+        GIVEN OddsMetrics with a cache
+        WHEN the cache is used and the metrics rendered
+        THEN returns the hits, misses, evictions and size of the cache
+        """
+        metrics = OddsMetrics()
+        cache = LRUCache(size=1)
+        metrics.add_cache("odds", cache)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("b")
+        cache.get("a")
+
+        lines = metrics.render().splitlines()
+        self.assertIn('cache_hits_total{cache="odds"} 1', lines)
+        self.assertIn('cache_misses_total{cache="odds"} 1', lines)
+        self.assertIn('cache_evictions_total{cache="odds"} 1', lines)
+        self.assertIn('cache_items{cache="odds"} 1', lines)
+
+    def test_server_timing(self):
+        """
+        GIVEN durations in seconds
+        WHEN format_server_timing
+        THEN returns the Server-Timing header in milliseconds
+        """
+        self.assertEqual(
+            "universe;dur=1.000, search;dur=12.500",
+            format_server_timing({"universe": 0.001, "search": 0.0125}),
+        )
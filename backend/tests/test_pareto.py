@@ -0,0 +1,67 @@
+import unittest
+
+
+from app.models import BountyHunter
+from app.lib import generate_bounty_hunters_index, format_plan
+from app.graph import UniverseGraph
+from app.pareto import solve_pareto
+from app.solver import SolverStats
+from test_engines import FIXTURE_ROUTES
+
+
+class TestPareto(unittest.TestCase):
+    def setUp(self) -> None:
+        self.routes = FIXTURE_ROUTES
+        self.graph = UniverseGraph.from_routes(self.routes)
+
+    def test_frontier(self):
+        """
+        GIVEN bounty hunters on Hoth on days 6, 7 and 8
+        WHEN solve_pareto with a countdown of 10
+        THEN returns the trade-offs between encounters, arrival day and refills
+        """
+        bounty_hunters_index = generate_bounty_hunters_index(
+            [BountyHunter(planet="Hoth", day=day) for day in (6, 7, 8)], self.graph
+        )
+        frontier = solve_pareto(
+            start="Tatooine",
+            end="Endor",
+            countdown=10,
+            autonomy=6,
+            graph=self.graph,
+            bounty_hunters_index=bounty_hunters_index,
+        )
+        self.assertEqual(
+            [(2, 8, 1), (1, 9, 1), (0, 10, 2)],
+            [(encounters, day, refills) for encounters, day, refills, _ in frontier],
+        )
+        plan = format_plan(frontier[1][3], 6)
+        self.assertEqual(
+            [
+                ("Tatooine", 0),
+                ("Dagobah", 6),
+                ("Dagobah", 7),
+                ("Hoth", 8),
+                ("Endor", 9),
+            ],
+            [(node.planet, node.day) for node in plan],
+        )
+
+    def test_unreachable_arrival(self):
+        """
+        GIVEN a countdown too short to reach the arrival
+        WHEN solve_pareto
+        THEN returns no plan without expanding any state
+        """
+        stats = SolverStats()
+        frontier = solve_pareto(
+            start="Tatooine",
+            end="Endor",
+            countdown=6,
+            autonomy=6,
+            graph=self.graph,
+            bounty_hunters_index=set(),
+            stats=stats,
+        )
+        self.assertEqual([], frontier)
+        self.assertEqual(0, stats.states_expanded)
@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+import signal
+import tempfile
+import time
+import unittest
+
+
+from app.prefork import Prefork
+
+
+def wait_for(condition, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("condition not met")
+        time.sleep(0.05)
+
+
+class TestPrefork(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.workers_dir = os.path.join(self.tmp.name, "workers")
+        os.mkdir(self.workers_dir)
+        self.preload_path = os.path.join(self.tmp.name, "preload")
+
+        def preload():
+            with open(self.preload_path, "a") as file:
+                file.write(f"{os.getpid()}\n")
+
+        def serve():
+            # Writes its pid with the number of preloads it inherited
+            with open(self.preload_path) as file:
+                preloads = len(file.readlines())
+            with open(os.path.join(self.workers_dir, str(os.getpid())), "w") as file:
+                file.write(str(preloads))
+            while True:
+                signal.pause()
+
+        self.prefork = Prefork(serve, workers=2, preload=preload, graceful_timeout=5)
+        self.supervisor = multiprocessing.get_context("fork").Process(
+            target=self.prefork.run
+        )
+        self.supervisor.start()
+
+    def tearDown(self) -> None:
+        # Stops the workers along with the supervisor
+        if self.supervisor.pid is not None and self.supervisor.is_alive():
+            os.kill(self.supervisor.pid, signal.SIGTERM)
+        self.supervisor.join(10)
+        self.tmp.cleanup()
+
+    def get_workers(self):
+        # { pid: preloads } of the running workers
+        workers = {}
+        for name in os.listdir(self.workers_dir):
+            pid = int(name)
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                continue
+            with open(os.path.join(self.workers_dir, name)) as file:
+                content = file.read()
+            if content:
+                workers[pid] = int(content)
+        return workers
+
+    def test_workers_restarted(self):
+        """
+        GIVEN Prefork with 2 workers
+        WHEN a worker dies
+        THEN another worker is forked, without preloading again
+        """
+        wait_for(lambda: len(self.get_workers()) == 2)
+        first, second = self.get_workers()
+        os.kill(first, signal.SIGKILL)
+
+        wait_for(
+            lambda: len(self.get_workers()) == 2 and first not in self.get_workers()
+        )
+        self.assertIn(second, self.get_workers())
+        self.assertEqual([1, 1], list(self.get_workers().values()))
+
+    def test_reload(self):
+        """
+        GIVEN Prefork with 2 workers
+        WHEN SIGHUP
+        THEN preloads again and replaces the workers by new ones
+        """
+        wait_for(lambda: len(self.get_workers()) == 2)
+        old_workers = set(self.get_workers())
+        os.kill(self.supervisor.pid, signal.SIGHUP)
+
+        wait_for(lambda: set(self.get_workers()).isdisjoint(old_workers))
+        wait_for(lambda: len(self.get_workers()) == 2)
+        self.assertEqual([2, 2], list(self.get_workers().values()))
+
+    def test_stop(self):
+        """
+        GIVEN Prefork with 2 workers
+        WHEN SIGTERM
+        THEN stops the workers and returns
+        """
+        wait_for(lambda: len(self.get_workers()) == 2)
+        workers = set(self.get_workers())
+        os.kill(self.supervisor.pid, signal.SIGTERM)
+
+        self.supervisor.join(10)
+        self.assertEqual(0, self.supervisor.exitcode)
+        for pid in workers:
+            with self.assertRaises(ProcessLookupError):
+                os.kill(pid, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
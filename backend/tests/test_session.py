@@ -0,0 +1,109 @@
+import unittest
+import tempfile
+import time
+
+
+from app.graph import UniverseGraph
+from app.lib import give_me_the_odds, format_plan
+from app.models import MillenniumFalcon, Empire, BountyHunter
+from app.session import SolverSession
+from app.solver import SolverTimeout
+from test_engines import FIXTURE_ROUTES
+
+
+class TestSession(unittest.TestCase):
+    def setUp(self) -> None:
+        _, tmp = tempfile.mkstemp()
+        self.millennium_falcon = MillenniumFalcon(
+            autonomy=6,
+            departure="Tatooine",
+            arrival="Endor",
+            routes_db=tmp,
+        )
+        self.graph = UniverseGraph.from_routes(FIXTURE_ROUTES)
+
+    def test_update(self):
+        """
+        GIVEN SolverSession
+        WHEN update with edited bounty hunters and countdowns
+        THEN returns the same odds as give_me_the_odds
+        """
+        session = SolverSession(self.millennium_falcon, self.graph)
+        bounty_hunters = []
+        for countdown, planet, day in [
+            (8, "Hoth", 6),
+            (8, "Hoth", 7),
+            (9, "Hoth", 8),
+            (10, "Dagobah", 7),
+            (7, "Endor", 9),
+            (20, "Dagobah", 8),
+            (9, "Dagobah", 6),
+        ]:
+            bounty_hunters.append(BountyHunter(planet=planet, day=day))
+            empire = Empire(countdown=countdown, bounty_hunters=bounty_hunters)
+            odd, plan = session.update(empire)
+            expected_odd, expected_plan = give_me_the_odds(
+                self.millennium_falcon, empire, self.graph
+            )
+            with self.subTest(countdown=countdown, planet=planet, day=day):
+                self.assertEqual(expected_odd, odd)
+                if expected_plan is None:
+                    self.assertIsNone(plan)
+                else:
+                    self.assertEqual(
+                        len(format_plan(expected_plan, 6)),
+                        len(format_plan(plan, 6)),  # type: ignore
+                    )
+
+    def test_update_countdown_grows(self):
+        """
+        GIVEN SolverSession
+        WHEN update with a longer countdown than the explored one
+        THEN the state space capacity grows
+        """
+        session = SolverSession(self.millennium_falcon, self.graph)
+        session.update(Empire(countdown=8, bounty_hunters=[]))
+        self.assertEqual(8, session.state_space.countdown)  # type: ignore
+        session.update(Empire(countdown=9, bounty_hunters=[]))
+        self.assertEqual(16, session.state_space.countdown)  # type: ignore
+
+    def test_update_max_countdown(self):
+        """
+        GIVEN SolverSession with a max_countdown
+        WHEN update with longer and longer countdowns
+        THEN the capacity stops at max_countdown, longer countdowns are rejected
+        """
+        session = SolverSession(self.millennium_falcon, self.graph, max_countdown=12)
+        session.update(Empire(countdown=8, bounty_hunters=[]))
+        odd, _ = session.update(Empire(countdown=9, bounty_hunters=[]))
+        self.assertEqual(100, odd)
+        self.assertEqual(12, session.state_space.countdown)  # type: ignore
+        with self.assertRaises(ValueError):
+            session.update(Empire(countdown=13, bounty_hunters=[]))
+
+    def test_update_timeout(self):
+        """
+        GIVEN SolverSession
+        WHEN update runs past its deadline
+        THEN SolverTimeout is raised and the next update starts afresh
+        """
+        session = SolverSession(self.millennium_falcon, self.graph)
+        with self.assertRaises(SolverTimeout):
+            session.update(Empire(countdown=10_000, bounty_hunters=[]), deadline=0)
+        self.assertIsNone(session.state_space)
+        odd, _ = session.update(Empire(countdown=8, bounty_hunters=[]))
+        self.assertEqual(100, odd)
+
+    def test_update_waits_until_deadline(self):
+        """
+        GIVEN SolverSession being updated by another request
+        WHEN update
+        THEN waits for it until the deadline, then SolverTimeout is raised
+        """
+        session = SolverSession(self.millennium_falcon, self.graph)
+        empire = Empire(countdown=8, bounty_hunters=[])
+        with session.lock:
+            with self.assertRaises(SolverTimeout):
+                session.update(empire, deadline=time.time() + 0.05)
+        odd, _ = session.update(empire, deadline=time.time() + 10)
+        self.assertEqual(100, odd)
@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+
+from app.database import SqliteDB
+from app.models import Route
+from app.graph import UniverseGraph
+from app.snapshot import (
+    get_db_stamp,
+    get_snapshot_path,
+    load_snapshot,
+    write_snapshot,
+)
+
+
+def get_edges(graph: UniverseGraph):
+    planets = graph.planets
+    return {
+        (planets[origin], planets[destination], travel_time)
+        for origin in range(len(graph))
+        for destination, travel_time in graph.get_outgoing(origin)
+    }
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.sqlite_path = os.path.join(self.tmp_dir.name, "universe.db")
+        self.data = [
+            ("Tatoine", "Dagobah", 6),
+            ("Tatoine", "Hoth", 4),
+            ("Hoth", "Endor", 1),
+            ("Dagobah", "Hoth", 1),
+            ("Dagobah", "Endor", 1),
+            ("Dagobah", "Bespin", 2),
+        ]
+        con = sqlite3.connect(self.sqlite_path)
+        con.execute(
+            "CREATE TABLE routes (origin TEXT, destination TEXT, travel_time INT);"
+        )
+        con.executemany("INSERT INTO routes VALUES(?,?,?)", self.data)
+        con.commit()
+        con.close()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_write_and_load(self):
+        """
+        GIVEN a UniverseGraph written as a snapshot
+        WHEN load_snapshot with the same stamp
+        THEN returns the same planets and routes, in both directions
+        """
+        graph = UniverseGraph.from_routes(
+            Route(origin=origin, destination=destination, travel_time=travel_time)
+            for origin, destination, travel_time in self.data
+        )
+        path = get_snapshot_path(self.sqlite_path)
+        stamp = get_db_stamp(self.sqlite_path)
+        write_snapshot(path, graph, stamp)
+
+        loaded = load_snapshot(path, stamp)
+        self.assertEqual(graph.planets, loaded.planets)
+        self.assertEqual(set(self.data), get_edges(loaded))
+        for planet_id in range(len(graph)):
+            self.assertEqual(
+                list(graph.get_incoming(planet_id)),
+                list(loaded.get_incoming(planet_id)),
+            )
+
+    def test_stale_snapshot(self):
+        """
+        GIVEN a snapshot of the database
+        WHEN the database is updated, or the snapshot is truncated
+        THEN load_snapshot returns None
+        """
+        path = get_snapshot_path(self.sqlite_path)
+        stamp = get_db_stamp(self.sqlite_path)
+        graph = UniverseGraph.from_routes([])
+        write_snapshot(path, graph, stamp)
+        self.assertIsNotNone(load_snapshot(path, stamp))
+
+        con = sqlite3.connect(self.sqlite_path)
+        con.execute("INSERT INTO routes VALUES('Alderaan', 'Hoth', 2)")
+        con.commit()
+        con.close()
+        self.assertIsNone(load_snapshot(path, get_db_stamp(self.sqlite_path)))
+
+        with open(path, "r+b") as file:
+            file.truncate(10)
+        self.assertIsNone(load_snapshot(path, stamp))
+
+    def test_sqlite_db_snapshot(self):
+        """
+        GIVEN SqliteDB instances on the same database
+        WHEN get_universe_graph
+        THEN the first one compiles the snapshot, the next ones map it
+        """
+        path = get_snapshot_path(self.sqlite_path)
+        self.assertFalse(os.path.exists(path))
+
+        db = SqliteDB()
+        db.connect(self.sqlite_path)
+        graph = db.get_universe_graph()
+        self.assertTrue(os.path.exists(path))
+        db.disconnect()
+
+        other = SqliteDB()
+        other.connect(self.sqlite_path)
+        mapped = other.get_universe_graph()
+        self.assertIsInstance(mapped.outgoing[0], memoryview)
+        self.assertEqual(get_edges(graph), get_edges(mapped))
+        other.disconnect()
@@ -0,0 +1,241 @@
+import unittest
+
+
+from app.models import BountyHunter, MillenniumFalconPlan
+from app.lib import (
+    generate_bounty_hunters_index,
+    compute_odd,
+    format_plan,
+)
+from app.graph import UniverseGraph
+from app.solver import (
+    solve,
+    PlanNode,
+    SolverStats,
+    StateSpace,
+    can_end_plan,
+    can_wait,
+    get_jumps,
+)
+from test_engines import FIXTURE_ROUTES
+
+
+class TestSolver(unittest.TestCase):
+    def setUp(self) -> None:
+        self.routes = FIXTURE_ROUTES
+        self.bounty_hunters = [
+            BountyHunter(planet="Hoth", day=6),
+            BountyHunter(planet="Hoth", day=7),
+            BountyHunter(planet="Hoth", day=8),
+        ]
+        self.graph = UniverseGraph.from_routes(self.routes)
+        self.bounty_hunters_index = generate_bounty_hunters_index(
+            self.bounty_hunters, self.graph
+        )
+
+    def test_solve(self):
+        """
+        GIVEN routes and bounty hunters
+        WHEN solve
+        THEN returns the odd and route_len of the best plan, no plan when the
+        countdown is too short
+        """
+        # { countdown: (odd, route_len) }, the other countdowns have no plan
+        expected = {8: (81, 4), 9: (90, 5), 10: (100, 6)}
+        for countdown in range(0, 11):
+            encounters, plan = solve(
+                start="Tatooine",
+                end="Endor",
+                countdown=countdown,
+                autonomy=6,
+                graph=self.graph,
+                bounty_hunters_index=self.bounty_hunters_index,
+            )
+            with self.subTest(countdown=countdown):
+                if countdown not in expected:
+                    self.assertIsNone(plan)
+                    continue
+                self.assertEqual(
+                    expected[countdown],
+                    (compute_odd(encounters), len(list(iter_plan(plan)))),
+                )
+
+    def test_solve_no_plan(self):
+        """
+        GIVEN a countdown too short to reach the arrival
+        WHEN solve
+        THEN returns no plan
+        """
+        encounters, plan = solve(
+            start="Tatooine",
+            end="Endor",
+            countdown=6,
+            autonomy=6,
+            graph=self.graph,
+            bounty_hunters_index=set(),
+        )
+        self.assertEqual(0, encounters)
+        self.assertIsNone(plan)
+
+    def test_solve_unreachable_arrival(self):
+        """
+        GIVEN an arrival that cannot be reached before the end of the countdown
+        WHEN solve
+        THEN returns no plan without expanding any state
+        """
+        stats = SolverStats()
+        encounters, plan = solve(
+            start="Tatooine",
+            end="Endor",
+            countdown=1000,
+            autonomy=5,
+            graph=self.graph,
+            bounty_hunters_index=set(),
+            stats=stats,
+        )
+        self.assertIsNone(plan)
+        self.assertEqual(0, stats.states_expanded)
+
+    def test_solve_prunes_unreachable_states(self):
+        """
+        GIVEN states the departure cannot reach by their day
+        WHEN solve
+        THEN they are pruned
+        """
+        stats = SolverStats()
+        solve(
+            start="Tatooine",
+            end="Endor",
+            countdown=10,
+            autonomy=6,
+            graph=self.graph,
+            bounty_hunters_index=set(),
+            stats=stats,
+        )
+        # Dagobah and Hoth are 6 days away from the departure: their states
+        # before day 6 are never expanded, nor the ones a fuller tank on the
+        # same planet and day beats (57 states without the pruning)
+        self.assertEqual(25, stats.states_expanded)
+
+    def test_solve_large_countdown(self):
+        """
+        GIVEN a countdown of thousands of days
+        WHEN solve
+        THEN returns the plan avoiding the bounty hunters
+        """
+        encounters, plan = solve(
+            start="Tatooine",
+            end="Endor",
+            countdown=1000,
+            autonomy=6,
+            graph=self.graph,
+            bounty_hunters_index=self.bounty_hunters_index,
+        )
+        self.assertEqual(0, encounters)
+        self.assertIsNotNone(plan)
+
+    def test_transitions(self):
+        """
+        GIVEN the fixture universe, with Endor as arrival
+        WHEN get_jumps, can_wait and can_end_plan
+        THEN jumps fit in the fuel left, Tatooine (no incoming route) and Endor
+        (the arrival) cannot be waited on, and every day up to the countdown
+        can end a plan since Endor has incoming routes
+        """
+        get_id = self.graph.get_planet_id
+        tatooine, hoth, endor = get_id("Tatooine"), get_id("Hoth"), get_id("Endor")
+
+        self.assertEqual([], list(get_jumps(self.graph, tatooine, 5)))
+        self.assertEqual(2, len(list(get_jumps(self.graph, tatooine, 6))))
+        self.assertFalse(can_wait(self.graph, endor, tatooine))
+        self.assertTrue(can_wait(self.graph, endor, hoth))
+        self.assertFalse(can_wait(self.graph, endor, endor))
+        self.assertTrue(can_end_plan(self.graph, endor, 7, 10))
+        self.assertTrue(can_end_plan(self.graph, endor, 10, 10))
+        self.assertFalse(can_end_plan(self.graph, endor, 11, 10))
+        # Without incoming route the arrival planet cannot be waited on
+        self.assertFalse(can_end_plan(self.graph, tatooine, 7, 10))
+        self.assertTrue(can_end_plan(self.graph, tatooine, 10, 10))
+
+    def test_format_plan_node(self):
+        """
+        GIVEN a PlanNode returned by solve
+        WHEN format_plan
+        THEN returns the list of MillenniumFalconPlan with fuel used
+        """
+        _, plan = solve(
+            start="Tatooine",
+            end="Endor",
+            countdown=8,
+            autonomy=6,
+            graph=self.graph,
+            bounty_hunters_index=self.bounty_hunters_index,
+        )
+        self.assertIsInstance(plan, PlanNode)
+        formatted_plan = format_plan(plan, 6)  # type: ignore
+        expected = [
+            MillenniumFalconPlan(planet="Tatooine", day=0, fuel=6, refill=False),
+            MillenniumFalconPlan(
+                planet="Hoth", day=6, fuel=0, refill=True, hunted=True
+            ),
+            MillenniumFalconPlan(
+                planet="Hoth", day=7, fuel=1, refill=False, hunted=True
+            ),
+            MillenniumFalconPlan(planet="Endor", day=8, fuel=0, refill=False),
+        ]
+        self.assertEqual(expected, formatted_plan)
+
+    def test_state_space_same_as_solve(self):
+        """
+        GIVEN StateSpace built for the longest countdown
+        WHEN StateSpace.solve for every countdown
+        THEN returns the same encounters and route_len as solve
+        """
+        state_space = StateSpace(
+            start="Tatooine",
+            end="Endor",
+            countdown=12,
+            autonomy=6,
+            graph=self.graph,
+        )
+        for countdown in range(0, 13):
+            expected_encounters, expected_plan = solve(
+                start="Tatooine",
+                end="Endor",
+                countdown=countdown,
+                autonomy=6,
+                graph=self.graph,
+                bounty_hunters_index=self.bounty_hunters_index,
+            )
+            encounters, plan = state_space.solve(self.bounty_hunters_index, countdown)
+            with self.subTest(countdown=countdown):
+                if expected_plan is None:
+                    self.assertIsNone(plan)
+                    continue
+                self.assertEqual(expected_encounters, encounters)
+                self.assertEqual(
+                    format_plan(expected_plan, 6),
+                    format_plan(plan, 6),  # type: ignore
+                )
+
+    def test_state_space_countdown_too_large(self):
+        """
+        GIVEN StateSpace
+        WHEN StateSpace.solve with a longer countdown
+        THEN raises ValueError
+        """
+        state_space = StateSpace(
+            start="Tatooine",
+            end="Endor",
+            countdown=8,
+            autonomy=6,
+            graph=self.graph,
+        )
+        with self.assertRaises(ValueError):
+            state_space.solve(self.bounty_hunters_index, 9)
+
+
+def iter_plan(plan):
+    while plan:
+        yield plan
+        plan = plan.parent